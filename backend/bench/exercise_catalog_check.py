@@ -0,0 +1,62 @@
+# bench/exercise_catalog_check.py
+"""
+운동 이름 매칭 확인 (utils.exercise_catalog.lookup_exercise).
+
+잘못 합쳐졌던 이름(비슷하지만 다른 운동)과 합쳐져야 하는 이름(띄어쓰기, 오타, 별칭)을 표로 두고,
+카탈로그나 EXERCISE_MATCH_* 값을 바꾼 뒤 매칭 결과가 달라지지 않았는지 확인합니다.
+기대값 None은 카탈로그에 없는 운동이라 원래 이름으로 저장되어야 한다는 뜻입니다.
+
+    python -m bench.exercise_catalog_check
+"""
+import argparse
+
+CASES = [
+    # 비슷하지만 다른 운동: 다른 표준 운동으로 합치면 안 됨
+    ("스티프 레그 데드리프트", None),
+    ("스티프레그데드리프트", None),
+    ("머신 숄더프레스", None),
+    ("숄더프레스", None),
+    ("바벨 숄더프레스", "오버헤드프레스"),
+    ("디클라인 벤치프레스", None),
+    ("클로즈그립 벤치프레스", None),
+    ("핵스쿼트", "핵스쿼트"),
+    ("스미스머신 스쿼트", None),
+    ("인클라인 덤벨 플라이", "인클라인덤벨플라이"),
+    ("케이블 플라이", "케이블크로스오버"),
+    ("플라이", None),
+    ("케이블 크런치", None),
+    ("아놀드 프레스", None),
+    # 같은 운동: 띄어쓰기, 별칭, 오타
+    ("벤치 프레스", "벤치프레스"),
+    ("Bench press", "벤치프레스"),
+    ("벤치 프래스", "벤치프레스"),
+    ("렛풀다운", "랫풀다운"),
+    ("데드리프드", "데드리프트"),
+    ("레그 익스텐숀", "레그익스텐션"),
+    ("사이드 레터럴 레이스", "사이드레터럴레이즈"),
+    ("덤벨 숄더 프레스", "덤벨숄더프레스"),
+    ("싱글 레그 데드리프트", "싱글레그데드리프트"),
+    ("원암 덤벨 로우", "덤벨로우"),
+    ("행잉 레그레이즈", "레그레이즈"),
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="운동 이름 매칭이 비슷한 다른 운동을 합치지 않는지 확인")
+    parser.parse_args(argv)
+
+    from utils.exercise_catalog import lookup_exercise, get_exercise_catalog_stats
+
+    ok = True
+    for query, expected in CASES:
+        exercise = lookup_exercise(query)
+        got = exercise["name"] if exercise else None
+        ok &= got == expected
+        print(f"[{'OK' if got == expected else 'FAIL'}] {query!r} -> {got!r} (expected {expected!r})")
+    stats = get_exercise_catalog_stats()
+    print(f"[INFO] exact {stats['exact']}, contains {stats['contains']}, fuzzy {stats['fuzzy']}, misses {stats['misses']}")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# bench/fake_ollama.py
+"""
+로컬 가짜 Ollama HTTP 서버 (/api/chat, /api/generate, /api/ps).
+
+모델 로딩 시간과 keep_alive 만료를 흉내 내므로, utils/ollama_client의 warm-up/keep-alive/동시성 제한을
+실제 HTTP 경로 그대로 검증할 수 있습니다.
+
+    python -m bench.fake_ollama --port 11434 --load-ms 1500 --tokens-per-s 40
+    OLLAMA_HOST=http://127.0.0.1:11434 python main.py
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from bench.fakes import FAKE_REPLY
+
+
+def _parse_keep_alive(value, default_s: float = 300.0) -> float:
+    """'30m', '10s', '1h', 숫자(초), -1(무한) 을 초 단위로 변환합니다."""
+    if value is None:
+        return default_s
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    match = re.fullmatch(r"(-?\d+(?:\.\d+)?)(ms|s|m|h)?", str(value).strip())
+    if not match:
+        return default_s
+    number = float(match.group(1))
+    if number < 0:
+        return float("inf")
+    return number * {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}[match.group(2)]
+
+
+def create_app(load_s: float = 1.5, first_token_s: float = 0.05, tokens_per_s: float = 40.0) -> FastAPI:
+    app = FastAPI()
+    state = {"loaded_until": {}, "requests": 0, "loads": 0, "max_active": 0, "active": 0}
+    load_lock = asyncio.Lock()
+
+    async def ensure_loaded(model: str, keep_alive) -> float:
+        async with load_lock:
+            now = time.monotonic()
+            load = 0.0
+            if state["loaded_until"].get(model, 0) < now:
+                await asyncio.sleep(load_s)
+                load = load_s
+                state["loads"] += 1
+            state["loaded_until"][model] = time.monotonic() + _parse_keep_alive(keep_alive)
+            return load
+
+    def final_chunk(model: str, key: str, load: float, started: float, tokens: int) -> dict:
+        total = time.perf_counter() - started
+        chunk = {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int(total * 1e9),
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": 20,
+            "prompt_eval_duration": int(first_token_s * 1e9),
+            "eval_count": tokens,
+            "eval_duration": int(max(0.0, total - load - first_token_s) * 1e9),
+        }
+        if key == "message":
+            chunk["message"] = {"role": "assistant", "content": ""}
+        else:
+            chunk["response"] = ""
+        return chunk
+
+    async def generate_stream(model: str, key: str, keep_alive, empty: bool):
+        state["active"] += 1
+        state["max_active"] = max(state["max_active"], state["active"])
+        try:
+            started = time.perf_counter()
+            load = await ensure_loaded(model, keep_alive)
+            pieces = [] if empty else [FAKE_REPLY[i:i + 3] for i in range(0, len(FAKE_REPLY), 3)]
+            if pieces:
+                await asyncio.sleep(first_token_s)
+            for piece in pieces:
+                body = {"model": model, "created_at": datetime.now(timezone.utc).isoformat(), "done": False}
+                body[key] = {"role": "assistant", "content": piece} if key == "message" else piece
+                yield json.dumps(body, ensure_ascii=False) + "\n"
+                await asyncio.sleep(1.0 / tokens_per_s if tokens_per_s > 0 else 0)
+            yield json.dumps(final_chunk(model, key, load, started, len(pieces))) + "\n"
+        finally:
+            state["active"] -= 1
+
+    async def handle(request: Request, key: str):
+        body = await request.json()
+        state["requests"] += 1
+        model = body.get("model", "")
+        empty = key == "response" and not body.get("prompt")
+        stream = generate_stream(model, key, body.get("keep_alive"), empty)
+        if body.get("stream", True):
+            return StreamingResponse(stream, media_type="application/x-ndjson")
+        last = None
+        async for line in stream:
+            last = json.loads(line)
+        return JSONResponse(last)
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        return await handle(request, "message")
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        return await handle(request, "response")
+
+    @app.get("/api/ps")
+    async def ps():
+        now = time.monotonic()
+        return {
+            "models": [{"name": m, "expires_in_s": round(until - now, 1)} for m, until in state["loaded_until"].items() if until > now],
+            "stats": {k: v for k, v in state.items() if k != "loaded_until"},
+        }
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="가짜 Ollama HTTP 서버")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--load-ms", type=float, default=1500.0)
+    parser.add_argument("--first-token-ms", type=float, default=50.0)
+    parser.add_argument("--tokens-per-s", type=float, default=40.0)
+    args = parser.parse_args()
+    app = create_app(args.load_ms / 1000, args.first_token_ms / 1000, args.tokens_per_s)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
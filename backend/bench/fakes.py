@@ -0,0 +1,321 @@
+# bench/fakes.py
+"""
+벤치마크용 외부 서비스 가짜 구현 모음.
+
+Azure OpenAI(chat/embedding), Azure Vision OCR, Azure Batch TTS, YouTube, Ollama를
+프로세스 내부에서 흉내 내며, 지연 시간과 토큰 생성 속도를 설정할 수 있습니다.
+install_fakes()는 이미 import된 모듈의 속성을 교체하므로 앱 import 이후에 호출해야 합니다.
+"""
+import asyncio
+import hashlib
+import io
+import json
+import time
+import zipfile
+from types import SimpleNamespace
+
+import numpy as np
+
+EMBEDDING_DIM = 1536
+
+
+class FakeLatency:
+    """가짜 서비스의 지연 설정 (초 단위)."""
+
+    def __init__(
+        self,
+        first_token_s: float = 0.3,
+        tokens_per_s: float = 60.0,
+        completion_s: float = 0.2,
+        embedding_s: float = 0.05,
+        ocr_s: float = 0.4,
+        youtube_s: float = 0.15,
+        tts_poll_scale: float = 0.01,
+        ollama_load_s: float = 0.0,
+    ):
+        self.first_token_s = first_token_s
+        self.tokens_per_s = tokens_per_s
+        self.completion_s = completion_s
+        self.embedding_s = embedding_s
+        self.ocr_s = ocr_s
+        self.youtube_s = youtube_s
+        self.tts_poll_scale = tts_poll_scale
+        self.ollama_load_s = ollama_load_s
+
+
+# 스트리밍 답변에 사용할 고정 문장 (토큰 단위로 잘라서 전송)
+FAKE_REPLY = (
+    "좋아요! 오늘은 하체 위주로 운동해볼게요. "
+    "1일차: 스쿼트 12회 4세트, 런지 15회 3세트, 레그프레스 10회 4세트 60kg. "
+    "운동 전에는 5분 정도 가볍게 스트레칭하고, 무릎이 발끝을 넘지 않도록 주의하세요. "
+    "운동 후에는 단백질 위주의 식사로 회복을 도와주세요."
+)
+
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM) -> list[float]:
+    """같은 텍스트에 항상 같은 단위 벡터를 반환합니다."""
+    seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:4], "little")
+    vec = np.random.default_rng(seed).standard_normal(dim)
+    return (vec / np.linalg.norm(vec)).tolist()
+
+
+def _tokens(text: str, size: int = 3) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class _FakeAsyncStream:
+    """openai.AsyncStream과 같은 방식으로 순회/종료할 수 있는 스트림."""
+
+    def __init__(self, latency: FakeLatency, reply: str, include_usage: bool):
+        self._latency = latency
+        self._reply = reply
+        self._include_usage = include_usage
+        self._closed = False
+
+    async def close(self):
+        self._closed = True
+
+    async def __aiter__(self):
+        await asyncio.sleep(self._latency.first_token_s)
+        interval = 1.0 / self._latency.tokens_per_s if self._latency.tokens_per_s > 0 else 0.0
+        pieces = _tokens(self._reply)
+        for i, piece in enumerate(pieces):
+            if self._closed:
+                return
+            if i and interval:
+                await asyncio.sleep(interval)
+            yield SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=piece), finish_reason=None)],
+                usage=None,
+            )
+        if self._include_usage:
+            yield SimpleNamespace(choices=[], usage=_usage(400, len(pieces)))
+
+
+def _usage(prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0):
+    return SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens),
+    )
+
+
+class FakeChatCompletions:
+    def __init__(self, latency: FakeLatency):
+        self.latency = latency
+        # should_search_long_term_memory 에 대한 답 ('yes'면 RAG 경로를 탑니다)
+        self.memory_decision = "no"
+        self.calls = 0
+
+    async def create(self, model=None, messages=None, stream=False, **kwargs):
+        self.calls += 1
+        if stream:
+            include_usage = bool((kwargs.get("stream_options") or {}).get("include_usage"))
+            return _FakeAsyncStream(self.latency, FAKE_REPLY, include_usage)
+
+        await asyncio.sleep(self.latency.completion_s)
+        system = str(messages[0]["content"]) if messages else ""
+        if kwargs.get("response_format", {}).get("type") == "json_object":
+            if "plans" in system:
+                content = json.dumps({"plans": []})
+            elif "highlights" in system:
+                content = json.dumps({"goals": "체지방 감량", "injuries": "", "preferences": "하체 운동 선호", "highlights": "스쿼트 자세를 자주 질문함"}, ensure_ascii=False)
+            else:
+                content = json.dumps({"intent": "general_chat"})
+        elif kwargs.get("max_tokens") == 5:
+            content = self.memory_decision
+        elif "keyword" in system:
+            content = "스쿼트, 하체 운동"
+        else:
+            content = FAKE_REPLY
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+            usage=_usage(300, 20),
+        )
+
+
+class FakeEmbeddings:
+    def __init__(self, latency: FakeLatency):
+        self.latency = latency
+        self.calls = 0
+
+    async def create(self, input=None, model=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency.embedding_s)
+        texts = input if isinstance(input, list) else [input]
+        return SimpleNamespace(
+            data=[SimpleNamespace(index=i, embedding=fake_embedding(t)) for i, t in enumerate(texts)],
+            usage=SimpleNamespace(prompt_tokens=sum(len(t) for t in texts), total_tokens=sum(len(t) for t in texts)),
+        )
+
+
+class FakeAzureOpenAI:
+    """AsyncAzureOpenAI 대체 객체."""
+
+    def __init__(self, latency: FakeLatency):
+        self.chat = SimpleNamespace(completions=FakeChatCompletions(latency))
+        self.embeddings = FakeEmbeddings(latency)
+
+
+class FakeOllamaClient:
+    """ollama.AsyncClient 대체 객체 (stream=True 전용)."""
+
+    def __init__(self, latency: FakeLatency):
+        self.latency = latency
+        self._loaded = False
+        self._client = SimpleNamespace(aclose=self._aclose)
+
+    async def _aclose(self):
+        pass
+
+    async def generate(self, model=None, prompt=None, keep_alive=None, **kwargs):
+        load_s = 0.0 if self._loaded else self.latency.ollama_load_s
+        await asyncio.sleep(load_s)
+        self._loaded = True
+        return {"model": model, "response": "", "done": True, "load_duration": int(load_s * 1e9)}
+
+    async def chat(self, model=None, messages=None, stream=False, **kwargs):
+        latency = self.latency
+
+        async def _gen():
+            started = time.perf_counter()
+            load_s = 0.0
+            if not self._loaded:
+                load_s = latency.ollama_load_s
+                await asyncio.sleep(load_s)
+                self._loaded = True
+            await asyncio.sleep(latency.first_token_s)
+            interval = 1.0 / latency.tokens_per_s if latency.tokens_per_s > 0 else 0.0
+            pieces = _tokens(FAKE_REPLY)
+            for piece in pieces:
+                yield {"message": {"role": "assistant", "content": piece}, "done": False}
+                if interval:
+                    await asyncio.sleep(interval)
+            total_ns = int((time.perf_counter() - started) * 1e9)
+            yield {
+                "message": {"role": "assistant", "content": ""},
+                "done": True,
+                "total_duration": total_ns,
+                "load_duration": int(load_s * 1e9),
+                "eval_count": len(pieces),
+                "eval_duration": total_ns - int(load_s * 1e9),
+            }
+
+        return _gen()
+
+
+class FakeVisionClient:
+    """ImageAnalysisClient 대체 객체. 실제 SDK처럼 동기(blocking) 호출입니다."""
+
+    def __init__(self, latency: FakeLatency):
+        self.latency = latency
+
+    def analyze(self, image_data=None, visual_features=None, **kwargs):
+        time.sleep(self.latency.ocr_s)
+        lines = [SimpleNamespace(text=t) for t in ("체중 72.4kg", "골격근량 33.1kg", "체지방률 18.2%")]
+        return SimpleNamespace(read=SimpleNamespace(blocks=[SimpleNamespace(lines=lines)]))
+
+
+class _FakeYoutubeRequest:
+    def __init__(self, latency: FakeLatency, q: str, max_results: int):
+        self.latency = latency
+        self.q = q
+        self.max_results = max_results
+
+    def execute(self):
+        time.sleep(self.latency.youtube_s)
+        return {"items": [
+            {"id": {"videoId": f"vid{i}"}, "snippet": {"title": f"{self.q} 강의 {i}"}}
+            for i in range(self.max_results)
+        ]}
+
+
+def fake_youtube_build(latency: FakeLatency):
+    """googleapiclient.discovery.build 대체 함수를 만듭니다."""
+
+    def build(service, version, developerKey=None, **kwargs):
+        search = SimpleNamespace(
+            list=lambda q="", maxResults=3, **kw: _FakeYoutubeRequest(latency, q, maxResults)
+        )
+        return SimpleNamespace(search=lambda: search)
+
+    return build
+
+
+def _fake_wav_zip() -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("0001.wav", b"RIFF" + b"\x00" * 2048)
+    return buf.getvalue()
+
+
+class FakeTTSRequests:
+    """batch_tts 라우터가 사용하는 requests 모듈 대체 객체."""
+
+    RESULT_URL = "https://fake-tts.local/result.zip"
+
+    def __init__(self, latency: FakeLatency):
+        self.latency = latency
+        self._zip = _fake_wav_zip()
+        self._polls: dict[str, int] = {}
+
+    def put(self, url, headers=None, data=None, **kwargs):
+        self._polls[url] = 0
+        return SimpleNamespace(status_code=201, text="created", json=lambda: {"status": "NotStarted"})
+
+    def get(self, url, headers=None, **kwargs):
+        if url == self.RESULT_URL:
+            return SimpleNamespace(status_code=200, text="", content=self._zip)
+        self._polls[url] = self._polls.get(url, 0) + 1
+        body = {"status": "Running", "outputs": {}}
+        if self._polls[url] >= 2:
+            body = {"status": "Succeeded", "outputs": {"result": self.RESULT_URL}}
+        return SimpleNamespace(status_code=200, text=json.dumps(body), json=lambda: body)
+
+
+def install_fakes(latency: FakeLatency, patch_ollama: bool = True) -> dict:
+    """앱 모듈에 가짜 클라이언트를 주입하고, 조작용 핸들을 반환합니다.
+    patch_ollama=False이면 Ollama는 OLLAMA_HOST(가짜 HTTP 서버 등)로 실제 요청을 보냅니다."""
+    import utils.llm_gateway as llm_gateway
+    import utils.ollama_client as ollama_client
+    import utils.ocr as ocr
+    import utils.youtube_search as youtube_search
+    import routers.batch_tts as batch_tts
+
+    fake_openai = FakeAzureOpenAI(latency)
+    llm_gateway.chat_client = fake_openai
+    llm_gateway.embedding_client = fake_openai
+
+    fake_ollama = FakeOllamaClient(latency)
+    if patch_ollama:
+        ollama_client._client = fake_ollama
+
+    ocr.client = FakeVisionClient(latency)
+    youtube_search.build = fake_youtube_build(latency)
+
+    batch_tts.requests = FakeTTSRequests(latency)
+    batch_tts.time = SimpleNamespace(sleep=lambda s: time.sleep(s * latency.tts_poll_scale))
+
+    return {"openai": fake_openai, "ollama": fake_ollama}
+
+
+class FakeCrossEncoder:
+    """CrossEncoder 대체 객체. 실제 모델처럼 CPU를 점유하는 동기 호출입니다."""
+
+    def __init__(self, model_name: str = "", per_pair_s: float = 0.004, **kwargs):
+        self.model_name = model_name
+        self.per_pair_s = per_pair_s
+
+    def predict(self, pairs, **kwargs):
+        time.sleep(self.per_pair_s * len(pairs))
+        return np.array([
+            (int.from_bytes(hashlib.sha1(f"{q}|{c}".encode("utf-8")).digest()[:2], "little") / 65535.0)
+            for q, c in pairs
+        ])
+
+
+def preinstall_fake_reranker():
+    """crud.chat import 전에 호출하면 ko-reranker 모델 다운로드/로드를 건너뜁니다."""
+    import sys
+    sys.modules["sentence_transformers"] = SimpleNamespace(CrossEncoder=FakeCrossEncoder)
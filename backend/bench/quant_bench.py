@@ -0,0 +1,103 @@
+# bench/quant_bench.py
+"""
+질문 임베딩 1차 검색의 exact(float) / int8 / int8 + 차원 축소 방식을 비교합니다.
+
+실제 질문 임베딩처럼 주제별로 뭉쳐 있는 합성 벡터(주제 중심 + 잡음)를 만들고,
+float 코사인 유사도 상위 10개를 정답으로 삼아 각 방식의 recall@10, 벡터당 메모리, 검색 지연을 보고합니다.
+
+    python -m bench.quant_bench --vectors 2000 --dim 1536 --queries 200 --projections 0,512,256
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from bench.run import percentiles
+from utils.vector_quant import QuantizedIndex, top_k
+
+
+def make_vectors(n: int, dim: int, topics: int, noise: float, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((topics, dim))
+    labels = rng.integers(0, topics, size=n)
+    vectors = centers[labels] + noise * rng.standard_normal((n, dim))
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def run(args) -> dict:
+    rng = np.random.default_rng(args.seed)
+    corpus = make_vectors(args.vectors, args.dim, args.topics, args.noise, rng)
+    # 질의는 저장된 질문을 살짝 바꾼 후속 질문을 흉내 냅니다.
+    picks = rng.integers(0, args.vectors, size=args.queries)
+    queries = corpus[picks] + args.query_noise * rng.standard_normal((args.queries, args.dim))
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+    exact_latency = []
+    truth = []
+    for q in queries:
+        started = time.perf_counter()
+        truth.append(set(top_k(corpus @ q, args.k).tolist()))
+        exact_latency.append(time.perf_counter() - started)
+
+    # exact 경로는 요청마다 모든 질문의 JSON 임베딩을 파싱하므로 그 비용도 함께 잽니다.
+    encoded = [json.dumps(v.tolist()) for v in corpus]
+    started = time.perf_counter()
+    for text in encoded:
+        np.array(json.loads(text))
+    json_parse_s = time.perf_counter() - started
+
+    report = {
+        "config": vars(args),
+        "exact_float64": {
+            # 현재 경로는 JSON 문자열을 파싱해 float64 배열로 만듭니다.
+            "bytes_per_vector": args.dim * 8,
+            "json_bytes_per_vector": round(np.mean([len(text) for text in encoded]), 1),
+            "json_parse_ms_per_request": round(json_parse_s * 1000, 2),
+            "recall_at_k": 1.0,
+            "search_ms": percentiles(exact_latency),
+        },
+    }
+
+    prompt_ids = list(range(1, args.vectors + 1))
+    for projection_dim in args.projections:
+        index = QuantizedIndex(projection_dim=projection_dim)
+        index.add(prompt_ids, corpus, [""] * args.vectors, [None] * args.vectors)
+        latency, hits = [], 0
+        for q, expected in zip(queries, truth):
+            started = time.perf_counter()
+            found = index.search(q, args.k)
+            latency.append(time.perf_counter() - started)
+            hits += len({prompt_id - 1 for _, prompt_id, _, _ in found} & expected)
+        name = f"int8_proj{projection_dim}" if projection_dim else "int8"
+        report[name] = {
+            "bytes_per_vector": index.codes.shape[1] + index.scales.itemsize,
+            "recall_at_k": round(hits / (args.k * args.queries), 4),
+            "search_ms": percentiles(latency),
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="양자화 임베딩 인덱스 recall/메모리/지연 벤치마크")
+    parser.add_argument("--vectors", type=int, default=2000, help="사용자 한 명이 가진 질문 수")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--topics", type=int, default=40)
+    parser.add_argument("--noise", type=float, default=0.6)
+    parser.add_argument("--query-noise", type=float, default=0.02)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--projections", default="0,512,256", help="쉼표로 구분한 투영 차원 (0은 투영 없음)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+    args.projections = [int(p) for p in args.projections.split(",") if p.strip()]
+
+    report = run(args)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
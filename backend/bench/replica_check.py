@@ -0,0 +1,97 @@
+# bench/replica_check.py
+"""
+읽기 replica 라우팅 확인 (database.read_fetch_all / mark_user_write).
+
+서로 복제하지 않는 두 DB를 primary/replica로 지정하고 같은 날짜에 서로 다른 운동 계획 행을 넣은 뒤,
+crud.plan.get_plans_by_range가 돌려주는 행으로 어느 쪽에서 읽었는지 확인합니다.
+
+1. 최근 쓰기가 없으면 replica에서 읽는다.
+2. 그 사용자가 쓴 직후(READ_YOUR_WRITES_S 이내)에는 primary에서 읽는다.
+3. 창이 지나면 다시 replica에서 읽는다.
+4. replica 쿼리가 실패하면 primary로 다시 읽고, REPLICA_RETRY_S 동안 primary만 쓴다.
+
+기본값은 임시 sqlite 파일 두 개이며, 로컬 MySQL 두 개로 확인하려면 (4단계에서 replica의 workout_plans를 지웁니다):
+    python -m bench.replica_check --primary mysql+pymysql://root:pw@127.0.0.1:3306/gympt_a \\
+                                  --replica mysql+pymysql://root:pw@127.0.0.1:3307/gympt_b
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+from datetime import date
+
+USER_ID = "bench_replica_user"
+PLAN_DATE = date(2020, 1, 1)
+WINDOW_S = 0.5
+
+
+async def _prepare(db, exercise_name: str):
+    from bench.seed import create_schema
+
+    await create_schema(db, db.url.dialect)
+    await db.execute("DELETE FROM workout_plans WHERE user_id = :user_id", {"user_id": USER_ID})
+    await db.execute(
+        """INSERT INTO workout_plans (user_id, plan_date, exercise_name, reps, sets, weight_kg, duration_min)
+           VALUES (:user_id, :plan_date, :exercise_name, 10, 3, NULL, NULL)""",
+        {"user_id": USER_ID, "plan_date": PLAN_DATE, "exercise_name": exercise_name},
+    )
+
+
+async def _source() -> str:
+    from crud import plan as plan_crud
+
+    rows = await plan_crud.get_plans_by_range(USER_ID, PLAN_DATE, PLAN_DATE)
+    return rows[0]["exercise_name"] if rows else "none"
+
+
+async def _check():
+    import database as db_module
+    from crud import plan as plan_crud
+
+    primary, replica = db_module.database, db_module.replica_database
+    await primary.connect()
+    await db_module.connect_replica()
+    results = []
+    try:
+        await _prepare(primary, "primary")
+        await _prepare(replica, "replica")
+
+        results.append(("no recent write -> replica", await _source(), "replica"))
+        await plan_crud.update_workout_plan_status(USER_ID, PLAN_DATE, "completed")
+        results.append(("right after own write -> primary", await _source(), "primary"))
+        await asyncio.sleep(WINDOW_S + 0.1)
+        results.append(("after the window -> replica", await _source(), "replica"))
+
+        await replica.execute("DROP TABLE workout_plans")
+        results.append(("replica query fails -> primary", await _source(), "primary"))
+        results.append(("during the retry window -> primary", await _source(), "primary"))
+        await primary.execute("DELETE FROM workout_plans WHERE user_id = :user_id", {"user_id": USER_ID})
+    finally:
+        await db_module.disconnect_replica()
+        await primary.disconnect()
+
+    ok = True
+    for name, got, expected in results:
+        ok &= got == expected
+        print(f"[{'OK' if got == expected else 'FAIL'}] {name}: read from {got}")
+    print(f"[INFO] read routing stats: {db_module.get_read_routing_stats()}")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="읽기 replica 라우팅 / read-your-writes / 장애 시 primary 사용 확인")
+    parser.add_argument("--primary", default=None, help="primary DATABASE_URL (기본: 임시 sqlite)")
+    parser.add_argument("--replica", default=None, help="replica DATABASE_REPLICA_URL (기본: 임시 sqlite)")
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="gympt_replica_")
+    # database 모듈은 import 시점에 환경 변수를 읽으므로 먼저 설정합니다.
+    os.environ["DATABASE_URL"] = args.primary or f"sqlite:///{os.path.join(tmp, 'primary.sqlite3')}"
+    os.environ["DATABASE_REPLICA_URL"] = args.replica or f"sqlite:///{os.path.join(tmp, 'replica.sqlite3')}"
+    os.environ["READ_YOUR_WRITES_S"] = str(WINDOW_S)
+    os.environ["REPLICA_RETRY_S"] = "30"
+    raise SystemExit(0 if asyncio.run(_check()) else 1)
+
+
+if __name__ == "__main__":
+    main()
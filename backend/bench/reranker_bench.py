@@ -0,0 +1,136 @@
+# bench/reranker_bench.py
+"""
+ko-reranker 백엔드 비교: PyTorch CrossEncoder vs ONNX(int8).
+
+- 일치도: 같은 (질문, 후보) 쌍에 대한 두 백엔드 점수의 Pearson/Spearman 상관계수와 top-3 일치율
+- 지연: RAG 한 턴과 같은 크기(질문 1개 x 후보 --candidates개)의 predict 호출 p50/p95/p99
+- 메모리: 모델 로드 전후 프로세스 RSS 증가량 (각 백엔드를 별도 프로세스에서 측정)
+
+실제 모델이 필요합니다. 먼저 `python -m utils.reranker --export models/ko-reranker-onnx` 로 ONNX 모델을 만드세요.
+
+    python -m bench.reranker_bench --candidates 10 --rounds 50 --min-spearman 0.98
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from bench.run import percentiles
+from bench.seed import QUESTIONS
+
+EXTRA_CANDIDATES = [
+    "벤치프레스 할 때 어깨가 아파요", "다이어트 중에 치킨 먹어도 되나요?", "하루에 물은 얼마나 마셔야 해?",
+    "데드리프트 허리 통증", "런지 무릎 각도", "공복 유산소 효과 있어?", "플랭크 몇 분 해야 해?",
+    "근육통 있을 때 운동해도 돼?", "단백질 보충제 언제 먹어?", "스쿼트 깊이는 어느 정도가 좋아?",
+]
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def make_rounds(rounds: int, candidates: int, seed: int) -> list[list[tuple[str, str]]]:
+    rng = random.Random(seed)
+    pool = list(QUESTIONS) + EXTRA_CANDIDATES
+    result = []
+    for _ in range(rounds):
+        question = rng.choice(pool) + rng.choice(["", " 다시 알려줘", " 자세히", "?"])
+        result.append([(question, rng.choice(pool) * rng.randint(1, 4)) for _ in range(candidates)])
+    return result
+
+
+def measure(backend: str, rounds: list) -> dict:
+    """현재 프로세스에서 한 백엔드를 로드하고 점수/지연/메모리를 잽니다."""
+    os.environ["RERANKER_BACKEND"] = backend
+    before = _rss_mb()
+    started = time.perf_counter()
+    from utils.reranker import load_reranker
+    model = load_reranker()
+    load_s = time.perf_counter() - started
+    model.predict(rounds[0])  # warm-up
+    latency, scores = [], []
+    for pairs in rounds:
+        started = time.perf_counter()
+        result = model.predict(pairs)
+        latency.append(time.perf_counter() - started)
+        scores.append([float(x) for x in result])
+    return {
+        "backend": backend,
+        "load_s": round(load_s, 2),
+        "rss_delta_mb": round(_rss_mb() - before, 1),
+        "predict_ms": percentiles(latency),
+        "scores": scores,
+    }
+
+
+def _spearman(a: np.ndarray, b: np.ndarray) -> float:
+    rank_a = np.argsort(np.argsort(a))
+    rank_b = np.argsort(np.argsort(b))
+    return float(np.corrcoef(rank_a, rank_b)[0, 1])
+
+
+def compare(torch_result: dict, onnx_result: dict) -> dict:
+    a = np.concatenate([np.asarray(s) for s in torch_result["scores"]])
+    b = np.concatenate([np.asarray(s) for s in onnx_result["scores"]])
+    top3 = [
+        len(set(np.argsort(-np.asarray(x))[:3]) & set(np.argsort(-np.asarray(y))[:3])) / 3
+        for x, y in zip(torch_result["scores"], onnx_result["scores"])
+    ]
+    return {
+        "pearson": round(float(np.corrcoef(a, b)[0, 1]), 4),
+        "spearman": round(_spearman(a, b), 4),
+        "top3_overlap": round(float(np.mean(top3)), 4),
+        "max_abs_diff": round(float(np.max(np.abs(a - b))), 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ko-reranker PyTorch/ONNX 일치도 및 지연/메모리 벤치마크")
+    parser.add_argument("--candidates", type=int, default=10, help="RAG 한 턴의 후보 수 (retrieve_k)")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--min-spearman", type=float, default=0.98, help="이 값보다 낮으면 종료 코드 1")
+    parser.add_argument("--worker", choices=("torch", "onnx"), help=argparse.SUPPRESS)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    rounds = make_rounds(args.rounds, args.candidates, args.seed)
+    if args.worker:
+        print(json.dumps(measure(args.worker, rounds)))
+        return
+
+    # 메모리를 따로 재기 위해 백엔드마다 새 프로세스에서 실행합니다.
+    results = {}
+    for backend in ("torch", "onnx"):
+        proc = subprocess.run(
+            [sys.executable, "-m", "bench.reranker_bench", "--worker", backend,
+             "--candidates", str(args.candidates), "--rounds", str(args.rounds), "--seed", str(args.seed)],
+            capture_output=True, text=True, check=True,
+        )
+        results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("worker", "out")},
+        "parity": compare(results["torch"], results["onnx"]),
+        **{name: {k: v for k, v in result.items() if k != "scores"} for name, result in results.items()},
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if report["parity"]["spearman"] < args.min_spearman:
+        print(f"[BENCH] Spearman {report['parity']['spearman']} < {args.min_spearman}: ONNX 점수가 PyTorch와 충분히 일치하지 않습니다.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+# bench/run.py
+"""
+GymPT 백엔드 시나리오 부하 테스트.
+
+모든 외부 서비스를 bench/fakes.py 의 가짜 구현으로 바꾸고, 로컬 sqlite(또는 MySQL)에
+시드 데이터를 넣은 뒤 uvicorn을 같은 프로세스의 별도 스레드에서 띄워 측정합니다.
+
+사용 예 (backend 폴더에서):
+    python -m bench.run --scenarios chat,chat_rag,calendar,tts --concurrency 20 --requests 200 \
+        --out bench_baseline.json
+    python -m bench.run --out after.json --compare bench_baseline.json
+
+결과 JSON에는 시나리오별 처리량, TTFT(첫 바이트까지의 시간) p50/p95/p99,
+전체 지연, 서버 이벤트 루프 지연(lag)이 기록되어 이전 결과와 비교할 수 있습니다.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+# 앱 모듈이 import 시점에 읽는 환경 변수를 먼저 채워둡니다.
+_BENCH_ENV = {
+    "AZURE_OPENAI_ENDPOINT": "https://fake-openai.local",
+    "AZURE_OPENAI_KEY": "bench",
+    "AZURE_OPENAI_API_VERSION": "2024-06-01",
+    "AZURE_OPENAI_DEPLOYMENT_NAME": "gpt-4o",
+    "AZURE_OPENAI_EMBEDDING_API_VERSION": "2024-06-01",
+    "AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME": "text-embedding-3-large",
+    "VISION_ENDPOINT": "https://fake-vision.local",
+    "VISION_KEY": "bench",
+    "YOUTUBE_API_KEY": "bench",
+    "TTS_SUBSCRIPTION_KEY": "bench",
+    "SECRET_KEY": "bench-secret",
+    "ALGORITHM": "HS256",
+    # 백그라운드 작업은 측정 노이즈가 되므로 기본적으로 끕니다.
+    "SUMMARY_ENABLED": "false",
+    "ARCHIVE_ENABLED": "false",
+    "EMBED_BACKFILL_ENABLED": "false",
+    # 시드 사용자 수가 적어 사용자별 속도 제한에 걸리므로 끕니다. (전체 동시 스트림 제한은 그대로 측정)
+    "CHAT_USER_RATE_PER_MIN": "0",
+}
+
+SCENARIOS = ("chat", "chat_rag", "chat_local", "chat_auto", "calendar", "tts")
+# chat_auto 시나리오에서 순서대로 보내는 메시지 (인사/맞장구와 루틴 요청이 섞인 흐름)
+AUTO_MESSAGES = ("안녕", "스쿼트 자세 알려줘", "고마워", "3일치 하체 루틴 짜줘")
+
+
+def percentiles(values: list[float]) -> dict:
+    """nearest-rank 방식의 p50/p95/p99 (밀리초)."""
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def pick(q):
+        idx = max(0, min(len(ordered) - 1, int(round(q * len(ordered) + 0.5)) - 1))
+        return round(ordered[idx] * 1000, 2)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(ordered[-1] * 1000, 2)}
+
+
+class LoopLagProbe:
+    """서버 이벤트 루프에서 주기적으로 잠들었다 깨어나며 예정보다 늦은 시간을 기록합니다."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: list[float] = []
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    def reset(self) -> list[float]:
+        samples, self.samples = self.samples, []
+        return samples
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class BenchServer:
+    """uvicorn을 별도 스레드(자체 이벤트 루프)에서 실행합니다."""
+
+    def __init__(self, app, port: int, seed_coro_factory=None):
+        import uvicorn
+
+        self.port = port
+        self.probe = LoopLagProbe()
+        self._seed_coro_factory = seed_coro_factory
+        self._server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+        self._thread = threading.Thread(target=self._run, name="bench-server", daemon=True)
+        self.error: BaseException | None = None
+
+    def _run(self):
+        async def main():
+            if self._seed_coro_factory is not None:
+                await self._seed_coro_factory()
+            probe_task = asyncio.create_task(self.probe.run())
+            try:
+                await self._server.serve()
+            finally:
+                probe_task.cancel()
+
+        try:
+            asyncio.run(main())
+        except BaseException as e:  # 메인 스레드에서 확인할 수 있도록 보관
+            self.error = e
+
+    def start(self, timeout: float = 60.0):
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if self.error or time.monotonic() > deadline:
+                raise RuntimeError(f"벤치 서버 시작 실패: {self.error}")
+            time.sleep(0.05)
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+async def _timed_stream(client, method: str, url: str, **kwargs) -> tuple[float, float, int]:
+    """(TTFT, 전체 시간, 상태 코드)를 반환합니다."""
+    started = time.perf_counter()
+    ttft = None
+    async with client.stream(method, url, **kwargs) as resp:
+        async for chunk in resp.aiter_bytes():
+            # SSE 하트비트(": ping")는 첫 토큰으로 치지 않습니다.
+            if ttft is None and chunk and not chunk.lstrip().startswith(b":"):
+                ttft = time.perf_counter() - started
+        status = resp.status_code
+    total = time.perf_counter() - started
+    return (ttft if ttft is not None else total), total, status
+
+
+def _request_factory(scenario: str, token_for, users: int, stream_format: str = "raw"):
+    today = date.today()
+
+    def make(i: int) -> tuple[str, str, dict]:
+        headers = {"Authorization": f"Bearer {token_for(i % users)}"}
+        if scenario == "chat_auto":
+            data = {"message": AUTO_MESSAGES[i % len(AUTO_MESSAGES)], "model": "auto", "stream_format": stream_format}
+            return "POST", "/chat/image", {"headers": headers, "data": data}
+        if scenario in ("chat", "chat_rag", "chat_local"):
+            model = "llama3.2:1b" if scenario == "chat_local" else "gpt-4o"
+            data = {"message": "지난번에 말한 하체 루틴 다시 알려줘" if scenario == "chat_rag" else "스쿼트 자세 알려줘",
+                    "model": model, "stream_format": stream_format}
+            return "POST", "/chat/image", {"headers": headers, "data": data}
+        if scenario == "calendar":
+            start = today - timedelta(days=30)
+            end = today + timedelta(days=30)
+            if i % 3 == 2:
+                return "GET", "/plans/progress", {"headers": headers}
+            url = f"/plans/range/{start.isoformat()}/{end.isoformat()}" if i % 3 == 0 \
+                else f"/diet_plans/range/{start.isoformat()}/{end.isoformat()}"
+            return "GET", url, {"headers": headers}
+        if scenario == "tts":
+            return "POST", "/batch_tts", {"headers": headers, "json": {"text": "스쿼트 12회 4세트를 진행하세요."}}
+        raise ValueError(f"알 수 없는 시나리오: {scenario}")
+
+    return make
+
+
+async def run_scenario(client, server: BenchServer, fakes: dict, scenario: str, args, token_for) -> dict:
+    fakes["openai"].chat.completions.memory_decision = "yes" if scenario == "chat_rag" else "no"
+    make = _request_factory(scenario, token_for, args.users, args.stream_format)
+    sem = asyncio.Semaphore(args.concurrency)
+    ttfts, totals, errors = [], [], 0
+    chat_calls_before = fakes["openai"].chat.completions.calls
+    embed_calls_before = fakes["openai"].embeddings.calls
+
+    async def one(i):
+        nonlocal errors
+        method, url, kwargs = make(i)
+        async with sem:
+            try:
+                ttft, total, status = await _timed_stream(client, method, url, **kwargs)
+            except Exception as e:
+                print(f"[BENCH] {scenario} 요청 실패: {e}")
+                errors += 1
+                return
+        if status >= 400:
+            errors += 1
+            return
+        ttfts.append(ttft)
+        totals.append(total)
+
+    server.probe.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    wall = time.perf_counter() - started
+    lag = server.probe.reset()
+
+    return {
+        "requests": args.requests,
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(totals) / wall, 2) if wall else None,
+        "ttft_ms": percentiles(ttfts),
+        "latency_ms": percentiles(totals),
+        "loop_lag_ms": percentiles(lag),
+        "upstream_calls": {
+            "chat": fakes["openai"].chat.completions.calls - chat_calls_before,
+            "embeddings": fakes["openai"].embeddings.calls - embed_calls_before,
+        },
+    }
+
+
+def compare(current: dict, baseline: dict):
+    """두 결과 JSON의 주요 지표 차이를 출력합니다."""
+    print("\n=== baseline 대비 변화 ===")
+    for name, cur in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        rows = [("throughput_rps", cur["throughput_rps"], base["throughput_rps"])]
+        for metric in ("ttft_ms", "latency_ms", "loop_lag_ms"):
+            for q in ("p50", "p95", "p99"):
+                rows.append((f"{metric}.{q}", cur[metric][q], base[metric][q]))
+        print(f"[{name}]")
+        for label, c, b in rows:
+            if c is None or b is None:
+                continue
+            delta = ((c - b) / b * 100) if b else 0.0
+            print(f"  {label:<18} {b:>10} -> {c:>10} ({delta:+.1f}%)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="GymPT 백엔드 부하 테스트 (가짜 외부 서비스 사용)")
+    parser.add_argument("--scenarios", default="chat,chat_rag,calendar,tts",
+                        help=f"쉼표로 구분한 시나리오 ({', '.join(SCENARIOS)})")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=100, help="시나리오당 요청 수")
+    parser.add_argument("--users", type=int, default=50, help="시드 사용자 수")
+    parser.add_argument("--turns", type=int, default=40, help="사용자당 시드 대화 턴 수")
+    parser.add_argument("--plan-days", type=int, default=90)
+    parser.add_argument("--first-token-ms", type=float, default=300.0)
+    parser.add_argument("--tokens-per-s", type=float, default=60.0)
+    parser.add_argument("--completion-ms", type=float, default=200.0)
+    parser.add_argument("--embedding-ms", type=float, default=50.0)
+    parser.add_argument("--ocr-ms", type=float, default=400.0)
+    parser.add_argument("--database-url", default=None,
+                        help="기본값은 임시 sqlite 파일. mysql://... 을 주면 해당 DB에 스키마/시드를 만듭니다.")
+    parser.add_argument("--ollama-http", action="store_true",
+                        help="Ollama 클라이언트를 교체하지 않고 가짜 Ollama HTTP 서버(bench/fake_ollama.py)로 요청합니다.")
+    parser.add_argument("--ollama-load-ms", type=float, default=1500.0, help="가짜 Ollama 모델 로딩 시간")
+    parser.add_argument("--stream-format", choices=("raw", "sse"), default="raw", help="채팅 응답 스트림 형식")
+    parser.add_argument("--real-reranker", action="store_true", help="실제 ko-reranker 모델을 로드합니다.")
+    parser.add_argument("--out", default="bench_output.json")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON 경로")
+    return parser.parse_args(argv)
+
+
+async def _client_main(args, server: BenchServer, fakes: dict, token_for) -> dict:
+    import httpx
+
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{server.port}", timeout=120.0, limits=limits) as client:
+        for scenario in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+            if scenario not in SCENARIOS:
+                raise SystemExit(f"알 수 없는 시나리오: {scenario}")
+            print(f"[BENCH] 시나리오 실행: {scenario}")
+            results[scenario] = await run_scenario(client, server, fakes, scenario, args, token_for)
+            print(f"[BENCH] {scenario}: {json.dumps(results[scenario], ensure_ascii=False)}")
+    return results
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    for key, value in _BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+    db_path = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="gympt_bench_"), "bench.sqlite3")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    dialect = "mysql" if os.environ["DATABASE_URL"].startswith("mysql") else "sqlite"
+
+    ollama_server = None
+    if args.ollama_http:
+        from bench.fake_ollama import create_app as create_fake_ollama
+        ollama_port = _free_port()
+        ollama_server = BenchServer(
+            create_fake_ollama(args.ollama_load_ms / 1000, args.first_token_ms / 1000, args.tokens_per_s), ollama_port
+        )
+        ollama_server.start()
+        os.environ["OLLAMA_HOST"] = f"http://127.0.0.1:{ollama_port}"
+
+    from bench.fakes import FakeLatency, install_fakes, preinstall_fake_reranker
+    if not args.real_reranker:
+        preinstall_fake_reranker()
+
+    from main import app
+    from database import database
+    from utils import llm_gateway, ollama_client, model_router, sse, history_writer, reranker, singleflight, admission, metering
+    from crud import chat as chat_crud
+    from bench.seed import seed, bench_user_id
+    from utils.jwt_handler import create_access_token
+
+    latency = FakeLatency(
+        first_token_s=args.first_token_ms / 1000,
+        tokens_per_s=args.tokens_per_s,
+        completion_s=args.completion_ms / 1000,
+        embedding_s=args.embedding_ms / 1000,
+        ocr_s=args.ocr_ms / 1000,
+        ollama_load_s=args.ollama_load_ms / 1000,
+    )
+    fakes = install_fakes(latency, patch_ollama=not args.ollama_http)
+
+    async def seed_db():
+        from databases import Database
+        db = Database(database.url)
+        await db.connect()
+        try:
+            await seed(db, dialect, users=args.users, turns_per_user=args.turns, plan_days=args.plan_days)
+        finally:
+            await db.disconnect()
+
+    tokens = [create_access_token({"sub": bench_user_id(i)}) for i in range(args.users)]
+    server = BenchServer(app, _free_port(), seed_db)
+    server.start()
+    try:
+        results = asyncio.run(_client_main(args, server, fakes, lambda i: tokens[i]))
+    finally:
+        server.stop()
+        if ollama_server is not None:
+            ollama_server.stop()
+
+    report = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "dialect": dialect,
+            "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "database_url")},
+        },
+        "scenarios": results,
+        "prompt_cache": llm_gateway.get_prompt_cache_report(),
+        "ollama": ollama_client.get_ollama_stats(),
+        "routing": model_router.get_routing_stats(),
+        "streaming": sse.get_stream_stats(),
+        "history_writer": history_writer.get_history_writer_stats(),
+        "question_index": chat_crud.get_question_index_stats(),
+        "rerank_cache": reranker.get_rerank_cache_stats(),
+        "singleflight": singleflight.get_singleflight_stats(),
+        "admission": admission.get_admission_stats(),
+        "metering": metering.get_metering_stats(),
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"[BENCH] 결과 저장: {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
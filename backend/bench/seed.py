@@ -0,0 +1,209 @@
+# bench/seed.py
+"""
+벤치마크용 로컬 DB 스키마 생성 및 시드 데이터 삽입.
+
+sqlite(aiosqlite)를 기본 대체 DB로 사용하며, DATABASE_URL이 mysql이면 같은 스키마를 MySQL에 만듭니다.
+"""
+import json
+import random
+from datetime import date, timedelta
+
+from bench.fakes import fake_embedding
+from crud.progress import CREATE_PROGRESS_TABLE, REBUILD_PROGRESS_QUERIES
+
+SQLITE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS training_levels (
+        level INTEGER PRIMARY KEY,
+        description TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS users (
+        user_id TEXT PRIMARY KEY,
+        gender TEXT, age INTEGER, height REAL, weight REAL, level INTEGER,
+        injury_level TEXT, injury_part TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS chat_histories (
+        prompt_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        role_type TEXT NOT NULL,
+        content TEXT NOT NULL,
+        embedding TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_chat_user ON chat_histories (user_id, prompt_id)",
+    """CREATE TABLE IF NOT EXISTS chat_summaries (
+        summary_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        embedding TEXT,
+        first_prompt_id INTEGER NOT NULL,
+        last_prompt_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE IF NOT EXISTS chat_histories_archive (
+        prompt_id INTEGER PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        role_type TEXT NOT NULL,
+        timestamp TIMESTAMP,
+        payload BLOB NOT NULL,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE IF NOT EXISTS llm_usage_daily (
+        usage_date DATE NOT NULL,
+        user_id TEXT NOT NULL,
+        stage TEXT NOT NULL,
+        model TEXT NOT NULL,
+        calls INTEGER NOT NULL DEFAULT 0,
+        errors INTEGER NOT NULL DEFAULT 0,
+        prompt_tokens INTEGER NOT NULL DEFAULT 0,
+        cached_tokens INTEGER NOT NULL DEFAULT 0,
+        completion_tokens INTEGER NOT NULL DEFAULT 0,
+        latency_ms_total INTEGER NOT NULL DEFAULT 0,
+        latency_ms_max INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (usage_date, user_id, stage, model)
+    )""",
+    """CREATE TABLE IF NOT EXISTS exercise_progress (
+        user_id TEXT NOT NULL,
+        exercise_name TEXT NOT NULL,
+        sessions INTEGER NOT NULL DEFAULT 0,
+        total_sets INTEGER NOT NULL DEFAULT 0,
+        total_reps INTEGER NOT NULL DEFAULT 0,
+        total_volume_kg REAL NOT NULL DEFAULT 0,
+        total_duration_min INTEGER NOT NULL DEFAULT 0,
+        best_weight_kg REAL,
+        best_set_volume_kg REAL,
+        first_performed DATE,
+        last_performed DATE,
+        PRIMARY KEY (user_id, exercise_name)
+    )""",
+    """CREATE TABLE IF NOT EXISTS workout_plans (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT, plan_date DATE, exercise_name TEXT,
+        reps INTEGER, sets INTEGER, weight_kg REAL, duration_min INTEGER,
+        status TEXT DEFAULT 'pending',
+        UNIQUE (user_id, plan_date, exercise_name)
+    )""",
+    """CREATE TABLE IF NOT EXISTS diet_plans (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT, plan_date DATE, meal_type TEXT, food_name TEXT,
+        calories INTEGER, protein_g REAL, carbs_g REAL, fat_g REAL,
+        status TEXT DEFAULT 'pending',
+        UNIQUE (user_id, plan_date, meal_type)
+    )""",
+]
+
+MYSQL_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS training_levels (
+        level INT PRIMARY KEY,
+        description VARCHAR(100)
+    )""",
+    """CREATE TABLE IF NOT EXISTS users (
+        user_id VARCHAR(50) PRIMARY KEY,
+        gender VARCHAR(10), age INT, height FLOAT, weight FLOAT, level INT,
+        injury_level VARCHAR(20), injury_part VARCHAR(50)
+    )""",
+    """CREATE TABLE IF NOT EXISTS chat_histories (
+        prompt_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        user_id VARCHAR(50) NOT NULL,
+        role_type VARCHAR(20) NOT NULL,
+        content TEXT NOT NULL,
+        embedding JSON,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        INDEX ix_chat_user (user_id, prompt_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS workout_plans (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id VARCHAR(50), plan_date DATE, exercise_name VARCHAR(100),
+        reps INT, sets INT, weight_kg FLOAT, duration_min INT,
+        status VARCHAR(20) DEFAULT 'pending',
+        UNIQUE KEY uq_workout (user_id, plan_date, exercise_name)
+    )""",
+    """CREATE TABLE IF NOT EXISTS diet_plans (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id VARCHAR(50), plan_date DATE, meal_type VARCHAR(10), food_name VARCHAR(100),
+        calories INT, protein_g FLOAT, carbs_g FLOAT, fat_g FLOAT,
+        status VARCHAR(20) DEFAULT 'pending',
+        UNIQUE KEY uq_diet (user_id, plan_date, meal_type)
+    )""",
+    CREATE_PROGRESS_TABLE,
+]
+
+QUESTIONS = [
+    "스쿼트 자세 알려줘", "단백질 얼마나 먹어야 해?", "어깨가 아픈데 벤치프레스 해도 돼?",
+    "일주일치 하체 루틴 짜줘", "다이어트 식단 추천해줘", "데드리프트 무게 얼마나 올려야 해?",
+    "유산소는 언제 하는 게 좋아?", "잠을 잘 못 자는데 운동에 영향 있어?",
+]
+EXERCISES = ["스쿼트", "벤치프레스", "데드리프트", "런지", "랫풀다운", "플랭크"]
+MEALS = [("아침", "현미밥"), ("점심", "닭가슴살 샐러드"), ("저녁", "고구마"), ("간식", "그릭요거트")]
+
+
+def bench_user_id(i: int) -> str:
+    return f"bench_user_{i:04d}"
+
+
+async def create_schema(db, dialect: str):
+    for stmt in (MYSQL_SCHEMA if dialect == "mysql" else SQLITE_SCHEMA):
+        await db.execute(stmt)
+
+
+async def seed(db, dialect: str, users: int = 50, turns_per_user: int = 40, plan_days: int = 90):
+    """사용자, 대화 기록(임베딩 포함), 운동/식단 계획을 삽입합니다."""
+    await create_schema(db, dialect)
+    rng = random.Random(42)
+
+    if not await db.fetch_one("SELECT 1 FROM training_levels LIMIT 1"):
+        await db.execute_many(
+            "INSERT INTO training_levels (level, description) VALUES (:level, :description)",
+            [{"level": lv, "description": desc} for lv, desc in ((1, "초급"), (2, "중급"), (3, "고급"))],
+        )
+
+    start = date.today() - timedelta(days=plan_days // 2)
+    for i in range(users):
+        user_id = bench_user_id(i)
+        if await db.fetch_one("SELECT 1 FROM users WHERE user_id = :user_id", {"user_id": user_id}):
+            continue
+        await db.execute(
+            """INSERT INTO users (user_id, gender, age, height, weight, level, injury_level, injury_part)
+               VALUES (:user_id, :gender, :age, :height, :weight, :level, :injury_level, :injury_part)""",
+            {
+                "user_id": user_id, "gender": rng.choice(["남", "여"]), "age": rng.randint(20, 55),
+                "height": rng.uniform(155, 190), "weight": rng.uniform(50, 95), "level": rng.randint(1, 3),
+                "injury_level": None, "injury_part": None,
+            },
+        )
+
+        history = []
+        for _ in range(turns_per_user):
+            question = rng.choice(QUESTIONS)
+            history.append({"user_id": user_id, "role_type": "user", "content": question,
+                            "embedding": json.dumps(fake_embedding(question))})
+            history.append({"user_id": user_id, "role_type": "assistant", "content": f"{question}에 대한 답변입니다. " * 8,
+                            "embedding": None})
+        await db.execute_many(
+            "INSERT INTO chat_histories (user_id, role_type, content, embedding) VALUES (:user_id, :role_type, :content, :embedding)",
+            history,
+        )
+
+        workouts, diets = [], []
+        for d in range(plan_days):
+            plan_date = start + timedelta(days=d)
+            for name in rng.sample(EXERCISES, 3):
+                workouts.append({"user_id": user_id, "plan_date": plan_date, "exercise_name": name,
+                                 "reps": 10, "sets": rng.randint(3, 5), "weight_kg": rng.choice([None, 40.0, 60.0]),
+                                 "duration_min": None, "status": "completed" if plan_date < date.today() else "pending"})
+            for meal_type, food in MEALS:
+                diets.append({"user_id": user_id, "plan_date": plan_date, "meal_type": meal_type, "food_name": food,
+                              "calories": rng.randint(150, 600), "protein_g": 20.0, "carbs_g": 40.0, "fat_g": 8.0})
+        await db.execute_many(
+            """INSERT INTO workout_plans (user_id, plan_date, exercise_name, reps, sets, weight_kg, duration_min, status)
+               VALUES (:user_id, :plan_date, :exercise_name, :reps, :sets, :weight_kg, :duration_min, :status)""",
+            workouts,
+        )
+        await db.execute_many(
+            """INSERT INTO diet_plans (user_id, plan_date, meal_type, food_name, calories, protein_g, carbs_g, fat_g)
+               VALUES (:user_id, :plan_date, :meal_type, :food_name, :calories, :protein_g, :carbs_g, :fat_g)""",
+            diets,
+        )
+
+    # 지난 날짜의 계획은 완료된 것으로 넣었으므로 진행 통계를 한 번에 계산해 둡니다.
+    for query in REBUILD_PROGRESS_QUERIES:
+        await db.execute(query)
@@ -0,0 +1,162 @@
+# bench/serialization_bench.py
+"""
+캘린더 범위 조회(/plans/range, /diet_plans/range) 직렬화 경로 비교.
+
+- pydantic: 기존 경로 (행마다 from_orm / response_model 검증 + jsonable_encoder + json)
+- orjson  : utils/fast_json.py 경로 (Record -> dict -> orjson bytes)
+
+경로마다 별도 프로세스(FAST_JSON_RESPONSES=true/false)에서 임시 sqlite에 --rows 개의 계획 행을 넣고,
+plan/meal 라우터와 압축 미들웨어만 올린 앱을 httpx ASGITransport로 호출해
+지연 p50/p95/p99, 응답 크기, 인코딩(identity/gzip/br)별 전송 크기를 기록합니다.
+같은 행 수의 DB 조회만 잰 값(db_fetch_ms)을 함께 기록해 직렬화 비용을 분리해 볼 수 있습니다.
+
+    python -m bench.serialization_bench --rows 1000,10000 --rounds 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from bench.run import percentiles
+
+USER_ID = "bench_user_0000"
+# 하루에 운동 4개 + 식단 4개 = 8행
+ROWS_PER_DAY = 8
+START_DATE = date(2020, 1, 1)
+
+
+async def _seed(db, rows: int) -> date:
+    from bench.seed import EXERCISES, MEALS
+
+    await db.execute("DELETE FROM workout_plans")
+    await db.execute("DELETE FROM diet_plans")
+    days = max(1, rows // ROWS_PER_DAY)
+    workouts, diets = [], []
+    for d in range(days):
+        plan_date = START_DATE + timedelta(days=d)
+        for k in range(4):
+            workouts.append({"user_id": USER_ID, "plan_date": plan_date, "exercise_name": f"{EXERCISES[(d + k) % len(EXERCISES)]} {k}",
+                             "reps": 10, "sets": 3 + k % 3, "weight_kg": 40.0 + k * 2.5, "duration_min": None})
+        for meal_type, food in MEALS:
+            diets.append({"user_id": USER_ID, "plan_date": plan_date, "meal_type": meal_type, "food_name": food,
+                          "calories": 150 + d % 450, "protein_g": 20.0, "carbs_g": 40.0, "fat_g": 8.0})
+    await db.execute_many(
+        """INSERT INTO workout_plans (user_id, plan_date, exercise_name, reps, sets, weight_kg, duration_min)
+           VALUES (:user_id, :plan_date, :exercise_name, :reps, :sets, :weight_kg, :duration_min)""",
+        workouts,
+    )
+    await db.execute_many(
+        """INSERT INTO diet_plans (user_id, plan_date, meal_type, food_name, calories, protein_g, carbs_g, fat_g)
+           VALUES (:user_id, :plan_date, :meal_type, :food_name, :calories, :protein_g, :carbs_g, :fat_g)""",
+        diets,
+    )
+    return START_DATE + timedelta(days=days - 1)
+
+
+async def _measure(mode: str, rows_list: list[int], rounds: int) -> dict:
+    import httpx
+    from fastapi import FastAPI
+
+    from crud import meal as meal_crud
+    from crud import plan as plan_crud
+    from bench.seed import create_schema
+    from database import database
+    from dependencies import get_current_user
+    from routers import meal, plan
+    from utils.compression import CompressionMiddleware, brotli
+
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+    app.include_router(plan.router)
+    app.include_router(meal.router)
+    app.dependency_overrides[get_current_user] = lambda: {"user_id": USER_ID}
+
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    result = {"mode": mode, "sizes": {}}
+    await database.connect()
+    await create_schema(database, "sqlite")
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for rows in rows_list:
+                end_date = await _seed(database, rows)
+                span = f"{START_DATE.isoformat()}/{end_date.isoformat()}"
+
+                fetch_latency = []
+                for _ in range(rounds):
+                    started = time.perf_counter()
+                    await plan_crud.get_plans_by_range(USER_ID, START_DATE, end_date)
+                    await meal_crud.get_diet_plans_by_range(USER_ID, START_DATE, end_date)
+                    fetch_latency.append(time.perf_counter() - started)
+
+                size_report = {"db_fetch_ms": percentiles(fetch_latency)}
+                for path in (f"/plans/range/{span}", f"/diet_plans/range/{span}"):
+                    endpoint = {}
+                    for encoding in encodings:
+                        latency = []
+                        for _ in range(rounds):
+                            started = time.perf_counter()
+                            response = await client.get(path, headers={"Accept-Encoding": encoding})
+                            latency.append(time.perf_counter() - started)
+                            response.raise_for_status()
+                        endpoint[encoding] = {
+                            "latency_ms": percentiles(latency),
+                            "wire_bytes": len(response.content) if encoding == "identity"
+                            else int(response.headers.get("content-length", 0)),
+                        }
+                    body = response.json()
+                    endpoint["items"] = len(body) if isinstance(body, list) else sum(len(v) for v in body.values())
+                    size_report[path.split("/range/")[0]] = endpoint
+                result["sizes"][str(rows)] = size_report
+    finally:
+        await database.disconnect()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="캘린더 범위 조회 직렬화/압축 벤치마크 (pydantic vs orjson)")
+    parser.add_argument("--rows", default="1000,10000", help="쉼표로 구분한 계획 행 수 (운동+식단)")
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--worker", choices=("pydantic", "orjson"), help=argparse.SUPPRESS)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+    rows_list = [int(r) for r in args.rows.split(",") if r.strip()]
+
+    if args.worker:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='gympt_serial_'), 'bench.sqlite3')}"
+        os.environ["FAST_JSON_RESPONSES"] = "true" if args.worker == "orjson" else "false"
+        os.environ.setdefault("SECRET_KEY", "bench-secret")
+        os.environ.setdefault("ALGORITHM", "HS256")
+        print(json.dumps(asyncio.run(_measure(args.worker, rows_list, args.rounds))))
+        return
+
+    # FAST_JSON_RESPONSES는 import 시점에 읽으므로 경로마다 새 프로세스에서 측정합니다.
+    results = {}
+    for mode in ("pydantic", "orjson"):
+        proc = subprocess.run(
+            [sys.executable, "-m", "bench.serialization_bench", "--worker", mode,
+             "--rows", args.rows, "--rounds", str(args.rounds)],
+            capture_output=True, text=True, check=True,
+        )
+        results[mode] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    speedup = {}
+    for rows in map(str, rows_list):
+        for endpoint in ("/plans", "/diet_plans"):
+            before = results["pydantic"]["sizes"][rows][endpoint]["identity"]["latency_ms"]["p50"]
+            after = results["orjson"]["sizes"][rows][endpoint]["identity"]["latency_ms"]["p50"]
+            speedup[f"{endpoint}@{rows}"] = round(before / after, 2) if after else None
+
+    report = {"config": {"rows": rows_list, "rounds": args.rounds}, "p50_speedup": speedup, **results}
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
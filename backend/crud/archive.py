@@ -0,0 +1,98 @@
+# crud/archive.py
+import json
+import zlib
+from datetime import datetime, timedelta
+from database import database
+
+# 요약이 끝난 오래된 대화를 옮겨 두는 cold 테이블. 본문과 임베딩은 zlib으로 압축해 한 컬럼에 저장합니다.
+CREATE_ARCHIVE_TABLE = """
+    CREATE TABLE IF NOT EXISTS chat_histories_archive (
+        prompt_id BIGINT PRIMARY KEY,
+        user_id VARCHAR(50) NOT NULL,
+        role_type VARCHAR(20) NOT NULL,
+        timestamp DATETIME,
+        payload MEDIUMBLOB NOT NULL,
+        archived_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        INDEX ix_archive_user (user_id, prompt_id)
+    )
+"""
+
+async def ensure_archive_table():
+    """chat_histories_archive 테이블이 없으면 생성합니다. (MySQL 전용 DDL)"""
+    if database.url.dialect == "mysql":
+        await database.execute(CREATE_ARCHIVE_TABLE)
+
+def _compress(content: str, embedding) -> bytes:
+    return zlib.compress(json.dumps({"content": content, "embedding": embedding}, ensure_ascii=False).encode("utf-8"), 6)
+
+def _decompress(payload: bytes) -> dict:
+    return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+async def get_archive_candidates(older_than_days: int) -> list[dict]:
+    """요약이 끝났고(prompt_id <= watermark) older_than_days보다 오래된 대화가 있는 사용자와 옮길 수 있는 마지막 prompt_id."""
+    query = """
+        SELECT s.user_id, s.watermark, MAX(c.prompt_id) AS last_prompt_id
+        FROM (SELECT user_id, MAX(last_prompt_id) AS watermark FROM chat_summaries GROUP BY user_id) s
+        JOIN chat_histories c ON c.user_id = s.user_id AND c.prompt_id <= s.watermark
+        WHERE c.timestamp < :cutoff
+        GROUP BY s.user_id, s.watermark
+    """
+    cutoff = datetime.now() - timedelta(days=older_than_days)
+    rows = await database.fetch_all(query=query, values={"cutoff": cutoff})
+    return [dict(row) for row in rows]
+
+async def archive_turns(user_id: str, up_to_prompt_id: int, limit: int) -> int:
+    """up_to_prompt_id 이하의 대화를 최대 limit개까지 cold 테이블로 옮기고, 옮긴 행 수를 반환합니다."""
+    select_query = """
+        SELECT prompt_id, user_id, role_type, content, embedding, timestamp
+        FROM chat_histories
+        WHERE user_id = :user_id AND prompt_id <= :up_to
+        ORDER BY prompt_id ASC
+        LIMIT :limit
+    """
+    rows = await database.fetch_all(query=select_query, values={"user_id": user_id, "up_to": up_to_prompt_id, "limit": limit})
+    rows = [dict(row) for row in rows]
+    # 질문만 옮기고 답변이 hot 테이블에 남는 일이 없도록 마지막 user 메시지는 다음 묶음으로 넘깁니다.
+    if len(rows) == limit and rows[-1]["role_type"] == "user":
+        rows.pop()
+    if not rows:
+        return 0
+
+    archive_values = [{
+        "prompt_id": row["prompt_id"],
+        "user_id": row["user_id"],
+        "role_type": row["role_type"],
+        "timestamp": row["timestamp"],
+        "payload": _compress(row["content"], json.loads(row["embedding"]) if row["embedding"] else None),
+    } for row in rows]
+    async with database.transaction():
+        await database.execute_many(
+            query="""
+                INSERT INTO chat_histories_archive (prompt_id, user_id, role_type, timestamp, payload)
+                VALUES (:prompt_id, :user_id, :role_type, :timestamp, :payload)
+            """,
+            values=archive_values,
+        )
+        await database.execute(
+            query="DELETE FROM chat_histories WHERE user_id = :user_id AND prompt_id BETWEEN :first AND :last",
+            values={"user_id": user_id, "first": rows[0]["prompt_id"], "last": rows[-1]["prompt_id"]},
+        )
+    return len(rows)
+
+async def get_archived_turns(user_id: str, first_prompt_id: int, last_prompt_id: int) -> list[dict]:
+    """요약 레코드가 가리키는 구간의 원문 대화를 cold 테이블에서 복원합니다."""
+    query = """
+        SELECT prompt_id, role_type, timestamp, payload
+        FROM chat_histories_archive
+        WHERE user_id = :user_id AND prompt_id BETWEEN :first AND :last
+        ORDER BY prompt_id ASC
+    """
+    rows = await database.fetch_all(query=query, values={"user_id": user_id, "first": first_prompt_id, "last": last_prompt_id})
+    turns = []
+    for row in rows:
+        payload = _decompress(row["payload"])
+        turns.append({
+            "prompt_id": row["prompt_id"], "role_type": row["role_type"], "timestamp": row["timestamp"],
+            "content": payload["content"], "embedding": payload["embedding"],
+        })
+    return turns
@@ -1,12 +1,25 @@
 # crud/chat.py
 import json
 import numpy as np
-from database import database
+import os
+from collections import OrderedDict
+from database import database, mark_user_write, read_fetch_all, read_fetch_one
 from schemas.chat import ChatHistoryCreate
-from sentence_transformers import CrossEncoder
+from crud import summary as summary_crud
+from utils.vector_quant import QuantizedIndex
+from utils.reranker import load_reranker, predict_cached
 
-# Cross-Encoder 모델 로드 (애플리케이션 시작 시 한 번만 실행되도록)
-cross_encoder = CrossEncoder('Dongjin-kr/ko-reranker')
+# Cross-Encoder 모델 로드 (애플리케이션 시작 시 한 번만 실행되도록, 백엔드는 RERANKER_BACKEND로 선택)
+cross_encoder = load_reranker()
+
+# 가장 관련 있는 요약의 유사도가 이 값 이상이면 원문 대화 검색을 건너뜁니다.
+SUMMARY_SKIP_RAW_SIMILARITY = float(os.getenv("SUMMARY_SKIP_RAW_SIMILARITY", 0.6))
+
+# 1차 검색 방식: "exact"는 매 요청마다 DB의 JSON 임베딩 전체로 코사인 유사도를 계산하고,
+# "int8"은 사용자별 양자화 인덱스를 메모리에 두고 새로 저장된 질문만 DB에서 읽어 추가합니다.
+EMBEDDING_INDEX_MODE = os.getenv("EMBEDDING_INDEX_MODE", "exact")
+EMBEDDING_INDEX_MAX_USERS = int(os.getenv("EMBEDDING_INDEX_MAX_USERS", 1000))
+_question_indexes: "OrderedDict[str, QuantizedIndex]" = OrderedDict()
 
 async def save_chat_history(history: ChatHistoryCreate):
     """대화 내역을 chat_histories 테이블에 저장합니다."""
@@ -21,29 +34,38 @@ async def save_chat_history(history: ChatHistoryCreate):
         "embedding": json.dumps(history.embedding) if history.embedding else None
     }
     await database.execute(query=insert_query, values=values)
+    mark_user_write(history.user_id)
 
-async def retrieve_and_rerank_history(
-    user_id: str, 
-    original_question: str, 
-    transformed_embedding: list[float], 
-    retrieve_k: int = 10, 
-    final_k: int = 3
-) -> list[dict]:
-    """1차로 벡터 검색, 2차로 Cross-Encoder 재정렬을 통해 가장 관련성 높은 대화 기록을 반환합니다."""
-    
-    # --- 1단계: 벡터 유사도 기반 후보군 검색 (Retrieve) ---
+async def save_chat_histories(histories: list[ChatHistoryCreate]):
+    """여러 대화 내역을 한 번의 multi-row INSERT로 저장합니다. prompt_id는 목록 순서대로 증가합니다."""
+    if not histories:
+        return
+    placeholders = []
+    values = {}
+    for i, history in enumerate(histories):
+        placeholders.append(f"(:user_id_{i}, :role_type_{i}, :content_{i}, :embedding_{i})")
+        values[f"user_id_{i}"] = history.user_id
+        values[f"role_type_{i}"] = history.role_type
+        values[f"content_{i}"] = history.content
+        values[f"embedding_{i}"] = json.dumps(history.embedding) if history.embedding else None
+    insert_query = f"""
+        INSERT INTO chat_histories (user_id, role_type, content, embedding)
+        VALUES {", ".join(placeholders)}
+    """
+    await database.execute(query=insert_query, values=values)
+    mark_user_write(*{history.user_id for history in histories})
+
+async def _exact_search(user_id: str, query_embedding: list[float], k: int, min_prompt_id: int) -> list[tuple]:
+    """DB에 저장된 JSON 임베딩 전체와 코사인 유사도를 계산해 상위 k개의 (유사도, prompt_id, 질문, timestamp)를 반환합니다."""
     select_query = """
         SELECT prompt_id, content, embedding, timestamp
         FROM chat_histories
-        WHERE user_id = :user_id AND role_type = 'user' AND embedding IS NOT NULL
+        WHERE user_id = :user_id AND role_type = 'user' AND embedding IS NOT NULL AND prompt_id > :min_prompt_id
     """
-    all_user_questions = await database.fetch_all(query=select_query, values={"user_id": user_id})
-
-    if not all_user_questions:
-        return []
+    all_user_questions = await read_fetch_all(select_query, {"user_id": user_id, "min_prompt_id": min_prompt_id}, user_id=user_id)
 
     # 코사인 유사도 계산
-    new_vec = np.array(transformed_embedding)
+    new_vec = np.array(query_embedding)
     similarities = []
     for row in all_user_questions:
         db_vec = np.array(json.loads(row["embedding"]))
@@ -51,14 +73,63 @@ async def retrieve_and_rerank_history(
         similarities.append((similarity, row["prompt_id"], row["content"], row["timestamp"]))
 
     similarities.sort(key=lambda x: x[0], reverse=True)
-    candidate_questions = similarities[:retrieve_k]
+    return similarities[:k]
+
+async def _get_question_index(user_id: str, min_prompt_id: int) -> QuantizedIndex:
+    """사용자의 양자화 인덱스를 반환합니다. 마지막으로 읽은 prompt_id 이후에 저장된 질문만 DB에서 읽어 추가합니다."""
+    index = _question_indexes.get(user_id)
+    if index is None:
+        index = _question_indexes[user_id] = QuantizedIndex()
+    _question_indexes.move_to_end(user_id)
+    index.drop_up_to(min_prompt_id)
+    select_query = """
+        SELECT prompt_id, content, embedding, timestamp
+        FROM chat_histories
+        WHERE user_id = :user_id AND role_type = 'user' AND embedding IS NOT NULL AND prompt_id > :after
+        ORDER BY prompt_id ASC
+    """
+    rows = await read_fetch_all(select_query, {"user_id": user_id, "after": max(index.last_prompt_id, min_prompt_id)}, user_id=user_id)
+    index.add(
+        [row["prompt_id"] for row in rows],
+        [json.loads(row["embedding"]) for row in rows],
+        [row["content"] for row in rows],
+        [row["timestamp"] for row in rows],
+    )
+    while len(_question_indexes) > EMBEDDING_INDEX_MAX_USERS:
+        _question_indexes.popitem(last=False)
+    return index
+
+def get_question_index_stats() -> dict:
+    return {
+        "mode": EMBEDDING_INDEX_MODE,
+        "users": len(_question_indexes),
+        "vectors": sum(len(index) for index in _question_indexes.values()),
+        "bytes": sum(index.nbytes() for index in _question_indexes.values()),
+    }
+
+async def retrieve_and_rerank_history(
+    user_id: str, 
+    original_question: str, 
+    transformed_embedding: list[float], 
+    retrieve_k: int = 10, 
+    final_k: int = 3,
+    min_prompt_id: int = 0
+) -> list[dict]:
+    """1차로 벡터 검색, 2차로 Cross-Encoder 재정렬을 통해 가장 관련성 높은 대화 기록을 반환합니다.
+    min_prompt_id 이하(이미 요약된) 대화는 검색하지 않습니다."""
+    
+    # --- 1단계: 벡터 유사도 기반 후보군 검색 (Retrieve) ---
+    if EMBEDDING_INDEX_MODE == "int8":
+        index = await _get_question_index(user_id, min_prompt_id)
+        candidate_questions = index.search(transformed_embedding, retrieve_k)
+    else:
+        candidate_questions = await _exact_search(user_id, transformed_embedding, retrieve_k, min_prompt_id)
 
     if not candidate_questions:
         return []
 
     # --- 2단계: Cross-Encoder 기반 재정렬 (Re-rank) ---
-    cross_encoder_input = [(original_question, content) for _, _, content, _ in candidate_questions]
-    rerank_scores = cross_encoder.predict(cross_encoder_input)
+    rerank_scores = predict_cached(cross_encoder, original_question, [(prompt_id, content) for _, prompt_id, content, _ in candidate_questions])
 
     reranked_results = list(zip(rerank_scores, [item[1] for item in candidate_questions], [item[2] for item in candidate_questions], [item[3] for item in candidate_questions]))
     reranked_results.sort(key=lambda x: x[0], reverse=True)
@@ -76,7 +147,7 @@ async def retrieve_and_rerank_history(
             ORDER BY prompt_id ASC
             LIMIT 1
         """
-        answer_row = await database.fetch_one(query=answer_query, values={"user_id": user_id, "question_id": question_id})
+        answer_row = await read_fetch_one(answer_query, {"user_id": user_id, "question_id": question_id}, user_id=user_id)
         
         if answer_row and answer_row["role_type"] == 'assistant':
             history_pairs.append({"role": "user", "content": question_content, "timestamp": question_timestamp})
@@ -84,14 +155,74 @@ async def retrieve_and_rerank_history(
 
     return history_pairs
 
+async def retrieve_long_term_memory(
+    user_id: str,
+    original_question: str,
+    transformed_embedding: list[float]
+) -> tuple[list[dict], list[dict]]:
+    """장기 기억을 (요약 목록, 원문 대화 쌍 목록)으로 반환합니다.
+    요약을 먼저 검색하고, 요약만으로 부족할 때만 아직 요약되지 않은 원문 대화를 검색합니다."""
+    summaries = await summary_crud.retrieve_relevant_summaries(user_id, transformed_embedding)
+    if summaries and summaries[0]["similarity"] >= SUMMARY_SKIP_RAW_SIMILARITY:
+        return summaries, []
+
+    watermark = await summary_crud.get_summary_watermark(user_id)
+    history_pairs = await retrieve_and_rerank_history(user_id, original_question, transformed_embedding, min_prompt_id=watermark)
+    return summaries, history_pairs
+
 async def get_recent_chat_history(user_id: str, limit: int = 10) -> list[dict]:
     """지정된 사용자의 최근 대화 기록을 가져옵니다."""
     query = """
         SELECT role_type, content 
         FROM chat_histories 
         WHERE user_id = :user_id 
-        ORDER BY timestamp DESC 
+        ORDER BY prompt_id DESC 
         LIMIT :limit
     """
-    results = await database.fetch_all(query=query, values={"user_id": user_id, "limit": limit})
-    return [{"role": row["role_type"], "content": row["content"]} for row in reversed(results)]
\ No newline at end of file
+    results = await read_fetch_all(query, {"user_id": user_id, "limit": limit}, user_id=user_id)
+    return [{"role": row["role_type"], "content": row["content"]} for row in reversed(results)]
+
+async def get_unembedded_questions(after_prompt_id: int, limit: int) -> list[dict]:
+    """임베딩이 없는 사용자 질문을 prompt_id 순으로 after_prompt_id 다음부터 limit개 가져옵니다. (keyset pagination)"""
+    query = """
+        SELECT prompt_id, user_id, content
+        FROM chat_histories
+        WHERE prompt_id > :after AND role_type = 'user' AND embedding IS NULL
+        ORDER BY prompt_id ASC
+        LIMIT :limit
+    """
+    rows = await database.fetch_all(query=query, values={"after": after_prompt_id, "limit": limit})
+    return [dict(row) for row in rows]
+
+async def count_unembedded_questions(after_prompt_id: int = 0) -> int:
+    query = """
+        SELECT COUNT(*) AS cnt FROM chat_histories
+        WHERE prompt_id > :after AND role_type = 'user' AND embedding IS NULL
+    """
+    row = await database.fetch_one(query=query, values={"after": after_prompt_id})
+    return row["cnt"] if row else 0
+
+async def save_question_embeddings(embeddings: dict[int, list[float]], user_ids=()):
+    """{prompt_id: 임베딩}을 한 번의 UPDATE로 저장합니다. 그 사이 다른 경로가 채운 행은 덮어쓰지 않습니다.
+    user_ids는 행의 주인으로, 읽기가 잠시 primary로 가도록 표시합니다."""
+    if not embeddings:
+        return
+    cases = []
+    values = {}
+    for i, (prompt_id, embedding) in enumerate(embeddings.items()):
+        cases.append(f"WHEN :id_{i} THEN :embedding_{i}")
+        values[f"id_{i}"] = prompt_id
+        values[f"embedding_{i}"] = json.dumps(embedding)
+    query = f"""
+        UPDATE chat_histories
+        SET embedding = CASE prompt_id {" ".join(cases)} END
+        WHERE prompt_id IN ({", ".join(f":id_{i}" for i in range(len(cases)))}) AND embedding IS NULL
+    """
+    await database.execute(query=query, values=values)
+    mark_user_write(*user_ids)
+
+def invalidate_question_index(user_ids):
+    """사용자의 양자화 인덱스를 버립니다. 인덱스는 마지막 prompt_id 이후만 추가로 읽으므로,
+    기존 행에 임베딩을 채운 경우(백필) 다음 검색에서 처음부터 다시 만들어야 합니다."""
+    for user_id in user_ids:
+        _question_indexes.pop(user_id, None)
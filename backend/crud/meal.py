@@ -1,4 +1,4 @@
-from database import database
+from database import database, mark_user_write, read_fetch_all
 from schemas.plan import DietPlanCreate
 from datetime import date
 
@@ -11,14 +11,17 @@ async def create_diet_plan(user_id: str, plan_date: date, meal_type: str, plan:
     """
     values = {"user_id": user_id, "plan_date": plan_date, "meal_type": meal_type, **plan.dict()}
     await database.execute(query=query, values=values)
+    mark_user_write(user_id)
 
 async def update_diet_plan_status(user_id: str, plan_date: date, meal_type: str, status: str):
     query = "UPDATE diet_plans SET status = :status WHERE user_id = :user_id AND plan_date = :plan_date AND meal_type = :meal_type"
     await database.execute(query=query, values={"user_id": user_id, "plan_date": plan_date, "meal_type": meal_type, "status": status})
+    mark_user_write(user_id)
 
 async def update_all_diet_plans_status_for_date(user_id: str, plan_date: date, status: str):
     query = "UPDATE diet_plans SET status = :status WHERE user_id = :user_id AND plan_date = :plan_date"
     await database.execute(query=query, values={"user_id": user_id, "plan_date": plan_date, "status": status})
+    mark_user_write(user_id)
 
 async def get_diet_plans_by_range(user_id: str, start_date: date, end_date: date):
     query = """
@@ -27,4 +30,4 @@ async def get_diet_plans_by_range(user_id: str, start_date: date, end_date: date
         WHERE user_id = :user_id AND plan_date BETWEEN :start_date AND :end_date
         ORDER BY plan_date
     """
-    return await database.fetch_all(query=query, values={"user_id": user_id, "start_date": start_date, "end_date": end_date})
+    return await read_fetch_all(query, {"user_id": user_id, "start_date": start_date, "end_date": end_date}, user_id=user_id)
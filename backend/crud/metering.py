@@ -0,0 +1,72 @@
+# crud/metering.py
+from datetime import date
+from database import database
+
+# LLM 사용량 일별 집계 테이블. (날짜, 사용자, 단계, 모델)마다 한 행이며 flush할 때마다 값을 더합니다.
+# user_id가 '-'인 행은 사용자 요청과 무관한 백그라운드 호출(임베딩 백필 등)입니다.
+CREATE_METERING_TABLE = """
+    CREATE TABLE IF NOT EXISTS llm_usage_daily (
+        usage_date DATE NOT NULL,
+        user_id VARCHAR(50) NOT NULL,
+        stage VARCHAR(20) NOT NULL,
+        model VARCHAR(100) NOT NULL,
+        calls INT NOT NULL DEFAULT 0,
+        errors INT NOT NULL DEFAULT 0,
+        prompt_tokens BIGINT NOT NULL DEFAULT 0,
+        cached_tokens BIGINT NOT NULL DEFAULT 0,
+        completion_tokens BIGINT NOT NULL DEFAULT 0,
+        latency_ms_total BIGINT NOT NULL DEFAULT 0,
+        latency_ms_max INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (usage_date, user_id, stage, model),
+        INDEX ix_usage_user (user_id, usage_date)
+    )
+"""
+
+COUNTER_COLUMNS = ("calls", "errors", "prompt_tokens", "cached_tokens", "completion_tokens", "latency_ms_total")
+
+async def ensure_metering_table():
+    """llm_usage_daily 테이블이 없으면 생성합니다. (MySQL 전용 DDL)"""
+    if database.url.dialect == "mysql":
+        await database.execute(CREATE_METERING_TABLE)
+
+async def add_usage(rows: list[dict]):
+    """집계 행들을 (usage_date, user_id, stage, model) 키로 기존 값에 더합니다."""
+    if not rows:
+        return
+    columns = ("usage_date", "user_id", "stage", "model", *COUNTER_COLUMNS, "latency_ms_max")
+    if database.url.dialect == "mysql":
+        upsert = "ON DUPLICATE KEY UPDATE " + ", ".join(
+            [f"{c} = {c} + VALUES({c})" for c in COUNTER_COLUMNS] + ["latency_ms_max = GREATEST(latency_ms_max, VALUES(latency_ms_max))"]
+        )
+    else:
+        # 벤치마크용 sqlite
+        upsert = "ON CONFLICT (usage_date, user_id, stage, model) DO UPDATE SET " + ", ".join(
+            [f"{c} = {c} + excluded.{c}" for c in COUNTER_COLUMNS] + ["latency_ms_max = MAX(latency_ms_max, excluded.latency_ms_max)"]
+        )
+    query = f"""
+        INSERT INTO llm_usage_daily ({", ".join(columns)})
+        VALUES ({", ".join(f":{c}" for c in columns)})
+        {upsert}
+    """
+    await database.execute_many(query=query, values=rows)
+
+async def get_usage_rollup(start_date: date, end_date: date, group_by: str, user_id: str | None = None) -> list[dict]:
+    """기간 안의 일별 사용량을 group_by(user_id / stage / model) 기준으로 합칩니다."""
+    if group_by not in ("user_id", "stage", "model"):
+        raise ValueError(f"group_by는 user_id, stage, model 중 하나여야 합니다: {group_by}")
+    query = f"""
+        SELECT usage_date, {group_by} AS bucket,
+               SUM(calls) AS calls, SUM(errors) AS errors,
+               SUM(prompt_tokens) AS prompt_tokens, SUM(cached_tokens) AS cached_tokens,
+               SUM(completion_tokens) AS completion_tokens,
+               SUM(latency_ms_total) AS latency_ms_total, MAX(latency_ms_max) AS latency_ms_max
+        FROM llm_usage_daily
+        WHERE usage_date BETWEEN :start_date AND :end_date {"AND user_id = :user_id" if user_id else ""}
+        GROUP BY usage_date, {group_by}
+        ORDER BY usage_date, SUM(prompt_tokens) + SUM(completion_tokens) DESC
+    """
+    values = {"start_date": start_date, "end_date": end_date}
+    if user_id:
+        values["user_id"] = user_id
+    rows = await database.fetch_all(query=query, values=values)
+    return [dict(row) for row in rows]
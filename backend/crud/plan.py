@@ -1,9 +1,17 @@
 # backend/crud/plan.py
-from database import database
+from database import database, mark_user_write, read_fetch_all
 from schemas.plan import WorkoutPlanCreate
+from crud import progress as progress_crud
+from utils.exercise_catalog import canonical_exercise_name
 from datetime import date
 
+def _lock_clause() -> str:
+    # 같은 날짜를 동시에 완료 처리해도 한 번만 집계되도록 MySQL에서는 바뀔 행을 잠급니다.
+    return " FOR UPDATE" if database.url.dialect == "mysql" else ""
+
 async def create_workout_plan(user_id: str, plan_date: date, plan: WorkoutPlanCreate):
+    # "벤치 프레스", "Bench press" 등을 카탈로그의 표준 이름으로 저장해 같은 운동의 기록을 한 키로 모읍니다.
+    plan = plan.model_copy(update={"exercise_name": canonical_exercise_name(plan.exercise_name)})
     query = """
         INSERT INTO workout_plans (user_id, plan_date, exercise_name, reps, sets, weight_kg, duration_min)
         VALUES (:user_id, :plan_date, :exercise_name, :reps, :sets, :weight_kg, :duration_min)
@@ -11,11 +19,39 @@ async def create_workout_plan(user_id: str, plan_date: date, plan: WorkoutPlanCr
             reps=VALUES(reps), sets=VALUES(sets), weight_kg=VALUES(weight_kg), duration_min=VALUES(duration_min), status='pending'
     """
     values = {"user_id": user_id, "plan_date": plan_date, **plan.dict()}
-    await database.execute(query=query, values=values)
+    if plan_date > date.today():
+        # 미래 날짜는 아직 완료될 수 없으므로 진행 통계와 무관합니다.
+        await database.execute(query=query, values=values)
+    else:
+        async with database.transaction():
+            previous = await database.fetch_val(
+                "SELECT status FROM workout_plans WHERE user_id = :user_id AND plan_date = :plan_date AND exercise_name = :exercise_name"
+                + _lock_clause(),
+                {"user_id": user_id, "plan_date": plan_date, "exercise_name": plan.exercise_name},
+            )
+            await database.execute(query=query, values=values)
+            if previous == 'completed':
+                # 완료된 기록을 새 계획으로 덮어써 pending으로 돌아갔으므로 그 운동의 통계를 다시 계산합니다.
+                await progress_crud.refresh_exercise_progress(user_id, [plan.exercise_name])
+    mark_user_write(user_id)
 
 async def update_workout_plan_status(user_id: str, plan_date: date, status: str):
-    query = "UPDATE workout_plans SET status = :status WHERE user_id = :user_id AND plan_date = :plan_date"
-    await database.execute(query=query, values={"user_id": user_id, "plan_date": plan_date, "status": status})
+    values = {"user_id": user_id, "plan_date": plan_date, "status": status}
+    async with database.transaction():
+        # 상태가 실제로 바뀌는 행만 진행 통계에 반영합니다. (이미 완료된 날을 다시 완료해도 중복 집계하지 않음)
+        changed = await database.fetch_all(
+            """SELECT exercise_name, reps, sets, weight_kg, duration_min, status FROM workout_plans
+               WHERE user_id = :user_id AND plan_date = :plan_date AND status <> :status""" + _lock_clause(),
+            values,
+        )
+        query = "UPDATE workout_plans SET status = :status WHERE user_id = :user_id AND plan_date = :plan_date"
+        await database.execute(query=query, values=values)
+        if status == 'completed':
+            await progress_crud.add_completed_workouts(user_id, plan_date, changed)
+        else:
+            await progress_crud.refresh_exercise_progress(
+                user_id, [row["exercise_name"] for row in changed if row["status"] == 'completed'])
+    mark_user_write(user_id)
 
 async def get_plans_by_month(user_id: str, year: int, month: int):
     query = """
@@ -24,7 +60,7 @@ async def get_plans_by_month(user_id: str, year: int, month: int):
         WHERE user_id = :user_id AND YEAR(plan_date) = :year AND MONTH(plan_date) = :month
         ORDER BY plan_date
     """
-    return await database.fetch_all(query=query, values={"user_id": user_id, "year": year, "month": month})
+    return await read_fetch_all(query, {"user_id": user_id, "year": year, "month": month}, user_id=user_id)
 
 async def get_plans_by_range(user_id: str, start_date: date, end_date: date):
     query = """
@@ -33,6 +69,18 @@ async def get_plans_by_range(user_id: str, start_date: date, end_date: date):
         WHERE user_id = :user_id AND plan_date BETWEEN :start_date AND :end_date
         ORDER BY plan_date
     """
-    return await database.fetch_all(query=query, values={"user_id": user_id, "start_date": start_date, "end_date": end_date})
+    return await read_fetch_all(query, {"user_id": user_id, "start_date": start_date, "end_date": end_date}, user_id=user_id)
+
+async def get_exercise_names() -> list[str]:
+    rows = await database.fetch_all("SELECT DISTINCT exercise_name FROM workout_plans")
+    return [row["exercise_name"] for row in rows if row["exercise_name"]]
+
+async def rename_exercise(old_name: str, new_name: str) -> int:
+    """old_name 기록을 new_name으로 바꾸고, 같은 날짜에 new_name이 이미 있어 바꾸지 못한 행 수를 반환합니다."""
+    ignore = "UPDATE IGNORE" if database.url.dialect == "mysql" else "UPDATE OR IGNORE"
+    await database.execute(f"{ignore} workout_plans SET exercise_name = :new_name WHERE exercise_name = :old_name",
+                           {"old_name": old_name, "new_name": new_name})
+    return await database.fetch_val("SELECT COUNT(*) FROM workout_plans WHERE exercise_name = :old_name",
+                                    {"old_name": old_name})
 
 # (필요시 DietPlan 관련 CRUD 함수들도 여기에 추가)
\ No newline at end of file
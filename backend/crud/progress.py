@@ -0,0 +1,135 @@
+# crud/progress.py
+from datetime import date
+from typing import Iterable
+from database import database, read_fetch_all
+
+# 사용자/운동별 누적 진행 통계. 완료(status='completed')된 workout_plans 행만 집계합니다.
+# - sessions: 완료한 (날짜, 운동) 수, total_volume_kg: SUM(sets x reps x weight_kg), 맨몸 운동은 무게 0
+# - best_weight_kg: 1회 이상 수행한 가장 무거운 무게, best_set_volume_kg: 한 세트의 reps x weight_kg 최댓값
+# 완료 처리 때 바뀐 행만큼 값을 더하고(add_completed_workouts), 완료가 취소되는 드문 경우에만
+# 해당 운동의 행을 workout_plans에서 다시 계산합니다(refresh_exercise_progress).
+CREATE_PROGRESS_TABLE = """
+    CREATE TABLE IF NOT EXISTS exercise_progress (
+        user_id VARCHAR(50) NOT NULL,
+        exercise_name VARCHAR(100) NOT NULL,
+        sessions INT NOT NULL DEFAULT 0,
+        total_sets INT NOT NULL DEFAULT 0,
+        total_reps INT NOT NULL DEFAULT 0,
+        total_volume_kg DOUBLE NOT NULL DEFAULT 0,
+        total_duration_min INT NOT NULL DEFAULT 0,
+        best_weight_kg FLOAT NULL,
+        best_set_volume_kg FLOAT NULL,
+        first_performed DATE NULL,
+        last_performed DATE NULL,
+        PRIMARY KEY (user_id, exercise_name),
+        INDEX ix_progress_recent (user_id, last_performed)
+    )
+"""
+
+SUM_COLUMNS = ("sessions", "total_sets", "total_reps", "total_volume_kg", "total_duration_min")
+PROGRESS_COLUMNS = ("user_id", "exercise_name", *SUM_COLUMNS,
+                    "best_weight_kg", "best_set_volume_kg", "first_performed", "last_performed")
+
+# workout_plans 행들로 진행 통계를 계산하는 SELECT. add_completed_workouts의 행 단위 계산과 같은 식이어야 합니다.
+_AGGREGATE_SELECT = """
+    SELECT user_id, exercise_name,
+           COUNT(*),
+           SUM(COALESCE(sets, 0)),
+           SUM(COALESCE(sets, 0) * COALESCE(reps, 0)),
+           SUM(COALESCE(sets, 0) * COALESCE(reps, 0) * COALESCE(weight_kg, 0)),
+           SUM(COALESCE(duration_min, 0)),
+           MAX(CASE WHEN reps > 0 THEN weight_kg END),
+           MAX(reps * weight_kg),
+           MIN(plan_date),
+           MAX(plan_date)
+    FROM workout_plans
+    WHERE status = 'completed' {where}
+    GROUP BY user_id, exercise_name
+"""
+
+# 전체 재계산 (이름 통일 마이그레이션, 벤치마크 시드)
+REBUILD_PROGRESS_QUERIES = (
+    "DELETE FROM exercise_progress",
+    f"INSERT INTO exercise_progress ({', '.join(PROGRESS_COLUMNS)}) " + _AGGREGATE_SELECT.format(where=""),
+)
+
+async def ensure_exercise_progress_table():
+    """exercise_progress 테이블이 없으면 생성합니다. (MySQL 전용 DDL)"""
+    if database.url.dialect == "mysql":
+        await database.execute(CREATE_PROGRESS_TABLE)
+
+def _row_progress(user_id: str, plan_date: date, row) -> dict:
+    sets = row["sets"] or 0
+    reps = row["reps"] or 0
+    weight = row["weight_kg"]
+    return {
+        "user_id": user_id, "exercise_name": row["exercise_name"],
+        "sessions": 1, "total_sets": sets, "total_reps": sets * reps,
+        "total_volume_kg": sets * reps * (weight or 0), "total_duration_min": row["duration_min"] or 0,
+        "best_weight_kg": weight if reps > 0 else None,
+        "best_set_volume_kg": row["reps"] * weight if row["reps"] is not None and weight is not None else None,
+        "first_performed": plan_date, "last_performed": plan_date,
+    }
+
+async def add_completed_workouts(user_id: str, plan_date: date, rows: Iterable):
+    """plan_date에 새로 완료된 workout_plans 행들을 진행 통계에 더합니다. (호출하는 쪽의 트랜잭션 안에서)"""
+    values = [_row_progress(user_id, plan_date, row) for row in rows]
+    if not values:
+        return
+    if database.url.dialect == "mysql":
+        greatest, least, new = "GREATEST", "LEAST", "VALUES({c})"
+        upsert = "ON DUPLICATE KEY UPDATE "
+    else:
+        # 벤치마크용 sqlite
+        greatest, least, new = "MAX", "MIN", "excluded.{c}"
+        upsert = "ON CONFLICT (user_id, exercise_name) DO UPDATE SET "
+
+    def pick(func: str, c: str) -> str:
+        # GREATEST/LEAST는 인자 중 NULL이 있으면 NULL이므로 한쪽이 NULL이면 다른 쪽 값을 씁니다.
+        return f"{c} = {func}(COALESCE({c}, {new.format(c=c)}), COALESCE({new.format(c=c)}, {c}))"
+
+    upsert += ", ".join(
+        [f"{c} = {c} + {new.format(c=c)}" for c in SUM_COLUMNS]
+        + [pick(greatest, "best_weight_kg"), pick(greatest, "best_set_volume_kg"),
+           pick(least, "first_performed"), pick(greatest, "last_performed")]
+    )
+    query = f"""
+        INSERT INTO exercise_progress ({", ".join(PROGRESS_COLUMNS)})
+        VALUES ({", ".join(f":{c}" for c in PROGRESS_COLUMNS)})
+        {upsert}
+    """
+    await database.execute_many(query=query, values=values)
+
+async def refresh_exercise_progress(user_id: str, exercise_names: Iterable[str]):
+    """사용자의 해당 운동들만 workout_plans에서 다시 계산합니다. (호출하는 쪽의 트랜잭션 안에서)"""
+    names = sorted(set(exercise_names))
+    if not names:
+        return
+    values = {"user_id": user_id, **{f"name{i}": name for i, name in enumerate(names)}}
+    in_list = ", ".join(f":name{i}" for i in range(len(names)))
+    await database.execute(
+        f"DELETE FROM exercise_progress WHERE user_id = :user_id AND exercise_name IN ({in_list})", values)
+    await database.execute(
+        f"INSERT INTO exercise_progress ({', '.join(PROGRESS_COLUMNS)}) "
+        + _AGGREGATE_SELECT.format(where=f"AND user_id = :user_id AND exercise_name IN ({in_list})"),
+        values,
+    )
+
+async def rebuild_exercise_progress() -> int:
+    """모든 사용자의 진행 통계를 workout_plans에서 다시 계산하고 행 수를 반환합니다. (이름 통일 마이그레이션용)"""
+    async with database.transaction():
+        for query in REBUILD_PROGRESS_QUERIES:
+            await database.execute(query)
+    return await database.fetch_val("SELECT COUNT(*) FROM exercise_progress")
+
+async def get_exercise_progress(user_id: str, exercise_name: str | None = None):
+    query = f"""
+        SELECT {", ".join(PROGRESS_COLUMNS)}
+        FROM exercise_progress
+        WHERE user_id = :user_id {"AND exercise_name = :exercise_name" if exercise_name else ""}
+        ORDER BY last_performed DESC, exercise_name
+    """
+    values = {"user_id": user_id}
+    if exercise_name:
+        values["exercise_name"] = exercise_name
+    return await read_fetch_all(query, values, user_id=user_id)
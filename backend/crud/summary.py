@@ -0,0 +1,126 @@
+# crud/summary.py
+import json
+import numpy as np
+from datetime import date, timedelta
+from database import database, mark_user_write, read_fetch_all, read_fetch_one
+
+CREATE_SUMMARY_TABLE = """
+    CREATE TABLE IF NOT EXISTS chat_summaries (
+        summary_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        user_id VARCHAR(50) NOT NULL,
+        summary TEXT NOT NULL,
+        embedding JSON,
+        first_prompt_id BIGINT NOT NULL,
+        last_prompt_id BIGINT NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        INDEX ix_summary_user (user_id, last_prompt_id)
+    )
+"""
+
+async def ensure_summary_table():
+    """chat_summaries 테이블이 없으면 생성합니다. (MySQL 전용 DDL)"""
+    if database.url.dialect == "mysql":
+        await database.execute(CREATE_SUMMARY_TABLE)
+
+async def save_summary(user_id: str, summary: str, embedding: list[float] | None, first_prompt_id: int, last_prompt_id: int):
+    query = """
+        INSERT INTO chat_summaries (user_id, summary, embedding, first_prompt_id, last_prompt_id)
+        VALUES (:user_id, :summary, :embedding, :first_prompt_id, :last_prompt_id)
+    """
+    await database.execute(query=query, values={
+        "user_id": user_id,
+        "summary": summary,
+        "embedding": json.dumps(embedding) if embedding else None,
+        "first_prompt_id": first_prompt_id,
+        "last_prompt_id": last_prompt_id,
+    })
+    mark_user_write(user_id)
+
+async def get_summary_watermark(user_id: str) -> int:
+    """요약이 끝난 마지막 prompt_id를 반환합니다. (요약이 없으면 0)"""
+    query = "SELECT MAX(last_prompt_id) AS watermark FROM chat_summaries WHERE user_id = :user_id"
+    row = await read_fetch_one(query, {"user_id": user_id}, user_id=user_id)
+    return (row["watermark"] or 0) if row else 0
+
+async def get_latest_summary(user_id: str) -> dict | None:
+    query = """
+        SELECT summary, created_at, last_prompt_id
+        FROM chat_summaries
+        WHERE user_id = :user_id
+        ORDER BY last_prompt_id DESC
+        LIMIT 1
+    """
+    row = await database.fetch_one(query=query, values={"user_id": user_id})
+    return dict(row) if row else None
+
+async def find_users_needing_summary(min_turns: int, keep_recent: int, limit: int = 50) -> list[str]:
+    """최근 keep_recent개를 제외하고도 요약되지 않은 대화가 min_turns개 이상 쌓인 사용자 목록."""
+    query = """
+        SELECT c.user_id
+        FROM chat_histories c
+        LEFT JOIN (
+            SELECT user_id, MAX(last_prompt_id) AS watermark FROM chat_summaries GROUP BY user_id
+        ) s ON s.user_id = c.user_id
+        WHERE c.prompt_id > COALESCE(s.watermark, 0)
+        GROUP BY c.user_id
+        HAVING COUNT(*) >= :threshold
+        LIMIT :limit
+    """
+    rows = await database.fetch_all(query=query, values={"threshold": min_turns + keep_recent, "limit": limit})
+    return [row["user_id"] for row in rows]
+
+async def get_unsummarized_turns(user_id: str, after_prompt_id: int, keep_recent: int, limit: int) -> list[dict]:
+    """watermark 이후 대화 중 최근 keep_recent개를 제외한 오래된 턴을 prompt_id 순으로 가져옵니다."""
+    cutoff_query = """
+        SELECT prompt_id FROM chat_histories
+        WHERE user_id = :user_id
+        ORDER BY prompt_id DESC
+        LIMIT 1 OFFSET :keep_recent
+    """
+    cutoff = await database.fetch_one(query=cutoff_query, values={"user_id": user_id, "keep_recent": keep_recent})
+    if not cutoff:
+        return []
+    query = """
+        SELECT prompt_id, role_type, content, timestamp
+        FROM chat_histories
+        WHERE user_id = :user_id AND prompt_id > :after_prompt_id AND prompt_id <= :cutoff
+        ORDER BY prompt_id ASC
+        LIMIT :limit
+    """
+    rows = await database.fetch_all(query=query, values={
+        "user_id": user_id, "after_prompt_id": after_prompt_id, "cutoff": cutoff["prompt_id"], "limit": limit,
+    })
+    return [dict(row) for row in rows]
+
+async def get_plan_adherence(user_id: str, days: int = 14) -> dict:
+    """최근 days일 동안의 운동/식단 계획 완료 비율."""
+    start_date = date.today() - timedelta(days=days)
+    result = {}
+    for table in ("workout_plans", "diet_plans"):
+        query = f"""
+            SELECT COUNT(*) AS total, SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) AS completed
+            FROM {table}
+            WHERE user_id = :user_id AND plan_date BETWEEN :start_date AND :end_date
+        """
+        row = await database.fetch_one(query=query, values={"user_id": user_id, "start_date": start_date, "end_date": date.today()})
+        result[table] = {"total": row["total"] or 0, "completed": row["completed"] or 0} if row else {"total": 0, "completed": 0}
+    return result
+
+async def retrieve_relevant_summaries(user_id: str, query_embedding: list[float], top_k: int = 2) -> list[dict]:
+    """요약 레코드를 임베딩 유사도 순으로 반환합니다. (요약은 사용자당 수십 개 수준이라 전수 비교합니다)"""
+    query = """
+        SELECT summary, embedding, created_at, last_prompt_id
+        FROM chat_summaries
+        WHERE user_id = :user_id AND embedding IS NOT NULL
+    """
+    rows = await read_fetch_all(query, {"user_id": user_id}, user_id=user_id)
+    if not rows:
+        return []
+    new_vec = np.array(query_embedding)
+    scored = []
+    for row in rows:
+        vec = np.array(json.loads(row["embedding"]))
+        similarity = float(np.dot(new_vec, vec) / (np.linalg.norm(new_vec) * np.linalg.norm(vec)))
+        scored.append({"summary": row["summary"], "timestamp": row["created_at"], "last_prompt_id": row["last_prompt_id"], "similarity": similarity})
+    scored.sort(key=lambda x: x["similarity"], reverse=True)
+    return scored[:top_k]
@@ -1,5 +1,5 @@
 # crud/user.py
-from database import database
+from database import database, read_fetch_one
 from schemas.user import UserSignup
 
 async def create_user(user: UserSignup):
@@ -39,5 +39,5 @@ async def get_user_by_id(user_id: str) -> dict | None:
         JOIN training_levels tl ON u.level = tl.level
         WHERE u.user_id = :user_id
     """
-    result = await database.fetch_one(query=query, values={"user_id": user_id})
+    result = await read_fetch_one(query, {"user_id": user_id}, user_id=user_id)
     return dict(result) if result else None
\ No newline at end of file
@@ -4,6 +4,7 @@ from databases import Database
 import sqlalchemy
 from dotenv import load_dotenv
 import os
+import time
 
 load_dotenv()
 mysql_pw = os.getenv("MYSQLPW")
@@ -12,6 +13,90 @@ mysql_ip = os.getenv("MYSQLIP")
 mysql_db = os.getenv("MYSQLDB")
 
 
-DATABASE_URL = f"mysql+pymysql://{mysql_id}:{mysql_pw}@{mysql_ip}/{mysql_db}"
+# DATABASE_URL을 직접 지정하면 (예: 벤치마크용 sqlite) MySQL 설정 대신 사용합니다.
+DATABASE_URL = os.getenv("DATABASE_URL") or f"mysql+pymysql://{mysql_id}:{mysql_pw}@{mysql_ip}/{mysql_db}"
 
-database = Database(DATABASE_URL)
\ No newline at end of file
+database = Database(DATABASE_URL)
+
+# --- 읽기 전용 replica ---
+# DATABASE_REPLICA_URL(또는 MYSQLREPLICAIP, 계정/DB 이름은 primary와 동일)을 지정하면
+# 캘린더/프로필/RAG 조회처럼 읽기 비중이 큰 쿼리를 replica로 보냅니다. 지정하지 않으면 모두 primary를 씁니다.
+mysql_replica_ip = os.getenv("MYSQLREPLICAIP")
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL") or (
+    f"mysql+pymysql://{mysql_id}:{mysql_pw}@{mysql_replica_ip}/{mysql_db}" if mysql_replica_ip else None
+)
+# 사용자가 쓴 직후 이 시간(초) 동안은 그 사용자의 읽기를 primary로 보냅니다. (replica 복제 지연 동안 자기 글이 안 보이는 문제 방지)
+READ_YOUR_WRITES_S = float(os.getenv("READ_YOUR_WRITES_S", 5))
+# replica 쿼리가 실패하면 이 시간(초) 동안 primary만 사용합니다.
+REPLICA_RETRY_S = float(os.getenv("REPLICA_RETRY_S", 30))
+
+replica_database = Database(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else None
+
+_recent_writes: dict[str, float] = {}
+_replica_down_until = 0.0
+_read_stats = {"replica": 0, "primary": 0, "sticky": 0, "fallback": 0}
+
+
+async def connect_replica():
+    if replica_database is None:
+        return
+    try:
+        await replica_database.connect()
+        print(f"[INFO] Read replica connected: {replica_database.url.hostname or replica_database.url.database}")
+    except Exception as e:
+        print(f"[WARNING] Read replica unavailable, reads will use the primary: {e}")
+
+
+async def disconnect_replica():
+    if replica_database is not None and replica_database.is_connected:
+        await replica_database.disconnect()
+
+
+def mark_user_write(*user_ids: str):
+    """사용자의 데이터를 primary에 쓴 직후 호출합니다. READ_YOUR_WRITES_S 동안 그 사용자의 읽기는 primary로 갑니다."""
+    now = time.monotonic()
+    for user_id in user_ids:
+        _recent_writes[user_id] = now
+    if len(_recent_writes) > 10000:
+        for user_id, written_at in list(_recent_writes.items()):
+            if now - written_at >= READ_YOUR_WRITES_S:
+                del _recent_writes[user_id]
+
+
+def _use_replica(user_id: str | None) -> bool:
+    if replica_database is None or not replica_database.is_connected or time.monotonic() < _replica_down_until:
+        return False
+    if user_id is not None and time.monotonic() - _recent_writes.get(user_id, float("-inf")) < READ_YOUR_WRITES_S:
+        _read_stats["sticky"] += 1
+        return False
+    return True
+
+
+async def _read(method: str, query: str, values: dict | None, user_id: str | None):
+    global _replica_down_until
+    if _use_replica(user_id):
+        try:
+            result = await getattr(replica_database, method)(query=query, values=values)
+            _read_stats["replica"] += 1
+            return result
+        except Exception as e:
+            _replica_down_until = time.monotonic() + REPLICA_RETRY_S
+            _read_stats["fallback"] += 1
+            print(f"[WARNING] Read replica query failed, using the primary for {REPLICA_RETRY_S:.0f}s: {e}")
+    _read_stats["primary"] += 1
+    return await getattr(database, method)(query=query, values=values)
+
+
+async def read_fetch_all(query: str, values: dict | None = None, user_id: str | None = None):
+    """읽기 전용 조회. replica가 있고 user_id의 최근 쓰기가 없으면 replica에서 읽습니다."""
+    return await _read("fetch_all", query, values, user_id)
+
+
+async def read_fetch_one(query: str, values: dict | None = None, user_id: str | None = None):
+    return await _read("fetch_one", query, values, user_id)
+
+
+def get_read_routing_stats() -> dict:
+    return {"replica_configured": replica_database is not None,
+            "replica_connected": bool(replica_database and replica_database.is_connected),
+            **_read_stats}
@@ -1,8 +1,21 @@
 # main.py
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from database import database
-from routers import user, protected, chat, plan, meal, batch_tts  # ← user.py는 routers/ 폴더 안에 있어야 함
+from database import database, connect_replica, disconnect_replica
+from crud.summary import ensure_summary_table
+from crud.metering import ensure_metering_table
+from crud.archive import ensure_archive_table
+from crud.progress import ensure_exercise_progress_table
+from utils.summarizer import start_summarizer, stop_summarizer
+from utils.archiver import start_archiver, stop_archiver
+from utils.ollama_client import warmup_ollama, close_ollama
+from utils.history_writer import start_history_writer, stop_history_writer
+from utils.embedding_backfill import start_embedding_backfill, stop_embedding_backfill
+from utils.loop_watchdog import start_loop_watchdog, stop_loop_watchdog
+from utils.metering import start_metering, stop_metering
+from utils.compression import COMPRESSION_ENABLED, CompressionMiddleware
+import asyncio
+from routers import user, protected, chat, chat_ws, plan, meal, batch_tts, admin  # ← user.py는 routers/ 폴더 안에 있어야 함
 from fastapi.middleware.cors import CORSMiddleware
 import os
 
@@ -25,20 +38,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 큰 JSON/정적 파일 응답 압축 (Accept-Encoding에 따라 brotli 또는 gzip, 채팅 스트림은 제외)
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
 @app.on_event("startup")
 async def startup():
+    start_loop_watchdog()
     await database.connect()
+    await connect_replica()
+    await ensure_summary_table()
+    await ensure_metering_table()
+    await ensure_archive_table()
+    await ensure_exercise_progress_table()
+    start_history_writer()
+    start_summarizer()
+    start_archiver()
+    start_embedding_backfill()
+    start_metering()
+    # 모델 로딩이 끝날 때까지 서버 시작을 막지 않도록 백그라운드에서 warm-up 합니다.
+    asyncio.create_task(warmup_ollama())
 
 @app.on_event("shutdown")
 async def shutdown():
+    await stop_summarizer()
+    await stop_archiver()
+    await stop_embedding_backfill()
+    await close_ollama()
+    # 버퍼에 남은 대화 기록을 DB 연결을 닫기 전에 모두 저장합니다.
+    await stop_history_writer()
+    # 마지막 flush 이후 쌓인 LLM 사용량을 저장합니다.
+    await stop_metering()
+    await disconnect_replica()
     await database.disconnect()
+    await stop_loop_watchdog()
 
 app.include_router(user.router)
 app.include_router(protected.router)
 app.include_router(chat.router)
+app.include_router(chat_ws.router)
 app.include_router(plan.router)
 app.include_router(meal.router)
 app.include_router(batch_tts.router)
+app.include_router(admin.router)
 
 # 정적 파일 마운트
 app.mount("/", StaticFiles(directory=FRONTEND_PATH, html=True), name="static")
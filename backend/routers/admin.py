@@ -0,0 +1,83 @@
+# routers/admin.py
+
+import os
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
+from dotenv import load_dotenv
+from dependencies import get_current_user
+from crud.chat import get_question_index_stats
+from crud.metering import get_usage_rollup
+from database import get_read_routing_stats
+from routers.chat_ws import get_ws_stats
+from utils.admission import get_admission_stats
+from utils.embedding_backfill import get_backfill_stats
+from utils.exercise_catalog import get_exercise_catalog_stats
+from utils.history_writer import get_history_writer_stats
+from utils.llm_gateway import get_prompt_cache_report
+from utils.loop_watchdog import get_loop_watchdog_stats
+from utils.metering import flush_metering, get_metering_stats
+from utils.model_router import get_routing_stats
+from utils.nutrition import get_nutrition_stats
+from utils.ollama_client import get_ollama_stats
+from utils.reranker import get_rerank_cache_stats
+from utils.singleflight import get_singleflight_stats
+from utils.sse import get_stream_stats
+
+load_dotenv()
+
+# 쉼표로 구분한 관리자 user_id 목록. 비어 있으면 모든 관리자 API가 403을 반환합니다.
+ADMIN_USER_IDS = {user_id.strip() for user_id in os.getenv("ADMIN_USER_IDS", "").split(",") if user_id.strip()}
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+async def get_admin_user(current_user: dict = Depends(get_current_user)):
+    if current_user["user_id"] not in ADMIN_USER_IDS:
+        raise HTTPException(status_code=403, detail="관리자만 접근할 수 있습니다.")
+    return current_user
+
+@router.get("/loop_watchdog")
+async def read_loop_watchdog(top: int = Query(10, ge=1, le=100), admin: dict = Depends(get_admin_user)):
+    """이벤트 루프를 가장 오래 막은 함수 목록 (LOOP_WATCHDOG_ENABLED=true 일 때 수집)."""
+    return get_loop_watchdog_stats(top)
+
+@router.get("/stats")
+async def read_runtime_stats(admin: dict = Depends(get_admin_user)):
+    """프로세스 내 캐시/라우팅/스트리밍/쓰기 버퍼 통계."""
+    return {
+        "loop_watchdog": get_loop_watchdog_stats(),
+        "prompt_cache": get_prompt_cache_report(),
+        "ollama": get_ollama_stats(),
+        "routing": get_routing_stats(),
+        "admission": get_admission_stats(),
+        "streaming": get_stream_stats(),
+        "websocket": get_ws_stats(),
+        "history_writer": get_history_writer_stats(),
+        "embedding_backfill": get_backfill_stats(),
+        "question_index": get_question_index_stats(),
+        "rerank_cache": get_rerank_cache_stats(),
+        "singleflight": get_singleflight_stats(),
+        "read_routing": get_read_routing_stats(),
+        "metering": get_metering_stats(),
+        "nutrition": get_nutrition_stats(),
+        "exercise_catalog": get_exercise_catalog_stats(),
+    }
+
+@router.get("/llm_usage")
+async def read_llm_usage(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    group_by: str = Query("stage", pattern="^(user_id|stage|model)$"),
+    user_id: str | None = None,
+    admin: dict = Depends(get_admin_user),
+):
+    """일별 LLM 토큰/지연 시간 집계. 기본 기간은 최근 7일이며, user_id를 주면 그 사용자만 봅니다."""
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=6)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date는 end_date보다 늦을 수 없습니다.")
+    # 아직 메모리에만 있는 사용량도 포함되도록 먼저 저장합니다.
+    await flush_metering()
+    rows = await get_usage_rollup(start_date, end_date, group_by, user_id)
+    for row in rows:
+        row["avg_latency_ms"] = round(row["latency_ms_total"] / row["calls"], 1) if row["calls"] else 0.0
+    return {"start_date": start_date, "end_date": end_date, "group_by": group_by, "rows": rows}
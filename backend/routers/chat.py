@@ -1,20 +1,33 @@
 import asyncio
+import itertools
 import json
+import os
+import time
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import JSONResponse
 from typing import Dict, List, AsyncGenerator
-from datetime import date, timedelta
+from datetime import date
 
 from dependencies import get_current_user
-from utils.openai_client import chat_client, CHAT_DEPLOYMENT_NAME, ask_openai_unified, get_embedding, should_search_long_term_memory
+from utils.openai_client import chat_completion, ask_openai_unified, get_embedding, should_search_long_term_memory
 from utils.ollama_client import ask_ollama_stream
-from crud.chat import save_chat_history, retrieve_and_rerank_history
+from crud.chat import retrieve_long_term_memory
 from crud import plan as plan_crud
 from crud import meal as meal_crud
 from crud.user import get_user_by_id # 사용자 정보 조회를 위해 import
 from schemas.chat import ChatHistoryCreate
 from schemas.plan import WorkoutPlanCreate, DietPlanCreate
 from utils.youtube_search import search_youtube_videos
+from utils.prompts import build_intent_prompt, build_plan_parse_prompt, build_trainer_prompt
+from utils.context_builder import assemble_context, count_tokens
+from utils import semantic_cache
+from utils.model_router import route_model, record_route, record_cancellation
+from utils.history_writer import enqueue_turn
+from utils.singleflight import singleflight
+from utils.sse import framed_stream, StreamAborted, CHAT_STREAM_FORMAT, STREAM_FORMATS, SSE_HEADERS
+from utils.admission import admit, AdmissionRejected, LeasedStreamingResponse
+from utils.metering import set_metering_user
+from utils.nutrition import estimate_nutrition
 
 router = APIRouter()
 
@@ -22,34 +35,29 @@ router = APIRouter()
 chat_cache: Dict[str, List[Dict]] = {}
 CACHE_MAX_LENGTH = 10
 
+# --- In-flight Streams ---
+# 사용자별로 가장 최근에 입장한 요청의 답변만 계속 생성합니다. (새 메시지가 오면 이전 답변 생성은 중단)
+# 요청이 입장할 때(await 전에) 증가하는 stream id를 등록하므로, 준비 단계가 늦게 끝난 이전 요청이
+# 새 요청의 등록을 덮어쓰지 못합니다. 사용자마다 마지막 id만 남기며 스트림이 끝나도 지우지 않습니다.
+_latest_streams: Dict[str, int] = {}
+_stream_ids = itertools.count(1)
+TRUNCATION_MARK = "\n\n[응답이 중간에 중단되었습니다]"
+# diet_plans.food_name 컬럼 길이
+FOOD_NAME_MAX_CHARS = 100
+# 채팅 이미지(인바디 사진 등) 최대 크기. /ws/chat의 base64 이미지도 디코드 전에 같은 한도로 막습니다.
+CHAT_IMAGE_MAX_BYTES = int(os.getenv("CHAT_IMAGE_MAX_BYTES", 10 * 1024 * 1024))
+IMAGE_TOO_LARGE_MESSAGE = f"이미지는 {CHAT_IMAGE_MAX_BYTES / (1024 * 1024):g}MB 이하만 보낼 수 있습니다."
+
 # -------------------------------------
 # 1. AI 분석 및 계획 관리 로직 (기존과 동일)
 # -------------------------------------
 
 async def analyze_user_intent(user_id: str, message: str, history: List[Dict]):
     """사용자의 의도를 분석하여 '수행 완료'인지, '계획 변경'인지, 아니면 '일반 대화/루틴 요청'인지 분류합니다."""
-    system_prompt = f"""
-    당신은 사용자의 의도를 분석하는 AI입니다. 사용자의 최근 메시지와 대화 기록을 바탕으로 다음 중 하나의 카테고리로 분류해주세요.
-    1. 'complete_workout': 사용자가 오늘 계획된 운동을 완료했다고 보고하는 경우. (예: "오늘 운동 다 했어", "추천해준거 끝냈어")
-    2. 'modify_workout': 사용자가 오늘 계획과 다른 운동을 수행했다고 보고하는 경우. (예: "오늘 벤치프레스 50kg 5x5만 했어")
-    3. 'complete_meal': 사용자가 오늘 계획된 식사를 완료했다고 보고하는 경우. (예: "오늘 아침 다 먹었어", "점심 먹었어")
-    4. 'modify_meal': 사용자가 오늘 계획과 다른 식사를 했다고 보고하는 경우. (예: "오늘 점심은 닭가슴살 샐러드 대신 샌드위치 먹었어")
-    5. 'general_chat': 일반적인 대화 또는 새로운 운동 루틴/식단 계획을 요청하는 경우. (예: "안녕?", "일주일치 루틴 짜줘", "식단 짜줘")
-
-    오늘 날짜: {date.today().isoformat()}
-    사용자 ID: {user_id}
-
-    분석 후, 다음 JSON 형식 중 하나로만 답변해주세요.
-    식사 완료/변경 보고 시, 사용자가 특정 식사 유형(아침, 점심, 저녁, 간식)을 명시하지 않았다면 `meal_type`을 `null`로 반환해주세요.
-    - 운동 완료 보고 시: {{"intent": "complete_workout"}}
-    - 운동 변경 보고 시: {{"intent": "modify_workout", "new_plan": "사용자가 실제 수행한 운동 내용"}}
-    - 식사 완료 보고 시: {{"intent": "complete_meal", "meal_type": "아침/점심/저녁/간식" 또는 null}}
-    - 식사 변경 보고 시: {{"intent": "modify_meal", "meal_type": "아침/점심/저녁/간식" 또는 null, "new_plan": "사용자가 실제 수행한 식사 내용"}}
-    - 일반 대화 시: {{"intent": "general_chat"}}
-    """
+    system_prompt = build_intent_prompt(user_id)
     try:
-        response = await chat_client.chat.completions.create(
-            model=CHAT_DEPLOYMENT_NAME,
+        response = await chat_completion(
+            "intent",
             messages=[
                 {"role": "system", "content": system_prompt},
                 *history,
@@ -62,53 +70,38 @@ async def analyze_user_intent(user_id: str, message: str, history: List[Dict]):
     except Exception:
         return {"intent": "general_chat"} # 오류 발생 시 일반 대화로 처리
 
+def merge_meal_items(items: List[Dict]) -> Dict[str, DietPlanCreate]:
+    """식사 항목들을 meal_type별 한 행으로 합칩니다. (diet_plans는 날짜/식사마다 한 행)
+    영양 수치는 로컬 음식 DB로 계산하고, DB에 없는 음식은 AI가 준 수치가 있으면 그대로 씁니다."""
+    meals: Dict[str, Dict] = {}
+    for item in items:
+        meal_type = item.get("meal_type")
+        food_name = (item.get("food_name") or "").strip()
+        if not meal_type or not food_name:
+            print(f"[ERROR] Failed to save diet item: {item}. Reason: meal_type/food_name 없음")
+            continue
+        portion = item.get("portion")
+        nutrition = estimate_nutrition(food_name, portion) or {key: item.get(key) for key in ("calories", "protein_g", "carbs_g", "fat_g")}
+        meal = meals.setdefault(meal_type, {"names": [], "calories": None, "protein_g": None, "carbs_g": None, "fat_g": None})
+        meal["names"].append(f"{food_name} {portion}" if portion else food_name)
+        for key, value in nutrition.items():
+            if value is not None:
+                meal[key] = (meal[key] or 0) + value
+    return {
+        meal_type: DietPlanCreate(
+            food_name=", ".join(meal["names"])[:FOOD_NAME_MAX_CHARS],
+            calories=int(round(meal["calories"])) if meal["calories"] is not None else None,
+            **{key: round(meal[key], 1) if meal[key] is not None else None for key in ("protein_g", "carbs_g", "fat_g")},
+        )
+        for meal_type, meal in meals.items()
+    }
+
 async def parse_and_save_plan(user_id: str, ai_response: str):
     """AI의 답변에서 운동 루틴 또는 식단 계획을 파싱하여 DB에 저장합니다."""
-    system_prompt = f"""
-    당신은 AI 트레이너의 답변에서 날짜별 운동 계획 또는 식단 계획을 추출하여 JSON으로 변환하는 시스템입니다.
-    'n일차', 'n주차', '월요일' 같은 날짜 정보를 오늘({date.today().isoformat()})부터 시작하는 절대 날짜(YYYY-MM-DD)로 변환해야 합니다.
-
-    운동 계획의 각 운동 항목은 exercise_name, reps, sets, weight_kg, duration_min 필드를 가져야 합니다. 
-    **duration_min은 반드시 분 단위의 정수(integer)여야 합니다.** 정보가 없으면 null로 처리하세요.
-    식단 계획의 각 식사 항목은 meal_type (아침, 점심, 저녁, 간식), food_name, calories, protein_g, carbs_g, fat_g 필드를 가져야 합니다. 영양 정보는 가능한 한 구체적인 수치로 제공해주세요. **정보가 없는 필드는 null로 처리해도 좋습니다.**
-
-    출력 형식: {{"plans": [{{ "date": "YYYY-MM-DD", "type": "workout"/"diet", "items": [...] }}]}}
-    만약 AI 답변이 운동 루틴이나 식단 계획이 아니거나 파싱할 수 없으면, {{"plans": []}} 를 반환하세요.
-
-     예시 입력 (운동):
-    \"1일차: 스쿼트 12회 5세트, 런지 15회 3세트\n2일차: 벤치프레스 10회 5세트 60kg\"
-    예시 출력 (운동):
-    {{
-        \"plans\": [
-            {{\"date\": \"{date.today().isoformat()}\", \"type\": \"workout\", \"items\": [
-                {{\"exercise_name\": \"스쿼트\", \"reps\": 12, \"sets\": 5, \"weight_kg\": null, \"duration_min\": null}},
-                {{\"exercise_name\": \"런지\", \"reps\": 15, \"sets\": 3, \"weight_kg\": null, \"duration_min\": null}}
-            ]}},
-            {{\"date\": \"{(date.today() + timedelta(days=1)).isoformat()}\", \"type\": \"workout\", \"items\": [
-                {{\"exercise_name\": \"벤치프레스\", \"reps\": 10, \"sets\": 5, \"weight_kg\": 60, \"duration_min\": null}}
-            ]}}
-        ]
-    }}
-
-    예시 입력 (식단):
-    \"1일차 아침: 닭가슴살 100g, 현미밥 150g\n1일차 점심: 샐러드, 고구마 1개\"
-    예시 출력 (식단):
-    {{
-        \"plans\": [
-            {{\"date\": \"{date.today().isoformat()}\", \"type\": \"diet\", \"items\": [
-                {{\"meal_type\": \"아침\", \"food_name\": \"닭가슴살\", \"calories\": 165, \"protein_g\": 31.0, \"carbs_g\": 0.0, \"fat_g\": 3.6}},
-                {{\"meal_type\": \"아침\", \"food_name\": \"현미밥\", \"calories\": 150, \"protein_g\": 3.0, \"carbs_g\": 32.0, \"fat_g\": 1.0}}
-            ]}},
-            {{\"date\": \"{date.today().isoformat()}\", \"type\": \"diet\", \"items\": [
-                {{\"meal_type\": \"점심\", \"food_name\": \"샐러드\", \"calories\": 50, \"protein_g\": 2.0, \"carbs_g\": 10.0, \"fat_g\": 1.0}},
-                {{\"meal_type\": \"점심\", \"food_name\": \"고구마\", \"calories\": 130, \"protein_g\": 2.0, \"carbs_g\": 30.0, \"fat_g\": 0.5}}
-            ]}}
-        ]
-    }}
-    """
+    system_prompt = build_plan_parse_prompt()
     try:
-        response = await chat_client.chat.completions.create(
-            model=CHAT_DEPLOYMENT_NAME,
+        response = await chat_completion(
+            "plan_parse",
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": ai_response}
@@ -135,13 +128,11 @@ async def parse_and_save_plan(user_id: str, ai_response: str):
                         print(f"[ERROR] Failed to save workout item: {exercise}. Reason: {item_e}")
                 print(f"[INFO] Workout plan saved for user {user_id} on {plan_date}")
             elif plan_type == "diet":
-                for meal in day_plan["items"]:
+                for meal_type, diet_plan in merge_meal_items(day_plan["items"]).items():
                     try:
-                        meal_type = meal.pop("meal_type")
-                        diet_plan = DietPlanCreate(**meal)
                         await meal_crud.create_diet_plan(user_id, plan_date, meal_type, diet_plan)
                     except Exception as item_e:
-                        print(f"[ERROR] Failed to save diet item: {meal}. Reason: {item_e}")
+                        print(f"[ERROR] Failed to save diet item: {meal_type} {diet_plan}. Reason: {item_e}")
                 print(f"[INFO] Diet plan saved for user {user_id} on {plan_date}")
             else:
                 print(f"[WARNING] Unknown plan type: {plan_type}")
@@ -150,79 +141,187 @@ async def parse_and_save_plan(user_id: str, ai_response: str):
         print(f"[ERROR] Failed to parse or save routine: {e}")
 
 
+async def apply_intent(user_id: str, message: str, recent_history: List[Dict]) -> tuple[str | None, str | None, str | None]:
+    """의도를 분석해 수행 완료/기록 변경을 DB에 반영하고 (intent, AI 프롬프트 대체 문구, 되물을 메시지)를 반환합니다.
+    되물을 메시지가 있으면 답변을 생성하지 않고 사용자에게 그 메시지를 보여줘야 합니다."""
+    intent_data = await analyze_user_intent(user_id, message, recent_history)
+    intent = intent_data.get("intent")
+    ai_prompt_override = None
+
+    if intent == "complete_workout":
+        await plan_crud.update_workout_plan_status(user_id, date.today(), 'completed')
+        ai_prompt_override = "오늘의 운동을 성공적으로 완료했음을 사용자에게 칭찬하고 격려하는 메시지를 생성해줘."
+    elif intent == "modify_workout":
+        await plan_crud.update_workout_plan_status(user_id, date.today(), 'completed')
+        ai_prompt_override = "운동 기록이 성공적으로 저장되었음을 사용자에게 알리고 격려하는 메시지를 생성해줘."
+    elif intent == "complete_meal":
+        meal_type = intent_data.get("meal_type")
+        if meal_type:
+            await meal_crud.update_diet_plan_status(user_id, date.today(), meal_type, 'completed')
+            ai_prompt_override = f"오늘의 {meal_type} 식사를 성공적으로 완료했음을 사용자에게 칭찬하고 격려하는 메시지를 생성해줘."
+        else:
+            await meal_crud.update_all_diet_plans_status_for_date(user_id, date.today(), 'completed')
+            ai_prompt_override = "오늘의 모든 식사를 성공적으로 완료했음을 사용자에게 칭찬하고 격려하는 메시지를 생성해줘."
+    elif intent == "modify_meal":
+        meal_type = intent_data.get("meal_type")
+        if meal_type:
+            await meal_crud.update_diet_plan_status(user_id, date.today(), meal_type, 'completed')
+            ai_prompt_override = f"오늘의 {meal_type} 식사 기록이 성공적으로 저장되었음을 사용자에게 알리고 격려하는 메시지를 생성해줘."
+        else:
+            return intent, None, "어떤 식사를 변경했는지 알려주세요 (예: 아침, 점심, 저녁)."
+
+    return intent, ai_prompt_override, None
+
+
 # -------------------------------------
 # 2. 채팅 스트림 및 메인 로직
 # -------------------------------------
 
+def register_stream(user_id: str) -> int:
+    """새 답변 요청의 stream id를 발급하고 사용자의 최신 요청으로 등록합니다. 이전 요청은 다음 확인 시점에 멈춥니다."""
+    stream_id = next(_stream_ids)
+    _latest_streams[user_id] = max(stream_id, _latest_streams.get(user_id, 0))
+    return stream_id
+
+
+def is_current_stream(user_id: str, stream_id: int) -> bool:
+    return _latest_streams.get(user_id, 0) <= stream_id
+
+
 def create_system_prompt(user_profile: dict) -> str:
-    """사용자 프로필을 기반으로 AI에게 전달할 시스템 프롬프트를 생성합니다."""
-    injury_info = "없음"
-    if user_profile.get('injury_part') and user_profile.get('injury_level'):
-        injury_info = f"{user_profile['injury_part']} (수준: {user_profile['injury_level']})"
-
-    return f"""
-    당신은 사용자의 개인 정보를 완벽하게 이해하고 맞춤형 답변을 제공하는 AI 퍼스널 트레이너 'GymPT'입니다.
-
-    [사용자 정보]
-    - 나이: {user_profile.get('age', '정보 없음')}세
-    - 성별: {user_profile.get('gender', '정보 없음')}
-    - 키: {user_profile.get('height', '정보 없음')}cm
-    - 몸무게: {user_profile.get('weight', '정보 없음')}kg
-    - 운동 수준: {user_profile.get('level_desc', f"레벨 {user_profile.get('level', '정보 없음')}")}
-    - 부상 정보: {injury_info}
-
-    [당신의 역할]
-    1.  **개인화된 조언:** 위 사용자 정보를 반드시 모든 답변의 최우선 고려사항으로 삼으세요.
-    2.  **전문적인 트레이너:** 운동 방법, 식단 등에 대해 정확하고 친절하게 설명합니다.
-    3.  **동기 부여:** 사용자를 격려하고 긍정적인 태도를 유지합니다.
-    """
+    """사용자 프로필을 기반으로 AI에게 전달할 시스템 프롬프트를 생성합니다. (고정 prefix + 사용자 정보 suffix)"""
+    return build_trainer_prompt(user_profile)
 
 async def stream_generator(
-    user_profile: dict, user_message: str, image_bytes: bytes | None, model: str, ai_prompt_override: str | None = None
+    user_profile: dict, user_message: str, image_bytes: bytes | None, model: str, ai_prompt_override: str | None = None,
+    route_reason: str = "explicit", embedding: List[float] | None = None, stream_id: int | None = None
 ) -> AsyncGenerator[str, None]:
-    """AI의 답변을 스트리밍하고, 끝나면 대화 기록 저장 및 루틴 파싱을 수행합니다."""
+    """AI의 답변을 스트리밍하고, 끝나면 대화 기록 저장 및 루틴 파싱을 수행합니다.
+    embedding을 넘기면 (WebSocket 세션에서 미리 계산한 경우) 질문 임베딩을 다시 요청하지 않습니다.
+    stream_id는 입장 시 register_stream으로 받은 값이며, 없으면 여기서 등록합니다.
+    같은 사용자의 새 요청으로 중단되면 StreamAborted("replaced")를 올립니다."""
     user_id = user_profile['user_id']
+    if stream_id is None:
+        stream_id = register_stream(user_id)
+    started = time.perf_counter()
+    first_token_at = None
     full_response = ""
     recent_history = chat_cache.get(user_id, [])
     rag_history = []
-    embedding = None
+    memory_summaries = []
+    uses_memory = False
+    cached_response = None
 
     system_prompt = create_system_prompt(user_profile)
 
+    # 같은 사용자의 새 요청이 이미 들어왔으면 LLM을 부르지 않고 끝냅니다. (준비 단계 끝에서 한 번 더 확인)
+    if not is_current_stream(user_id, stream_id):
+        raise StreamAborted("replaced")
+
     if model == "gpt-4o":
-        if await should_search_long_term_memory(user_message, recent_history):
-            embedding = await get_embedding(user_message)
-            rag_history = await retrieve_and_rerank_history(user_id, user_message, embedding)
+        uses_memory = await should_search_long_term_memory(user_message, recent_history)
+        if uses_memory:
+            if embedding is None:
+                embedding = await get_embedding(user_message)
+            memory_summaries, rag_history = await retrieve_long_term_memory(user_id, user_message, embedding)
         if embedding is None and user_message:
             embedding = await get_embedding(user_message)
 
     final_user_message = ai_prompt_override if ai_prompt_override else user_message
 
-    if model == "llama3.2:1b":
-        response_stream = ask_ollama_stream(final_user_message, recent_history)
-        async for chunk in response_stream:
-            full_response += chunk
-            yield chunk
-    else:
-        response_stream = await ask_openai_unified(final_user_message, image_bytes, recent_history, rag_history, system_prompt)
-        async for chunk in response_stream:
-            if chunk.choices and chunk.choices[0].delta.content:
-                content = chunk.choices[0].delta.content
-                full_response += content
-                yield content
-    
-    user_chat = ChatHistoryCreate(user_id=user_id, role_type="user", content=user_message, embedding=embedding)
-    assistant_chat = ChatHistoryCreate(user_id=user_id, role_type="assistant", content=full_response)
-    await save_chat_history(user_chat)
-    await save_chat_history(assistant_chat)
+    cacheable = embedding is not None and semantic_cache.is_cacheable(model, user_message, image_bytes, ai_prompt_override, uses_memory)
+    if cacheable:
+        cached_response = semantic_cache.lookup(user_profile, embedding)
+
+    # 토큰 예산에 맞춰 장기/단기 기억을 정리합니다. (Ollama 경로는 시스템 프롬프트를 보내지 않습니다)
+    reserved_tokens = count_tokens(final_user_message) + sum(count_tokens(s["summary"]) for s in memory_summaries)
+    if model != "llama3.2:1b":
+        reserved_tokens += count_tokens(system_prompt)
+    rag_history, context_history, context_report = assemble_context(model, rag_history, recent_history, reserved_tokens)
+    print(f"[INFO] Context tokens {context_report['tokens_before']} -> {context_report['tokens_after']} "
+          f"(saved {context_report['tokens_saved']}, dedup {context_report['deduplicated']}, "
+          f"truncated {context_report['truncated']}, dropped {context_report['dropped']})")
+
+    if not is_current_stream(user_id, stream_id):
+        raise StreamAborted("replaced")
+
+    response_stream = None
+    truncated = True
+    try:
+        if model == "llama3.2:1b":
+            response_stream = ask_ollama_stream(final_user_message, context_history)
+            async for chunk in response_stream:
+                if not is_current_stream(user_id, stream_id):
+                    break
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                full_response += chunk
+                yield chunk
+            else:
+                truncated = False
+        else:
+            if cached_response is not None:
+                response_stream = semantic_cache.replay_stream(cached_response)
+            else:
+                response_stream = await ask_openai_unified(final_user_message, image_bytes, context_history, rag_history, system_prompt, memory_summaries)
+            async for chunk in response_stream:
+                if not is_current_stream(user_id, stream_id):
+                    break
+                if chunk.choices and chunk.choices[0].delta.content:
+                    content = chunk.choices[0].delta.content
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    full_response += content
+                    yield content
+            else:
+                truncated = False
+    finally:
+        if truncated:
+            # 클라이언트 연결 종료(취소) 또는 같은 사용자의 새 요청으로 중단된 경우.
+            # 취소 중에는 await가 다시 취소될 수 있으므로 정리 작업은 별도 task로 넘깁니다.
+            _abort_stream(user_id, user_message, embedding, full_response, model, response_stream, cached_response is None)
+
+    if truncated:
+        # 여기까지 오는 중단은 같은 사용자의 새 요청 때문입니다. (연결 종료는 generator가 닫혀 이 줄에 오지 않음)
+        raise StreamAborted("replaced")
+
+    if cacheable and cached_response is None:
+        semantic_cache.store(user_profile, user_message, embedding, full_response)
+
+    # 캐시 재생은 모델 비용이 들지 않으므로 경로 통계에서 제외합니다.
+    if cached_response is None:
+        record_route(model, route_reason, started, first_token_at,
+                     reserved_tokens + context_report["tokens_after"], count_tokens(full_response))
+
+    await save_chat_turn(user_id, user_message, embedding, full_response)
+    asyncio.create_task(parse_and_save_plan(user_id, full_response))
+
 
+async def save_chat_turn(user_id: str, user_message: str, embedding: List[float] | None, response: str):
+    """최근 대화 캐시를 바로 갱신하고, 질문/답변 한 쌍을 쓰기 버퍼에 넣습니다. (DB 저장은 history_writer가 모아서 수행)"""
     chat_cache.setdefault(user_id, []).extend([
         {"role": "user", "content": user_message},
-        {"role": "assistant", "content": full_response}
+        {"role": "assistant", "content": response}
     ])
     chat_cache[user_id] = chat_cache[user_id][-CACHE_MAX_LENGTH:]
 
-    asyncio.create_task(parse_and_save_plan(user_id, full_response))
+    user_chat = ChatHistoryCreate(user_id=user_id, role_type="user", content=user_message, embedding=embedding)
+    assistant_chat = ChatHistoryCreate(user_id=user_id, role_type="assistant", content=response)
+    await enqueue_turn([user_chat, assistant_chat])
+
+
+def _abort_stream(user_id: str, user_message: str, embedding, partial_response: str, model: str, response_stream, upstream: bool):
+    """중단된 스트림의 upstream 연결을 닫고, 받은 부분까지를 중단 표시와 함께 저장합니다. (계획 파싱은 하지 않습니다)"""
+    if upstream and response_stream is not None:
+        close = getattr(response_stream, "close", None) or getattr(response_stream, "aclose", None)
+        if close is not None:
+            asyncio.create_task(close())
+    if not partial_response:
+        return
+    generated = count_tokens(partial_response)
+    saved_tokens = record_cancellation(model, generated) if upstream else 0
+    print(f"[INFO] Stream cancelled for user {user_id}: {generated} tokens generated, ~{saved_tokens} tokens avoided")
+    asyncio.create_task(save_chat_turn(user_id, user_message, embedding, partial_response + TRUNCATION_MARK))
 
 
 @router.post("/chat/image")
@@ -230,54 +329,108 @@ async def chat_with_text_or_image(
     message: str = Form(""),
     image: UploadFile = File(None),
     model: str = Form("gpt-4o"),
+    stream_format: str = Form(CHAT_STREAM_FORMAT),
     current_user: dict = Depends(get_current_user)
 ):
+    if stream_format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"stream_format은 {', '.join(STREAM_FORMATS)} 중 하나여야 합니다.")
+    if image is not None and (image.size or 0) > CHAT_IMAGE_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=IMAGE_TOO_LARGE_MESSAGE)
     user_id = current_user['user_id']
+    # 이 요청과 후속 작업(계획 파싱 등)의 LLM 사용량을 사용자별로 집계합니다.
+    set_metering_user(user_id)
     user_profile = await get_user_by_id(user_id)
     if not user_profile:
         raise HTTPException(status_code=404, detail="사용자 정보를 찾을 수 없습니다.")
 
-    recent_history = chat_cache.get(user_id, [])
-    
-    intent_data = await analyze_user_intent(user_id, message, recent_history)
-    intent = intent_data.get("intent")
+    # 의도 분석 등 LLM 호출을 시작하기 전에 입장을 결정합니다. (사용자별 속도 제한, 전체 동시 스트림 제한)
+    try:
+        lease = await admit(user_id)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    # 준비 단계의 await 전에 등록해 두어야 이전 요청이 늦게 등록하며 이 요청을 멈추게 하지 못합니다.
+    # (같은 사용자의 이전 스트림은 다음 조각에서 멈춥니다)
+    stream_id = register_stream(user_id)
 
-    ai_prompt_override = None
-    image_bytes = await image.read() if image else None
+    try:
+        recent_history = chat_cache.get(user_id, [])
+        image_bytes = await image.read() if image else None
+
+        intent, ai_prompt_override, clarification = await apply_intent(user_id, message, recent_history)
+        route_reason = "explicit"
+        if model == "auto" and not clarification:
+            model, route_reason = route_model(message, intent, image_bytes is not None, ai_prompt_override is not None)
+            print(f"[INFO] Auto routing: {model} ({route_reason})")
+    except BaseException:
+        lease.release()
+        raise
+    if clarification:
+        lease.release()
+        return JSONResponse(content={"message": clarification}, status_code=400)
+    if not is_current_stream(user_id, stream_id):
+        # 의도 분석 중에 같은 사용자의 새 요청이 들어왔습니다.
+        lease.release()
+        return JSONResponse(content={"message": "새 요청이 들어와 이 요청은 취소되었습니다."}, status_code=409)
 
-    if intent == "complete_workout":
-        await plan_crud.update_workout_plan_status(user_id, date.today(), 'completed')
-        ai_prompt_override = "오늘의 운동을 성공적으로 완료했음을 사용자에게 칭찬하고 격려하는 메시지를 생성해줘."
-    elif intent == "modify_workout":
-        await plan_crud.update_workout_plan_status(user_id, date.today(), 'completed')
-        ai_prompt_override = "운동 기록이 성공적으로 저장되었음을 사용자에게 알리고 격려하는 메시지를 생성해줘."
-    elif intent == "complete_meal":
-        meal_type = intent_data.get("meal_type")
-        if meal_type:
-            await meal_crud.update_diet_plan_status(user_id, date.today(), meal_type, 'completed')
-            ai_prompt_override = f"오늘의 {meal_type} 식사를 성공적으로 완료했음을 사용자에게 칭찬하고 격려하는 메시지를 생성해줘."
-        else:
-            await meal_crud.update_all_diet_plans_status_for_date(user_id, date.today(), 'completed')
-            ai_prompt_override = "오늘의 모든 식사를 성공적으로 완료했음을 사용자에게 칭찬하고 격려하는 메시지를 생성해줘."
-    elif intent == "modify_meal":
-        meal_type = intent_data.get("meal_type")
-        if meal_type:
-            await meal_crud.update_diet_plan_status(user_id, date.today(), meal_type, 'completed')
-            ai_prompt_override = f"오늘의 {meal_type} 식사 기록이 성공적으로 저장되었음을 사용자에게 알리고 격려하는 메시지를 생성해줘."
-        else:
-            return JSONResponse(content={"message": "어떤 식사를 변경했는지 알려주세요 (예: 아침, 점심, 저녁)."}, status_code=400)
-    
     try:
-        return StreamingResponse(
-            stream_generator(user_profile, message, image_bytes, model, ai_prompt_override),
-            media_type="text/event-stream"
+        # 스트림이 끝나거나 클라이언트가 끊으면 응답 객체가 lease를 돌려줍니다.
+        return LeasedStreamingResponse(
+            framed_stream(
+                stream_generator(user_profile, message, image_bytes, model, ai_prompt_override, route_reason,
+                                 stream_id=stream_id),
+                stream_format,
+                {"model": model, "route": route_reason},
+            ),
+            lease,
+            media_type="text/event-stream",
+            headers=SSE_HEADERS if stream_format == "sse" else None
         )
     except Exception as e:
+        lease.release()
         raise HTTPException(status_code=500, detail=str(e))
 
 # -------------------------------------
 # 3. YouTube 검색 (기존과 동일)
 # -------------------------------------
+@singleflight("youtube_keywords")
+async def extract_youtube_keywords(ai_response: str) -> str:
+    """AI 답변에서 YouTube 검색 키워드를 추출합니다. 같은 답변에 대한 동시 요청은 LLM 호출 하나를 공유합니다."""
+    youtube_query_prompt = f"""From the following text, extract up to **3 keywords** that can be used to search for **YouTube workout routines or specific exercises**.
+ 
+        ✅ [Extract keywords only if at least one of the following conditions is met:]
+        🟢 Phrases like "chest workout", "leg workout", "ab workout" (body part + workout type) are included  
+        🟢 Specific exercises are mentioned, such as "squat", "bench press", "deadlift", etc.  
+        🟢 Mentions of **sets or reps**, like "10 reps", "3 sets", "workout for 10 minutes", etc.  
+        🟢 The text contains questions or requests like: "fun workouts", "easy exercises", "beginner workouts"  
+        🟢 A **body composition image** (e.g. InBody result) is uploaded, and a workout is requested
+ 
+        ❌ [Return 'None' in the following cases — no exceptions:]
+        🔴 Only vague fitness-related words are present, like "workout", "diet", "health", "fitness"  
+        🔴 General fitness concepts like "muscle", "physical education", or "running" are mentioned  
+        🔴 The text is unrelated to workouts — greetings, chit-chat, or general conversation
+ 
+        ⚠️ [If the user asks for non-workout videos:]
+        📛 If a request is made for unrelated videos (e.g. “recommend a funny video”),  
+        👉 Just respond with: "Non-workout related videos are not recommended."
+ 
+        📌 Output Format:
+        - Return only keywords separated by commas, like: "chest workout, bench press, upper body"
+        - If no condition is met, return only 'None'. Do **not** add any explanation or extra text.
+ 
+        Text: '{ai_response}'"""
+    
+    youtube_keyword_response = await chat_completion(
+        "keyword",
+        messages=[
+            {"role": "system", "content": "You are a keyword extraction assistant."},
+            {"role": "user", "content": youtube_query_prompt}
+        ],
+        temperature=0.0,
+        max_tokens=50
+    )
+    
+    return youtube_keyword_response.choices[0].message.content.strip()
+
 @router.get("/youtube_search")
 async def get_youtube_videos(
     ai_response: str = Query(..., alias="query"),
@@ -285,42 +438,9 @@ async def get_youtube_videos(
     current_user: dict = Depends(get_current_user)
 ):
     # (이하 로직은 기존과 동일하게 유지)
+    set_metering_user(current_user["user_id"])
     try:
-        youtube_query_prompt = f"""From the following text, extract up to **3 keywords** that can be used to search for **YouTube workout routines or specific exercises**.
- 
-            ✅ [Extract keywords only if at least one of the following conditions is met:]
-            🟢 Phrases like "chest workout", "leg workout", "ab workout" (body part + workout type) are included  
-            🟢 Specific exercises are mentioned, such as "squat", "bench press", "deadlift", etc.  
-            🟢 Mentions of **sets or reps**, like "10 reps", "3 sets", "workout for 10 minutes", etc.  
-            🟢 The text contains questions or requests like: "fun workouts", "easy exercises", "beginner workouts"  
-            🟢 A **body composition image** (e.g. InBody result) is uploaded, and a workout is requested
- 
-            ❌ [Return 'None' in the following cases — no exceptions:]
-            🔴 Only vague fitness-related words are present, like "workout", "diet", "health", "fitness"  
-            🔴 General fitness concepts like "muscle", "physical education", or "running" are mentioned  
-            🔴 The text is unrelated to workouts — greetings, chit-chat, or general conversation
- 
-            ⚠️ [If the user asks for non-workout videos:]
-            📛 If a request is made for unrelated videos (e.g. “recommend a funny video”),  
-            👉 Just respond with: "Non-workout related videos are not recommended."
- 
-            📌 Output Format:
-            - Return only keywords separated by commas, like: "chest workout, bench press, upper body"
-            - If no condition is met, return only 'None'. Do **not** add any explanation or extra text.
- 
-            Text: '{ai_response}'"""
-        
-        youtube_keyword_response = await chat_client.chat.completions.create(
-            model=CHAT_DEPLOYMENT_NAME,
-            messages=[
-                {"role": "system", "content": "You are a keyword extraction assistant."},
-                {"role": "user", "content": youtube_query_prompt}
-            ],
-            temperature=0.0,
-            max_tokens=50
-        )
-        
-        youtube_keywords = youtube_keyword_response.choices[0].message.content.strip()
+        youtube_keywords = await extract_youtube_keywords(ai_response)
 
         if youtube_keywords.lower() != 'none':
             search_term = youtube_keywords.split(',')[0].strip()
@@ -0,0 +1,246 @@
+# routers/chat_ws.py
+"""
+WebSocket 채팅 (/ws/chat?token=<JWT>).
+
+연결할 때 인증하고 사용자 프로필을 읽어 두며, 세션 동안 최근 질문 임베딩을 보관합니다.
+토큰은 chat 메시지마다 다시 확인하고, 만료되었으면 error를 보낸 뒤 1008로 연결을 닫습니다.
+image는 base64 길이로 먼저 확인해 CHAT_IMAGE_MAX_BYTES(/chat/image와 같은 한도)를 넘으면 디코드하지 않습니다.
+답변 생성은 /chat/image와 같은 apply_intent + stream_generator를 그대로 사용합니다.
+
+클라이언트 -> 서버 (JSON 텍스트 프레임)
+    {"type": "chat", "id": "c1", "message": "...", "model": "auto", "image": "<base64, 선택>"}
+    {"type": "cancel", "id": "c1"}
+    {"type": "ping"}
+서버 -> 클라이언트
+    {"type": "ready", "user_id": ...}
+    {"type": "start", "id": ..., "model": ..., "route": ...}
+    {"type": "token", "id": ..., "text": ...}
+    {"type": "done", "id": ..., "model": ..., "route": ...}
+    {"type": "cancelled", "id": ...}
+    {"type": "error", "id": ..., "message": ..., "retry_after": <초, 입장 거절 시>}
+    {"type": "pong"}
+
+새 chat 메시지가 오면 진행 중인 답변은 취소되고(HTTP 경로에서 새 요청이 이전 스트림을 멈추는 것과 같음),
+취소된 답변은 stream_generator가 받은 부분까지 중단 표시와 함께 저장합니다.
+"""
+import asyncio
+import base64
+import binascii
+import math
+import re
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import Dict, List
+
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+
+from dependencies import get_current_user
+from crud.user import get_user_by_id
+from routers.chat import (
+    CHAT_IMAGE_MAX_BYTES, IMAGE_TOO_LARGE_MESSAGE, apply_intent, chat_cache, register_stream, is_current_stream, stream_generator
+)
+from utils.admission import admit, AdmissionRejected
+from utils.metering import set_metering_user
+from utils.model_router import route_model, LOCAL_MODEL
+from utils.openai_client import get_embedding
+from utils.sse import StreamAborted
+
+router = APIRouter()
+
+# 세션마다 보관할 질문 임베딩 수 ("고마워"처럼 반복되는 짧은 메시지의 임베딩 재요청을 줄입니다)
+SESSION_EMBEDDING_CACHE_SIZE = 32
+# CHAT_IMAGE_MAX_BYTES 바이트를 base64로 인코딩한 최대 길이
+IMAGE_MAX_ENCODED_CHARS = 4 * math.ceil(CHAT_IMAGE_MAX_BYTES / 3)
+
+_ws_stats = {"sessions": 0, "open": 0, "messages": 0, "cancelled": 0, "embedding_reuse": 0}
+
+
+class ChatSession:
+    def __init__(self, websocket: WebSocket, user_profile: dict, token: str):
+        self.websocket = websocket
+        self.token = token
+        self.user_profile = user_profile
+        self.user_id = user_profile["user_id"]
+        self.embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, payload: dict):
+        # 여러 답변 task가 같은 소켓에 쓰므로 프레임이 섞이지 않게 순서대로 보냅니다.
+        async with self._send_lock:
+            await self.websocket.send_json(payload)
+
+    async def embed(self, message: str) -> List[float] | None:
+        key = re.sub(r"\s+", " ", message.strip())
+        if key in self.embeddings:
+            self.embeddings.move_to_end(key)
+            _ws_stats["embedding_reuse"] += 1
+            return self.embeddings[key]
+        try:
+            embedding = await get_embedding(message)
+        except Exception as e:
+            print(f"[WARNING] Session embedding failed for user {self.user_id}: {e}")
+            return None
+        self.embeddings[key] = embedding
+        while len(self.embeddings) > SESSION_EMBEDDING_CACHE_SIZE:
+            self.embeddings.popitem(last=False)
+        return embedding
+
+    async def run(self):
+        await self.send({"type": "ready", "user_id": self.user_id})
+        while True:
+            try:
+                data = await self.websocket.receive_json()
+            except WebSocketDisconnect:
+                return
+            except ValueError:
+                await self.send({"type": "error", "message": "JSON 메시지만 보낼 수 있습니다."})
+                continue
+
+            kind = data.get("type")
+            if kind == "chat":
+                if not await self.token_valid():
+                    await self.send({"type": "error", "id": data.get("id"), "message": "로그인이 만료되었습니다. 다시 로그인해 주세요."})
+                    await self.websocket.close(code=1008)
+                    return
+                self.start_chat(data)
+            elif kind == "cancel":
+                task = self.tasks.get(str(data.get("id")))
+                if task is not None:
+                    task.cancel()
+            elif kind == "ping":
+                await self.send({"type": "pong"})
+            else:
+                await self.send({"type": "error", "message": f"알 수 없는 메시지 type: {kind}"})
+
+    async def token_valid(self) -> bool:
+        # 연결은 토큰보다 오래 유지될 수 있으므로 답변을 시작할 때마다 서명과 exp를 다시 확인합니다.
+        try:
+            await get_current_user(self.token)
+            return True
+        except HTTPException:
+            return False
+
+    def start_chat(self, data: dict):
+        request_id = str(data.get("id") or _ws_stats["messages"] + 1)
+        previous = list(self.tasks.values())
+        for task in previous:
+            task.cancel()
+        _ws_stats["messages"] += 1
+        self.tasks[request_id] = asyncio.create_task(self._chat(request_id, data, previous))
+
+    async def _chat(self, request_id: str, data: dict, previous: List[asyncio.Task] = ()):
+        # 답변마다 별도 task이므로 여기서 정한 사용자는 이 답변의 LLM 호출에만 적용됩니다.
+        set_metering_user(self.user_id)
+        message = str(data.get("message") or "")
+        model = data.get("model") or "gpt-4o"
+        embedding_task = None
+        lease = None
+        try:
+            image_bytes = None
+            if data.get("image"):
+                # 디코드 전에 길이로 먼저 거르고, 패딩 때문에 남는 몇 바이트는 디코드 후에 확인합니다.
+                if len(data["image"]) <= IMAGE_MAX_ENCODED_CHARS:
+                    image_bytes = base64.b64decode(data["image"], validate=True)
+                if image_bytes is None or len(image_bytes) > CHAT_IMAGE_MAX_BYTES:
+                    await self.send({"type": "error", "id": request_id, "message": IMAGE_TOO_LARGE_MESSAGE})
+                    return
+        except (binascii.Error, ValueError, TypeError):
+            await self.send({"type": "error", "id": request_id, "message": "image는 base64 문자열이어야 합니다."})
+            return
+        try:
+            if previous:
+                # cancel()은 취소를 예약만 하므로, 이전 답변의 finally가 lease를 돌려준 뒤에 입장합니다.
+                # (CHAT_REPLACE_INFLIGHT=false에서 이전 답변 때문에 "inflight"로 거절되지 않도록)
+                await asyncio.wait(previous)
+            lease = await admit(self.user_id)
+            stream_id = register_stream(self.user_id)
+            # 의도 분석과 동시에 질문 임베딩을 미리 계산합니다. (gpt-4o 경로에서는 항상 필요)
+            if message and model != LOCAL_MODEL:
+                embedding_task = asyncio.create_task(self.embed(message))
+
+            recent_history = chat_cache.get(self.user_id, [])
+            intent, ai_prompt_override, clarification = await apply_intent(self.user_id, message, recent_history)
+            if clarification:
+                await self.send({"type": "error", "id": request_id, "message": clarification})
+                return
+            if not is_current_stream(self.user_id, stream_id):
+                # 다른 연결(다른 탭, HTTP)에서 같은 사용자의 새 요청이 들어왔습니다.
+                _ws_stats["cancelled"] += 1
+                await self.send({"type": "cancelled", "id": request_id, "reason": "replaced"})
+                return
+
+            route_reason = "explicit"
+            if model == "auto":
+                model, route_reason = route_model(message, intent, image_bytes is not None, ai_prompt_override is not None)
+            embedding = await embedding_task if embedding_task is not None else None
+
+            await self.send({"type": "start", "id": request_id, "model": model, "route": route_reason})
+            # send를 기다리는 중에 취소되어도 stream_generator의 finally(중단 표시와 부분 저장)가 바로 실행되도록 닫습니다.
+            async with aclosing(stream_generator(
+                self.user_profile, message, image_bytes, model, ai_prompt_override, route_reason, embedding, stream_id
+            )) as chunks:
+                async for chunk in chunks:
+                    await self.send({"type": "token", "id": request_id, "text": chunk})
+            await self.send({"type": "done", "id": request_id, "model": model, "route": route_reason})
+        except AdmissionRejected as e:
+            await self.send({"type": "error", "id": request_id, "message": str(e), "retry_after": e.retry_after})
+        except StreamAborted as e:
+            # 다른 연결(다른 탭, HTTP)에서 들어온 같은 사용자의 새 요청이 이 답변을 멈췄습니다.
+            _ws_stats["cancelled"] += 1
+            await self.send({"type": "cancelled", "id": request_id, "reason": e.reason})
+        except asyncio.CancelledError:
+            _ws_stats["cancelled"] += 1
+            try:
+                await self.send({"type": "cancelled", "id": request_id})
+            except Exception:
+                pass
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            print(f"[ERROR] WebSocket chat failed for user {self.user_id}: {e}")
+            try:
+                await self.send({"type": "error", "id": request_id, "message": str(e)})
+            except Exception:
+                pass
+        finally:
+            if lease is not None:
+                lease.release()
+            if embedding_task is not None and not embedding_task.done():
+                embedding_task.cancel()
+            if self.tasks.get(request_id) is asyncio.current_task():
+                del self.tasks[request_id]
+
+    async def close(self):
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@router.websocket("/ws/chat")
+async def chat_websocket(websocket: WebSocket, token: str = Query(...)):
+    # 브라우저 WebSocket은 Authorization 헤더를 보낼 수 없으므로 JWT를 쿼리 문자열로 받습니다.
+    try:
+        current_user = await get_current_user(token)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    user_profile = await get_user_by_id(current_user["user_id"])
+    if not user_profile:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    session = ChatSession(websocket, user_profile, token)
+    _ws_stats["sessions"] += 1
+    _ws_stats["open"] += 1
+    try:
+        await session.run()
+    finally:
+        _ws_stats["open"] -= 1
+        await session.close()
+
+
+def get_ws_stats() -> dict:
+    return dict(_ws_stats)
@@ -4,6 +4,7 @@ from datetime import date
 from schemas.plan import DietPlan, DietPlanCreate
 from crud import meal as meal_crud
 from dependencies import get_current_user
+from utils.fast_json import FAST_JSON_RESPONSES, orjson_response, record_dicts
 
 router = APIRouter(prefix="/diet_plans", tags=["diet_plans"])
 
@@ -30,6 +31,8 @@ async def read_diet_plans_for_range(
     """캘린더에 표시할 특정 날짜 범위의 모든 식단 계획을 가져옵니다."""
     user_id = current_user['user_id']
     plans = await meal_crud.get_diet_plans_by_range(user_id, start_date, end_date)
+    if FAST_JSON_RESPONSES:
+        return orjson_response(record_dicts(plans))
     return plans
 
 @router.put("/{plan_date}/{meal_type}/status/{status}", response_model=DietPlan)
@@ -2,10 +2,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Dict, Any
 from datetime import date
-from schemas.plan import WorkoutPlan, DietPlan # DietPlan 추가
+from schemas.plan import WorkoutPlan, DietPlan, ExerciseProgress # DietPlan 추가
 from crud import plan as plan_crud
 from crud import meal as meal_crud # meal_crud 추가
+from crud import progress as progress_crud
 from dependencies import get_current_user
+from utils.exercise_catalog import canonical_exercise_name, exercise_category
+from utils.fast_json import FAST_JSON_RESPONSES, orjson_response, record_dicts
 
 router = APIRouter(prefix="/plans", tags=["plans"])
 
@@ -20,6 +23,13 @@ async def read_plans_for_range(
     workout_plans_raw = await plan_crud.get_plans_by_range(user_id, start_date, end_date)
     diet_plans_raw = await meal_crud.get_diet_plans_by_range(user_id, start_date, end_date) # 식단 계획 가져오기
 
+    if FAST_JSON_RESPONSES:
+        # 여러 달 범위 조회에서는 행마다 Pydantic 모델을 만드는 비용이 크므로 Record를 바로 orjson으로 직렬화합니다.
+        return orjson_response({
+            "workout_plans": record_dicts(workout_plans_raw),
+            "diet_plans": record_dicts(diet_plans_raw)
+        })
+
     # Record 객체를 Pydantic 모델로 변환
     workout_plans = [WorkoutPlan.from_orm(plan) for plan in workout_plans_raw]
     diet_plans = [DietPlan.from_orm(plan) for plan in diet_plans_raw]
@@ -29,6 +39,18 @@ async def read_plans_for_range(
         "diet_plans": diet_plans
     }
 
+@router.get("/progress", response_model=List[ExerciseProgress])
+async def read_exercise_progress(
+    exercise: str | None = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """운동별 누적 진행 통계(완료 횟수, 볼륨, 최고 무게, 마지막 수행일)를 가져옵니다.
+    완료 처리 때 갱신되는 exercise_progress 테이블만 읽으므로 계획 행을 다시 집계하지 않습니다."""
+    user_id = current_user['user_id']
+    exercise_name = canonical_exercise_name(exercise) if exercise else None
+    rows = await progress_crud.get_exercise_progress(user_id, exercise_name)
+    return [{**dict(row), "category": exercise_category(row["exercise_name"])} for row in rows]
+
 # 기존 /month 엔드포인트는 더 이상 사용하지 않으므로 삭제하거나 주석 처리할 수 있습니다。
 # @router.get("/month/{year}/{month}", response_model=List[WorkoutPlan])
 # async def read_plans_for_month(
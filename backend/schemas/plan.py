@@ -21,6 +21,19 @@ class WorkoutPlan(PlanBase, WorkoutPlanCreate):
     class Config:
         from_attributes = True
 
+class ExerciseProgress(BaseModel):
+    exercise_name: str
+    category: str | None = None
+    sessions: int
+    total_sets: int
+    total_reps: int
+    total_volume_kg: float
+    total_duration_min: int
+    best_weight_kg: float | None = None
+    best_set_volume_kg: float | None = None
+    first_performed: date | None = None
+    last_performed: date | None = None
+
 class DietPlanCreate(BaseModel):
     food_name: str
     calories: int | None = None
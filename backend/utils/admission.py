@@ -0,0 +1,205 @@
+# utils/admission.py
+"""
+채팅 답변 생성(/chat/image, /ws/chat)의 입장 제어.
+
+요청 하나가 의도 분석, 기억 검색 판단, 답변 스트림, 계획 파싱까지 여러 LLM 호출을 만들기 때문에
+답변 생성을 시작하기 전에 다음 순서로 입장을 결정합니다.
+
+1. 사용자별 token bucket: 분당 CHAT_USER_RATE_PER_MIN개, 최대 CHAT_USER_BURST개까지 몰아서 허용합니다.
+2. 사용자별 진행 중 스트림 1개: CHAT_REPLACE_INFLIGHT=true면 새 요청이 이전 스트림의 자리를 넘겨받고
+   (이전 스트림은 중단), false면 이전 스트림이 끝날 때까지 거절합니다.
+3. 전체 동시 스트림 CHAT_MAX_CONCURRENT개: 자리가 없으면 FIFO 대기열에서 기다리고,
+   대기가 CHAT_QUEUE_TARGET_MS를 넘거나 대기열이 CHAT_MAX_QUEUE개로 차면 거절합니다.
+
+거절은 AdmissionRejected(reason, retry_after)로 알리며, HTTP 경로는 429 + Retry-After로 응답합니다.
+입장한 요청은 Lease를 받고, 스트림이 끝나면(중단 포함) release()로 자리를 돌려줍니다.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from dotenv import load_dotenv
+from fastapi.responses import StreamingResponse
+
+load_dotenv()
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+CHAT_USER_RATE_PER_MIN = float(os.getenv("CHAT_USER_RATE_PER_MIN", 12))
+CHAT_USER_BURST = float(os.getenv("CHAT_USER_BURST", 4))
+CHAT_REPLACE_INFLIGHT = os.getenv("CHAT_REPLACE_INFLIGHT", "true").lower() == "true"
+CHAT_MAX_CONCURRENT = int(os.getenv("CHAT_MAX_CONCURRENT", 32))
+CHAT_MAX_QUEUE = int(os.getenv("CHAT_MAX_QUEUE", 64))
+CHAT_QUEUE_TARGET_MS = float(os.getenv("CHAT_QUEUE_TARGET_MS", 2000))
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Lease:
+    """입장한 요청 하나. holds_slot이면 전체 동시 스트림 자리 하나를 차지하고 있습니다."""
+
+    def __init__(self, user_id: str, holds_slot: bool, replaced: bool = False):
+        self.user_id = user_id
+        self.holds_slot = holds_slot
+        self.replaced = replaced
+        self.started = time.monotonic()
+        self.released = False
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        if _inflight.get(self.user_id) is self:
+            del _inflight[self.user_id]
+        if self.holds_slot:
+            global _avg_hold_s
+            _avg_hold_s = 0.8 * _avg_hold_s + 0.2 * (time.monotonic() - self.started)
+            _release_slot()
+
+
+_buckets: Dict[str, tuple[float, float]] = {}
+_inflight: Dict[str, Lease] = {}
+_waiters: Deque[asyncio.Future] = deque()
+_slots_in_use = 0
+# 자리 하나를 잡고 있는 평균 시간(초). 대기열 거절 시 Retry-After 추정에 씁니다.
+_avg_hold_s = 5.0
+_queue_waits: Deque[float] = deque(maxlen=1000)
+_stats = {"admitted": 0, "replaced": 0, "queued": 0, "rejected": 0}
+_rejections = {"rate": 0, "inflight": 0, "queue_full": 0, "queue_timeout": 0}
+
+
+def _reject(reason: str, retry_after: float, message: str):
+    _stats["rejected"] += 1
+    _rejections[reason] += 1
+    raise AdmissionRejected(reason, max(1, math.ceil(retry_after)), message)
+
+
+def _take_token(user_id: str):
+    if CHAT_USER_RATE_PER_MIN <= 0:
+        return
+    rate_s = CHAT_USER_RATE_PER_MIN / 60
+    now = time.monotonic()
+    tokens, updated = _buckets.get(user_id, (CHAT_USER_BURST, now))
+    tokens = min(CHAT_USER_BURST, tokens + (now - updated) * rate_s)
+    if tokens < 1:
+        _buckets[user_id] = (tokens, now)
+        _reject("rate", (1 - tokens) / rate_s, "요청이 너무 잦습니다. 잠시 후 다시 시도해 주세요.")
+    _buckets[user_id] = (tokens - 1, now)
+    if len(_buckets) > 10000:
+        # 가득 찬 bucket은 새로 만드는 것과 같으므로 지웁니다.
+        full_after = CHAT_USER_BURST / rate_s
+        for key, (_, last) in list(_buckets.items()):
+            if now - last >= full_after:
+                del _buckets[key]
+
+
+def _release_slot():
+    global _slots_in_use
+    # 기다리는 요청이 있으면 자리를 바로 넘겨줍니다. (사용 중인 자리 수는 그대로)
+    while _waiters:
+        waiter = _waiters.popleft()
+        if not waiter.done():
+            waiter.set_result(None)
+            return
+    _slots_in_use -= 1
+
+
+def _abandon(waiter: asyncio.Future):
+    waiter.cancel()
+    try:
+        _waiters.remove(waiter)
+    except ValueError:
+        pass
+
+
+async def _acquire_slot():
+    global _slots_in_use
+    if _slots_in_use < CHAT_MAX_CONCURRENT and not _waiters:
+        _slots_in_use += 1
+        _queue_waits.append(0.0)
+        return
+    if len(_waiters) >= CHAT_MAX_QUEUE:
+        _reject("queue_full", _avg_hold_s * (len(_waiters) + 1) / CHAT_MAX_CONCURRENT,
+                "지금은 요청이 많아 답변을 시작할 수 없습니다. 잠시 후 다시 시도해 주세요.")
+
+    _stats["queued"] += 1
+    waiter = asyncio.get_running_loop().create_future()
+    _waiters.append(waiter)
+    started = time.monotonic()
+    try:
+        await asyncio.wait_for(asyncio.shield(waiter), CHAT_QUEUE_TARGET_MS / 1000)
+    except asyncio.TimeoutError:
+        if not waiter.done():
+            _abandon(waiter)
+            _reject("queue_timeout", _avg_hold_s * (len(_waiters) + 1) / CHAT_MAX_CONCURRENT,
+                    "지금은 요청이 많아 답변을 시작할 수 없습니다. 잠시 후 다시 시도해 주세요.")
+    except asyncio.CancelledError:
+        # 자리를 넘겨받은 뒤에 취소되었다면 다음 대기자에게 돌려줍니다.
+        if waiter.done() and not waiter.cancelled():
+            _release_slot()
+        else:
+            _abandon(waiter)
+        raise
+    _queue_waits.append(time.monotonic() - started)
+
+
+async def admit(user_id: str) -> Lease:
+    """답변 생성 입장을 결정합니다. 거절하면 AdmissionRejected를 던집니다."""
+    if not ADMISSION_ENABLED:
+        return Lease(user_id, holds_slot=False)
+    _take_token(user_id)
+
+    current = _inflight.get(user_id)
+    if current is not None:
+        if not CHAT_REPLACE_INFLIGHT:
+            _reject("inflight", 1, "이전 답변이 끝난 뒤에 다시 보내 주세요.")
+        # 이전 스트림의 자리를 넘겨받습니다. 이전 lease의 release()는 자리를 돌려주지 않습니다.
+        lease = Lease(user_id, holds_slot=current.holds_slot, replaced=True)
+        current.holds_slot = False
+        _stats["replaced"] += 1
+    else:
+        await _acquire_slot()
+        lease = Lease(user_id, holds_slot=True)
+    _inflight[user_id] = lease
+    _stats["admitted"] += 1
+    return lease
+
+
+class LeasedStreamingResponse(StreamingResponse):
+    """응답 전송이 끝나거나 중간에 끊기면 lease를 돌려주는 StreamingResponse.
+    (클라이언트가 첫 조각 전에 끊으면 body generator가 시작되지 않으므로 generator의 finally에 맡기지 않습니다)"""
+
+    def __init__(self, content, lease: Lease, **kwargs):
+        super().__init__(content, **kwargs)
+        self.lease = lease
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.lease.release()
+
+
+def get_admission_stats() -> dict:
+    waits = sorted(_queue_waits)
+
+    def pct(p: float) -> float:
+        return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 1) if waits else 0.0
+
+    return {
+        "enabled": ADMISSION_ENABLED,
+        "in_flight": _slots_in_use,
+        "max_concurrent": CHAT_MAX_CONCURRENT,
+        "queue_length": len(_waiters),
+        **_stats,
+        "rejections": dict(_rejections),
+        "queue_wait_ms": {"p50": pct(0.5), "p95": pct(0.95), "max": pct(1.0)},
+        "avg_hold_s": round(_avg_hold_s, 2),
+    }
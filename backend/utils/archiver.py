@@ -0,0 +1,70 @@
+# utils/archiver.py
+"""
+chat_histories(hot)에서 오래되고 이미 요약된 대화를 chat_histories_archive(cold)로 옮기는 백그라운드 작업.
+
+옮겨지는 대화는 모두 요약 watermark 이하이므로 장기 기억 검색은 요약(과 그 임베딩)으로 계속 찾을 수 있고,
+원문 검색(retrieve_and_rerank_history)과 최근 대화 조회는 hot 테이블만 읽습니다.
+
+hot 테이블의 행을 지우는 작업이므로 기본으로 꺼져 있으며, ARCHIVE_ENABLED=true로 켭니다.
+"""
+import asyncio
+import os
+from dotenv import load_dotenv
+
+from crud import archive as archive_crud
+
+load_dotenv()
+
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "false").lower() == "true"
+ARCHIVE_INTERVAL_S = float(os.getenv("ARCHIVE_INTERVAL_S", 6 * 3600))
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 30))
+# 한 트랜잭션에서 옮길 최대 행 수 (잠금 시간을 짧게 유지)
+ARCHIVE_BATCH_ROWS = int(os.getenv("ARCHIVE_BATCH_ROWS", 500))
+
+_task: asyncio.Task | None = None
+
+
+async def run_archive_pass() -> int:
+    """옮길 수 있는 모든 대화를 cold 테이블로 옮기고, 옮긴 행 수를 반환합니다."""
+    moved = 0
+    for candidate in await archive_crud.get_archive_candidates(ARCHIVE_AFTER_DAYS):
+        user_id = candidate["user_id"]
+        try:
+            while True:
+                count = await archive_crud.archive_turns(user_id, candidate["last_prompt_id"], ARCHIVE_BATCH_ROWS)
+                moved += count
+                if count < ARCHIVE_BATCH_ROWS - 1:
+                    break
+                # 요청 처리와 DB를 번갈아 쓰도록 묶음 사이에 양보합니다.
+                await asyncio.sleep(0)
+        except Exception as e:
+            print(f"[ERROR] Failed to archive chat history for user {user_id}: {e}")
+    return moved
+
+
+async def _archiver_loop():
+    while True:
+        try:
+            moved = await run_archive_pass()
+            if moved:
+                print(f"[INFO] Archiver pass finished: {moved} rows moved to chat_histories_archive")
+        except Exception as e:
+            print(f"[ERROR] Archiver pass failed: {e}")
+        await asyncio.sleep(ARCHIVE_INTERVAL_S)
+
+
+def start_archiver():
+    global _task
+    if ARCHIVE_ENABLED and _task is None:
+        _task = asyncio.create_task(_archiver_loop())
+
+
+async def stop_archiver():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,160 @@
+# utils/compression.py
+"""
+응답 압축 미들웨어 (Accept-Encoding 협상).
+
+- 클라이언트가 br을 허용하고 brotli 패키지가 설치되어 있으면 brotli, 아니면 gzip으로 압축합니다.
+- COMPRESSION_MIN_BYTES보다 작은 응답, 이미 Content-Encoding이 있는 응답은 그대로 보냅니다.
+- text/event-stream(채팅 스트림)과 audio/, image/ 응답은 압축하지 않습니다.
+  (스트림은 토큰이 바로 전달되어야 하고, 오디오/이미지는 이미 압축된 형식이라 CPU만 씁니다)
+
+Starlette의 GZipMiddleware 내부 클래스에 기대지 않고 zlib/brotli로 직접 압축하는 ASGI 미들웨어입니다.
+brotli는 선택 의존성입니다: pip install brotli
+"""
+import os
+import zlib
+
+from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+load_dotenv()
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+# 0~11. 동적 응답에서는 4~5 정도가 gzip -6보다 작고 빠릅니다.
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))
+
+INCOMPRESSIBLE_CONTENT_TYPES = ("text/event-stream", "audio/", "image/")
+
+
+def _accepted_encodings(header: str) -> set:
+    """Accept-Encoding 헤더에서 q=0이 아닌 인코딩 이름들."""
+    accepted = set()
+    for part in header.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name)
+    return accepted
+
+
+class _Encoder:
+    """한 응답의 압축 상태. 스트리밍 응답은 조각마다 flush 해서 클라이언트가 바로 풀 수 있게 합니다."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31: gzip 헤더/트레일러를 붙입니다.
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, body: bytes, *, more_body: bool) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(body) + (self._brotli.flush() if more_body else self._brotli.finish())
+        return self._zlib.compress(body) + self._zlib.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+
+
+class _CompressionResponder:
+    """응답 하나의 ASGI send를 감싸 본문을 압축합니다.
+    시작 메시지는 첫 본문 조각을 볼 때까지 보관합니다. (한 번에 오는 작은 응답은 압축하지 않으므로)"""
+
+    def __init__(self, app: ASGIApp, encoding: str | None, minimum_size: int,
+                 gzip_level: int, brotli_quality: int) -> None:
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.send: Send = None
+        self.start_message: Message | None = None
+        self.encoder: _Encoder | None = None
+        self.passthrough = encoding is None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    async def send_with_compression(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if "content-encoding" in headers or headers.get("content-type", "").startswith(INCOMPRESSIBLE_CONTENT_TYPES):
+                self.passthrough = True
+            if self.passthrough:
+                await self.send(message)
+            else:
+                self.start_message = message
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self._send_start()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is None:
+            if not more_body and len(body) < self.minimum_size:
+                await self._send_start()
+                await self.send(message)
+                return
+            self.encoder = _Encoder(self.encoding, self.gzip_level, self.brotli_quality)
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                # 전체 길이를 미리 알 수 없으므로 chunked로 보냅니다.
+                del headers["Content-Length"]
+                body = self.encoder.compress(body, more_body=True)
+            else:
+                body = self.encoder.compress(body, more_body=False)
+                headers["Content-Length"] = str(len(body))
+            await self._send_start()
+            await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        await self.send({"type": "http.response.body", "body": self.encoder.compress(body, more_body=more_body),
+                         "more_body": more_body})
+
+    async def _send_start(self) -> None:
+        if self.start_message is not None:
+            message, self.start_message = self.start_message, None
+            await self.send(message)
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_BYTES,
+                 gzip_level: int = GZIP_LEVEL, brotli_quality: int = BROTLI_QUALITY) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = _accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            encoding = None
+        responder = _CompressionResponder(self.app, encoding, self.minimum_size, self.gzip_level, self.brotli_quality)
+        await responder(scope, receive, send)
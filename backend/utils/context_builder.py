@@ -0,0 +1,152 @@
+# utils/context_builder.py
+"""
+모델별 토큰 예산 안에서 대화 컨텍스트(장기 기억 + 단기 기억)를 구성합니다.
+
+1. rag_history 중 recent_history에 이미 있는 턴은 제거합니다.
+2. 길게 나열된 assistant 답변(루틴/식단 등)은 앞부분만 남기고 생략합니다.
+3. 최근 대화 → 장기 기억 순으로 예산 안에 들어가는 만큼만 담습니다.
+"""
+import os
+import re
+from typing import Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken이 없거나 인코딩 파일을 받을 수 없는 환경
+    _encoding = None
+
+load_dotenv()
+
+# 모델별 컨텍스트(기억) 토큰 예산. 시스템 프롬프트와 현재 사용자 메시지는 reserved로 따로 빠집니다.
+CONTEXT_TOKEN_BUDGETS = {
+    "gpt-4o": int(os.getenv("CONTEXT_BUDGET_GPT4O", 6000)),
+    "llama3.2:1b": int(os.getenv("CONTEXT_BUDGET_LLAMA", 1500)),
+}
+DEFAULT_CONTEXT_BUDGET = int(os.getenv("CONTEXT_BUDGET_DEFAULT", 4000))
+
+# assistant 답변 하나가 이 토큰 수를 넘으면 앞부분만 남깁니다. (가장 최근 답변은 2배까지 허용)
+ASSISTANT_MAX_TOKENS = int(os.getenv("CONTEXT_ASSISTANT_MAX_TOKENS", 300))
+ELISION_MARK = "\n...(이전 답변 일부 생략)"
+
+# 메시지마다 role/구분자에 붙는 대략적인 오버헤드
+_MESSAGE_OVERHEAD = 4
+
+_stats = {"requests": 0, "tokens_before": 0, "tokens_after": 0, "deduplicated": 0, "truncated": 0, "dropped": 0}
+
+
+def count_tokens(text: str) -> int:
+    """로컬에서 토큰 수를 셉니다. tiktoken이 없으면 UTF-8 바이트 기반으로 근사합니다."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    # 한글은 대략 글자당 1토큰, 영문은 4바이트당 1토큰 정도
+    return max(1, len(text.encode("utf-8")) // 3)
+
+
+def _message_tokens(message: Dict) -> int:
+    return count_tokens(str(message.get("content", ""))) + _MESSAGE_OVERHEAD
+
+
+def _normalize(content: str) -> str:
+    return re.sub(r"\s+", " ", str(content)).strip()
+
+
+def _truncate(content: str, max_tokens: int) -> str:
+    if _encoding is not None:
+        tokens = _encoding.encode(content, disallowed_special=())
+        return _encoding.decode(tokens[:max_tokens]).rstrip() + ELISION_MARK
+    # 근사 모드에서는 글자 수로 자릅니다.
+    return content[:max_tokens].rstrip() + ELISION_MARK
+
+
+def _dedupe_rag(rag_history: List[Dict], recent_history: List[Dict]) -> Tuple[List[Dict], int]:
+    """(user, assistant) 쌍 단위로, 어느 한쪽이라도 recent_history에 있으면 제거합니다."""
+    recent = {_normalize(m["content"]) for m in recent_history}
+    kept, removed = [], 0
+    i = 0
+    while i < len(rag_history):
+        pair = rag_history[i:i + 2]
+        i += 2
+        if any(_normalize(m["content"]) in recent for m in pair):
+            removed += len(pair)
+            continue
+        kept.extend(pair)
+    return kept, removed
+
+
+def _elide_long_answers(messages: List[Dict], last_limit_factor: int = 1) -> Tuple[List[Dict], int]:
+    result, truncated = [], 0
+    last_assistant = max((i for i, m in enumerate(messages) if m.get("role") == "assistant"), default=-1)
+    for i, m in enumerate(messages):
+        limit = ASSISTANT_MAX_TOKENS * (last_limit_factor if i == last_assistant else 1)
+        if m.get("role") == "assistant" and count_tokens(m["content"]) > limit:
+            m = {**m, "content": _truncate(m["content"], limit)}
+            truncated += 1
+        result.append(m)
+    return result, truncated
+
+
+def assemble_context(
+    model: str,
+    rag_history: List[Dict],
+    recent_history: List[Dict],
+    reserved_tokens: int = 0,
+) -> Tuple[List[Dict], List[Dict], Dict]:
+    """
+    예산에 맞춘 (rag_history, recent_history)와 절감 리포트를 반환합니다.
+    reserved_tokens: 시스템 프롬프트 + 현재 사용자 메시지처럼 반드시 들어가야 하는 토큰 수
+    """
+    budget = max(0, CONTEXT_TOKEN_BUDGETS.get(model, DEFAULT_CONTEXT_BUDGET) - reserved_tokens)
+    tokens_before = sum(_message_tokens(m) for m in rag_history) + sum(_message_tokens(m) for m in recent_history)
+
+    rag, deduplicated = _dedupe_rag(rag_history, recent_history)
+    recent, truncated_recent = _elide_long_answers(recent_history, last_limit_factor=2)
+    rag, truncated_rag = _elide_long_answers(rag)
+
+    # 최근 대화를 최신 것부터 담고, 남은 예산으로 장기 기억 쌍을 순위 순서대로 담습니다.
+    used = 0
+    recent_keep = []
+    for m in reversed(recent):
+        cost = _message_tokens(m)
+        if used + cost > budget:
+            break
+        recent_keep.append(m)
+        used += cost
+    recent_keep.reverse()
+    # 단기 기억은 user 메시지부터 시작하도록 맞춥니다.
+    while recent_keep and recent_keep[0].get("role") == "assistant":
+        used -= _message_tokens(recent_keep.pop(0))
+
+    rag_keep = []
+    for i in range(0, len(rag), 2):
+        pair = rag[i:i + 2]
+        cost = sum(_message_tokens(m) for m in pair)
+        if used + cost > budget:
+            continue
+        rag_keep.extend(pair)
+        used += cost
+
+    dropped = (len(rag) - len(rag_keep)) + (len(recent) - len(recent_keep))
+    report = {
+        "model": model,
+        "budget": budget,
+        "tokens_before": tokens_before,
+        "tokens_after": used,
+        "tokens_saved": tokens_before - used,
+        "deduplicated": deduplicated,
+        "truncated": truncated_recent + truncated_rag,
+        "dropped": dropped,
+    }
+    _stats["requests"] += 1
+    for key in ("tokens_before", "tokens_after", "deduplicated", "truncated", "dropped"):
+        _stats[key] += report[key]
+    return rag_keep, recent_keep, report
+
+
+def get_context_stats() -> Dict:
+    """누적 컨텍스트 절감 통계를 반환합니다."""
+    return {**_stats, "tokens_saved": _stats["tokens_before"] - _stats["tokens_after"]}
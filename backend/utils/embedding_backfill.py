@@ -0,0 +1,169 @@
+# utils/embedding_backfill.py
+"""
+임베딩이 없는 사용자 질문(embedding IS NULL)을 채우는 백필 작업.
+
+llama3.2:1b 경로로 보낸 메시지, 임베딩 호출이 실패한 메시지, 이전 버전에서 저장된 행은 임베딩이 없어
+retrieve_and_rerank_history에서 찾을 수 없습니다. 이 작업은 prompt_id 기준 keyset pagination으로
+빈 행을 EMBED_BACKFILL_BATCH개씩 읽어, 임베딩 API에 리스트 입력 한 번으로 보내고, 결과를 한 번의 UPDATE로 씁니다.
+
+- 속도 제한: 임베딩 요청 사이 간격을 60 / EMBED_BACKFILL_MAX_RPM 초 이상으로 유지합니다.
+- 재개: 다음 pass는 마지막으로 처리한 prompt_id 다음부터 이어서 읽고, 끝에 닿으면 처음부터 다시 봅니다.
+  (실패한 행은 그대로 NULL로 남아 다음 바퀴에 재시도됩니다)
+
+서버 안의 주기 작업은 기본으로 꺼져 있습니다. (EMBED_BACKFILL_ENABLED=true)
+cursor가 프로세스 메모리에만 있어 uvicorn worker마다 같은 페이지를 따로 임베딩하므로, worker가 하나일 때만 켜고
+여러 worker로 띄울 때는 아래 CLI를 한 곳에서 단일 작업으로 돌립니다. (backend 폴더에서):
+    python -m utils.embedding_backfill --after 0
+"""
+import argparse
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+
+from crud import chat as chat_crud
+from .llm_gateway import create_embedding
+
+load_dotenv()
+
+EMBED_BACKFILL_ENABLED = os.getenv("EMBED_BACKFILL_ENABLED", "false").lower() == "true"
+EMBED_BACKFILL_INTERVAL_S = float(os.getenv("EMBED_BACKFILL_INTERVAL_S", 3600))
+# 임베딩 요청 하나에 넣을 입력 수 (API 한도 2048)
+EMBED_BACKFILL_BATCH = int(os.getenv("EMBED_BACKFILL_BATCH", 256))
+EMBED_BACKFILL_MAX_RPM = float(os.getenv("EMBED_BACKFILL_MAX_RPM", 30))
+# 입력 하나당 최대 글자 수 (모델 입력 토큰 한도 안으로 자릅니다)
+EMBED_BACKFILL_MAX_CHARS = int(os.getenv("EMBED_BACKFILL_MAX_CHARS", 6000))
+# 한 pass에서 처리할 최대 행 수 (0이면 끝까지)
+EMBED_BACKFILL_MAX_ROWS_PER_PASS = int(os.getenv("EMBED_BACKFILL_MAX_ROWS_PER_PASS", 20000))
+
+_task: asyncio.Task | None = None
+_cursor = 0
+_last_request_at = 0.0
+_stats = {
+    "passes": 0, "rows_embedded": 0, "rows_skipped": 0, "batches": 0, "failed_batches": 0,
+    "cursor": 0, "remaining": None, "last_pass_rows": 0, "last_pass_s": 0.0, "last_pass_rows_per_s": 0.0,
+}
+
+
+async def _throttle():
+    global _last_request_at
+    min_interval = 60.0 / EMBED_BACKFILL_MAX_RPM if EMBED_BACKFILL_MAX_RPM > 0 else 0.0
+    wait = _last_request_at + min_interval - time.monotonic()
+    if wait > 0:
+        await asyncio.sleep(wait)
+    _last_request_at = time.monotonic()
+
+
+async def _embed_batch(rows: list[dict]) -> int:
+    """한 페이지를 임베딩해 저장하고, 저장한 행 수를 반환합니다."""
+    # 빈 문자열(이미지 전용 메시지 등)은 임베딩 API가 거절하므로 건너뜁니다.
+    targets = [row for row in rows if row["content"] and row["content"].strip()]
+    _stats["rows_skipped"] += len(rows) - len(targets)
+    if not targets:
+        return 0
+
+    await _throttle()
+    _stats["batches"] += 1
+    response = await create_embedding([row["content"][:EMBED_BACKFILL_MAX_CHARS] for row in targets])
+    embeddings = {targets[item.index]["prompt_id"]: item.embedding for item in response.data}
+    user_ids = {row["user_id"] for row in targets}
+    await chat_crud.save_question_embeddings(embeddings, user_ids)
+    chat_crud.invalidate_question_index(user_ids)
+    return len(embeddings)
+
+
+async def run_backfill_pass(max_rows: int = EMBED_BACKFILL_MAX_ROWS_PER_PASS, log_every: int = 10) -> int:
+    """커서 위치부터 임베딩이 없는 질문을 최대 max_rows개 채우고, 채운 행 수를 반환합니다."""
+    global _cursor
+    started = time.perf_counter()
+    remaining = await chat_crud.count_unembedded_questions(0)
+    _stats["remaining"] = remaining
+    if not remaining:
+        return 0
+
+    done = 0
+    scanned = 0
+    pages = 0
+    while not max_rows or scanned < max_rows:
+        rows = await chat_crud.get_unembedded_questions(_cursor, EMBED_BACKFILL_BATCH)
+        if not rows:
+            # 끝까지 읽었으면 다음 pass는 처음부터 (실패했던 행 재시도)
+            _cursor = _stats["cursor"] = 0
+            break
+        scanned += len(rows)
+        pages += 1
+        try:
+            done += await _embed_batch(rows)
+        except Exception as e:
+            _stats["failed_batches"] += 1
+            print(f"[ERROR] Embedding backfill failed for prompt_id {rows[0]['prompt_id']}~{rows[-1]['prompt_id']}: {e}")
+        _cursor = rows[-1]["prompt_id"]
+        _stats["cursor"] = _cursor
+        _stats["remaining"] = max(0, remaining - done)
+        if pages % log_every == 0:
+            elapsed = time.perf_counter() - started
+            print(f"[INFO] Embedding backfill progress: {done} rows embedded, cursor {_cursor}, "
+                  f"~{_stats['remaining']} remaining, {done / elapsed if elapsed else 0:.1f} rows/s")
+
+    elapsed = time.perf_counter() - started
+    _stats["passes"] += 1
+    _stats["rows_embedded"] += done
+    _stats["last_pass_rows"] = done
+    _stats["last_pass_s"] = round(elapsed, 2)
+    _stats["last_pass_rows_per_s"] = round(done / elapsed, 1) if elapsed else 0.0
+    return done
+
+
+async def _backfill_loop():
+    while True:
+        try:
+            done = await run_backfill_pass()
+            if done:
+                print(f"[INFO] Embedding backfill pass finished: {done} rows in {_stats['last_pass_s']}s "
+                      f"({_stats['last_pass_rows_per_s']} rows/s), ~{_stats['remaining']} remaining")
+        except Exception as e:
+            print(f"[ERROR] Embedding backfill pass failed: {e}")
+        await asyncio.sleep(EMBED_BACKFILL_INTERVAL_S)
+
+
+def start_embedding_backfill():
+    global _task
+    if EMBED_BACKFILL_ENABLED and _task is None:
+        _task = asyncio.create_task(_backfill_loop())
+
+
+async def stop_embedding_backfill():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+def get_backfill_stats() -> dict:
+    return dict(_stats)
+
+
+async def _main(after: int, max_rows: int):
+    global _cursor
+    from database import database
+
+    _cursor = after
+    await database.connect()
+    try:
+        done = await run_backfill_pass(max_rows=max_rows, log_every=1)
+    finally:
+        await database.disconnect()
+    print(f"[INFO] Embedding backfill finished: {done} rows, stats {get_backfill_stats()}")
+    print(f"[INFO] Resume with --after {_stats['cursor']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="임베딩이 없는 채팅 질문 백필")
+    parser.add_argument("--after", type=int, default=0, help="이 prompt_id 다음부터 처리합니다 (이전 실행의 cursor)")
+    parser.add_argument("--max-rows", type=int, default=0, help="처리할 최대 행 수 (0이면 끝까지)")
+    args = parser.parse_args()
+    asyncio.run(_main(args.after, args.max_rows))
@@ -0,0 +1,126 @@
+# utils/exercise_catalog.py
+"""
+표준 운동 이름 카탈로그.
+
+LLM이 만든 운동 계획의 exercise_name은 자유 형식이라 같은 운동이 "벤치프레스", "벤치 프레스", "Bench press"처럼
+여러 이름으로 저장됩니다. 번들된 카탈로그(data/exercises_ko.csv: 표준 이름, 별칭, 부위)와 NameIndex로
+저장 전에 표준 이름으로 바꿔, 같은 운동의 기록이 (user_id, plan_date, exercise_name) 키와 진행 통계에서 하나로 모이게 합니다.
+
+잘못 합치면 서로 다른 운동의 기록이 섞이므로 음식 검색보다 엄격하게 매칭합니다.
+(포함 매칭은 질의 길이의 EXERCISE_MATCH_MIN_CONTAIN 이상, 유사도는 EXERCISE_MATCH_MIN_SCORE 이상이면서
+자모 편집 거리 EXERCISE_MATCH_MAX_TYPOS 이하) "핵스쿼트", "디클라인 벤치프레스", "스티프 레그 데드리프트"처럼
+카탈로그에 없는 변형 운동은 비슷한 표준 운동으로 합치지 않습니다. 여러 운동에 걸치는 별칭("숄더프레스", "플라이")도 두지 않습니다.
+확인: python -m bench.exercise_catalog_check
+카탈로그에 없는 운동은 공백만 정리한 원래 이름을 그대로 씁니다.
+
+기존 기록 정리 (이름 통일 + exercise_progress 재계산):
+    python -m utils.exercise_catalog --migrate [--dry-run]
+"""
+import argparse
+import asyncio
+import csv
+import os
+from collections import deque
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+from utils.name_index import NameIndex
+
+load_dotenv()
+
+EXERCISE_CATALOG_PATH = os.getenv("EXERCISE_CATALOG_PATH", os.path.join(os.path.dirname(__file__), "..", "data", "exercises_ko.csv"))
+EXERCISE_MATCH_MIN_SCORE = float(os.getenv("EXERCISE_MATCH_MIN_SCORE", 0.65))
+EXERCISE_MATCH_MIN_CONTAIN = float(os.getenv("EXERCISE_MATCH_MIN_CONTAIN", 0.8))
+EXERCISE_MATCH_MAX_TYPOS = int(os.getenv("EXERCISE_MATCH_MAX_TYPOS", 1))
+# workout_plans.exercise_name 컬럼 길이
+EXERCISE_NAME_MAX_CHARS = 100
+
+_exercises: List[Dict] = []
+_index = NameIndex(EXERCISE_MATCH_MIN_SCORE, min_contain_ratio=EXERCISE_MATCH_MIN_CONTAIN, max_typos=EXERCISE_MATCH_MAX_TYPOS)
+_stats = {"lookups": 0, "exact": 0, "contains": 0, "fuzzy": 0, "misses": 0}
+_recent_misses: deque = deque(maxlen=20)
+
+
+def _load():
+    if _exercises:
+        return
+    with open(EXERCISE_CATALOG_PATH, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            exercise_id = len(_exercises)
+            _exercises.append({"name": row["name"], "category": row["category"]})
+            for alias in [row["name"], *filter(None, row["aliases"].split("|"))]:
+                _index.add(alias, exercise_id)
+    print(f"[INFO] Exercise catalog loaded: {len(_exercises)} exercises, {len(_index)} names")
+
+
+def lookup_exercise(name: str) -> Dict | None:
+    """운동 이름에 맞는 카탈로그 항목({"name", "category"})을 반환합니다. 찾지 못하면 None."""
+    _load()
+    _stats["lookups"] += 1
+    match = _index.match(name)
+    if match is None:
+        _stats["misses"] += 1
+        _recent_misses.append(name)
+        return None
+    exercise_id, how = match
+    _stats[how] += 1
+    return _exercises[exercise_id]
+
+
+def canonical_exercise_name(name: str) -> str:
+    """저장할 표준 운동 이름. 카탈로그에 없으면 공백을 정리한 원래 이름입니다."""
+    exercise = lookup_exercise(name)
+    if exercise is not None:
+        return exercise["name"]
+    return " ".join((name or "").split())[:EXERCISE_NAME_MAX_CHARS]
+
+
+def exercise_category(name: str) -> str | None:
+    """표준 이름의 부위(가슴/등/하체/...)를 반환합니다. 통계에 남기지 않는 조회입니다."""
+    _load()
+    match = _index.match(name)
+    return _exercises[match[0]]["category"] if match else None
+
+
+def get_exercise_catalog_stats() -> Dict:
+    return {"exercises": len(_exercises), **_stats, "recent_misses": list(_recent_misses)}
+
+
+async def _main(dry_run: bool):
+    from crud import plan as plan_crud
+    from crud import progress as progress_crud
+    from database import database
+
+    await database.connect()
+    try:
+        renames = {}
+        for name in await plan_crud.get_exercise_names():
+            canonical = canonical_exercise_name(name)
+            if canonical != name:
+                renames[name] = canonical
+        for name, canonical in renames.items():
+            print(f"[INFO] {name!r} -> {canonical!r}")
+        if dry_run:
+            print(f"[INFO] Dry run: {len(renames)} names would be renamed")
+            return
+        left = 0
+        for name, canonical in renames.items():
+            left += await plan_crud.rename_exercise(name, canonical)
+        rows = await progress_crud.rebuild_exercise_progress()
+        print(f"[INFO] Renamed {len(renames)} exercise names, rebuilt {rows} progress rows")
+        if left:
+            # 같은 날짜에 표준 이름의 기록이 이미 있으면 (user_id, plan_date, exercise_name) 키가 겹쳐 바꾸지 못합니다.
+            print(f"[WARNING] {left} rows kept their old name because the same day already has the canonical exercise")
+    finally:
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="기존 운동 계획의 운동 이름을 표준 이름으로 통일하고 진행 통계를 다시 계산")
+    parser.add_argument("--migrate", action="store_true", help="이름을 바꾸고 exercise_progress를 다시 계산합니다")
+    parser.add_argument("--dry-run", action="store_true", help="바뀔 이름만 출력합니다")
+    args = parser.parse_args()
+    if not (args.migrate or args.dry_run):
+        parser.error("--migrate 또는 --dry-run을 지정하세요")
+    asyncio.run(_main(args.dry_run))
@@ -0,0 +1,43 @@
+# utils/fast_json.py
+"""
+조회 결과가 큰 엔드포인트(캘린더 범위 조회 등)를 위한 빠른 JSON 응답 경로.
+
+기존 경로는 행마다 Pydantic 모델을 만들고(from_orm / response_model 검증) jsonable_encoder를 거쳐
+표준 json으로 직렬화합니다. 여기서는 `databases` Record를 dict로만 바꿔 orjson으로 한 번에 bytes를 만듭니다.
+DB 스키마가 이미 응답 모델과 같은 컬럼을 돌려주므로 행 단위 검증은 생략합니다.
+
+FAST_JSON_RESPONSES=false 로 두면 각 엔드포인트는 기존 Pydantic 경로를 그대로 사용합니다.
+"""
+import os
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+
+import orjson
+from dotenv import load_dotenv
+from fastapi.responses import Response
+
+load_dotenv()
+
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "true").lower() == "true"
+
+
+def _default(obj: Any):
+    # orjson은 date/datetime은 직접 처리하지만 Decimal(MySQL DECIMAL 컬럼)은 처리하지 않습니다.
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def record_dicts(records: Iterable) -> List[Dict[str, Any]]:
+    """databases Record 목록을 SELECT 컬럼 이름을 키로 하는 dict 목록으로 바꿉니다."""
+    records = list(records)
+    if not records:
+        return []
+    # dict(record._mapping)은 컬럼마다 키 조회를 거쳐 느리므로, 컬럼 이름은 한 번만 읽고 값과 zip 합니다.
+    keys = list(records[0]._mapping.keys())
+    return [dict(zip(keys, record._mapping.values())) for record in records]
+
+
+def orjson_response(content: Any, status_code: int = 200) -> Response:
+    """content를 orjson으로 직렬화한 application/json 응답. (Record 목록은 record_dicts로 먼저 변환)"""
+    return Response(orjson.dumps(content, default=_default), status_code=status_code, media_type="application/json")
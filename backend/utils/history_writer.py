@@ -0,0 +1,160 @@
+# utils/history_writer.py
+"""
+chat_histories 쓰기 지연(write-behind) 버퍼.
+
+stream_generator는 대화 한 턴(질문 + 답변)을 버퍼에 넣기만 하고 바로 끝나며,
+백그라운드 작업 하나가 여러 요청의 행을 모아 multi-row INSERT로 저장합니다.
+
+- flush 조건: 쌓인 행이 HISTORY_FLUSH_ROWS 이상이거나 첫 행이 들어온 뒤 HISTORY_FLUSH_INTERVAL_MS가 지났을 때
+- 순서 보장: flush는 항상 한 작업이 순서대로 수행하고, 한 턴의 행은 같은 INSERT 문에 들어가므로
+  질문이 답변보다 먼저(더 작은 prompt_id로) 저장되며 턴이 반쪽만 저장되는 일이 없습니다.
+- 실패 시: 꺼낸 행을 버퍼 맨 앞으로 되돌리고 backoff 후 다시 시도합니다. (순서 유지)
+- 종료 시: stop_history_writer()가 버퍼를 모두 비운 뒤 반환합니다.
+  프로세스가 비정상 종료되면 아직 flush되지 않은 행(최대 HISTORY_FLUSH_INTERVAL_MS 분량)은 유실될 수 있지만,
+  DB에 남는 기록은 항상 턴 단위이고 순서가 뒤바뀌지 않습니다.
+- 버퍼가 HISTORY_BUFFER_MAX_ROWS를 넘으면 enqueue가 flush를 기다립니다. (DB 장애 시 메모리 무한 증가 방지)
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List
+
+from dotenv import load_dotenv
+
+from crud.chat import save_chat_histories
+from schemas.chat import ChatHistoryCreate
+
+load_dotenv()
+
+HISTORY_WRITE_BEHIND = os.getenv("HISTORY_WRITE_BEHIND", "true").lower() == "true"
+HISTORY_FLUSH_ROWS = int(os.getenv("HISTORY_FLUSH_ROWS", 64))
+HISTORY_FLUSH_INTERVAL_MS = float(os.getenv("HISTORY_FLUSH_INTERVAL_MS", 200))
+HISTORY_BUFFER_MAX_ROWS = int(os.getenv("HISTORY_BUFFER_MAX_ROWS", 5000))
+HISTORY_RETRY_MAX_S = 5.0
+
+# 턴(같은 INSERT 문에 들어가야 하는 행 묶음) 단위로 보관합니다.
+_buffer: Deque[List[ChatHistoryCreate]] = deque()
+_buffered_rows = 0
+_task: asyncio.Task | None = None
+_stopping = False
+_wakeup: asyncio.Event | None = None
+_space: asyncio.Event | None = None
+_stats = {"turns": 0, "rows": 0, "flushes": 0, "max_batch_rows": 0, "failures": 0, "backpressure_waits": 0, "flush_ms": 0.0}
+
+
+async def enqueue_turn(rows: List[ChatHistoryCreate]):
+    """한 턴의 행들을 버퍼에 넣습니다. writer가 실행 중이 아니면 바로 저장합니다."""
+    global _buffered_rows
+    if _task is None:
+        await save_chat_histories(rows)
+        return
+    while _buffered_rows >= HISTORY_BUFFER_MAX_ROWS and _task is not None:
+        _stats["backpressure_waits"] += 1
+        _space.clear()
+        await _space.wait()
+    _buffer.append(rows)
+    _buffered_rows += len(rows)
+    _stats["turns"] += 1
+    _wakeup.set()
+
+
+def _take_batch() -> List[List[ChatHistoryCreate]]:
+    """버퍼 앞에서부터 턴 단위로 HISTORY_FLUSH_ROWS 만큼 꺼냅니다. (턴은 쪼개지 않습니다)"""
+    global _buffered_rows
+    batch, rows = [], 0
+    while _buffer and (not batch or rows + len(_buffer[0]) <= HISTORY_FLUSH_ROWS):
+        turn = _buffer.popleft()
+        batch.append(turn)
+        rows += len(turn)
+    _buffered_rows -= rows
+    return batch
+
+
+async def _flush_batch() -> int:
+    global _buffered_rows
+    batch = _take_batch()
+    rows = [row for turn in batch for row in turn]
+    started = time.perf_counter()
+    try:
+        await save_chat_histories(rows)
+    except Exception:
+        # 실패한 묶음은 원래 순서대로 맨 앞에 되돌립니다. 취소(CancelledError)는 INSERT가 이미 커밋된 뒤일 수 있으므로
+        # 되돌리지 않습니다. (되돌리면 종료 시 마지막 flush가 같은 턴을 한 번 더 저장합니다)
+        _buffer.extendleft(reversed(batch))
+        _buffered_rows += len(rows)
+        raise
+    _stats["flushes"] += 1
+    _stats["rows"] += len(rows)
+    _stats["max_batch_rows"] = max(_stats["max_batch_rows"], len(rows))
+    _stats["flush_ms"] += (time.perf_counter() - started) * 1000
+    if _buffered_rows < HISTORY_BUFFER_MAX_ROWS:
+        _space.set()
+    return len(rows)
+
+
+async def _writer_loop():
+    failures = 0
+    while True:
+        if not _buffer:
+            if _stopping:
+                return
+            _wakeup.clear()
+            await _wakeup.wait()
+            continue
+
+        # 행이 충분히 모이거나 flush 간격이 지날 때까지 기다립니다.
+        deadline = time.monotonic() + HISTORY_FLUSH_INTERVAL_MS / 1000
+        while _buffered_rows < HISTORY_FLUSH_ROWS and not _stopping:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _wakeup.clear()
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            await _flush_batch()
+            failures = 0
+        except Exception as e:
+            failures += 1
+            _stats["failures"] += 1
+            print(f"[ERROR] Chat history flush failed ({_buffered_rows} rows pending): {e}")
+            if _stopping and failures >= 3:
+                # 종료가 무한정 늦어지지 않도록 몇 번 더 시도한 뒤에는 포기합니다.
+                print(f"[ERROR] Dropping {_buffered_rows} unsaved chat history rows on shutdown")
+                return
+            await asyncio.sleep(min(HISTORY_RETRY_MAX_S, 0.2 * 2 ** failures))
+
+
+def start_history_writer():
+    global _task, _stopping, _wakeup, _space
+    if HISTORY_WRITE_BEHIND and _task is None:
+        _stopping = False
+        _wakeup = asyncio.Event()
+        _space = asyncio.Event()
+        _task = asyncio.create_task(_writer_loop())
+
+
+async def stop_history_writer():
+    """버퍼에 남은 행을 모두 저장한 뒤 writer를 멈춥니다."""
+    global _task, _stopping
+    if _task is None:
+        return
+    _stopping = True
+    _wakeup.set()
+    try:
+        await _task
+    finally:
+        _task = None
+        _space.set()
+    print(f"[INFO] Chat history writer stopped: {_stats['rows']} rows in {_stats['flushes']} flushes")
+
+
+def get_history_writer_stats() -> Dict:
+    stats = dict(_stats)
+    stats["pending_rows"] = _buffered_rows
+    stats["rows_per_flush"] = round(stats["rows"] / stats["flushes"], 2) if stats["flushes"] else 0.0
+    return stats
@@ -0,0 +1,351 @@
+# utils/llm_gateway.py
+"""
+모든 Azure OpenAI 호출이 거쳐가는 게이트웨이.
+
+- 용도(lane)별 우선순위: 대화 스트림 > 의도/분류 > 백그라운드(계획 파싱)
+- 전역 동시 실행 수 제한 + lane별 상한
+- 429/5xx/타임아웃 시 지터를 섞은 지수 백오프 재시도 (Retry-After 헤더 우선)
+- 짧은 분류 호출에 대한 선택적 hedged request
+- 호출마다 토큰/지연 시간을 lane 통계와 사용자별 계측(utils/metering.py)에 기록
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import time
+from typing import Any, Dict
+
+import openai
+from openai import AsyncAzureOpenAI
+from dotenv import load_dotenv
+
+from . import metering
+
+load_dotenv()
+
+# --- Common Credentials ---
+OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
+OPENAI_API_KEY = os.getenv("AZURE_OPENAI_KEY")
+
+# --- Chat / Embedding Model Configuration ---
+CHAT_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION")
+CHAT_DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+EMBEDDING_API_VERSION = os.getenv("AZURE_OPENAI_EMBEDDING_API_VERSION")
+EMBEDDING_DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME")
+
+# --- Gateway Configuration ---
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 32))
+# 답변 스트림은 답변이 끝날 때까지 슬롯을 잡고 있으므로, 새 채팅이 스트림 전에 거치는 짧은 호출(intent/memory/embedding)용
+# 슬롯을 남겨 둡니다. 스트림 lane은 전체 슬롯에서 이만큼을 뺀 수까지만 씁니다.
+LLM_SHORT_LANE_RESERVE = int(os.getenv("LLM_SHORT_LANE_RESERVE", max(1, LLM_MAX_CONCURRENCY // 4)))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 3))
+LLM_BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", 0.5))
+LLM_BACKOFF_MAX_S = float(os.getenv("LLM_BACKOFF_MAX_S", 8.0))
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+LLM_HEDGE_DELAY_S = float(os.getenv("LLM_HEDGE_DELAY_MS", 800)) / 1000
+
+# 재시도는 게이트웨이가 담당하므로 SDK 자체 재시도는 끕니다.
+chat_client = AsyncAzureOpenAI(
+    api_key=OPENAI_API_KEY,
+    azure_endpoint=OPENAI_ENDPOINT,
+    api_version=CHAT_API_VERSION,
+    timeout=30.0,
+    max_retries=0,
+)
+
+embedding_client = AsyncAzureOpenAI(
+    api_key=OPENAI_API_KEY,
+    azure_endpoint=OPENAI_ENDPOINT,
+    api_version=EMBEDDING_API_VERSION,
+    timeout=30.0,
+    max_retries=0,
+)
+
+# priority: 숫자가 작을수록 먼저 슬롯을 받습니다.
+# max_concurrency: 해당 lane이 동시에 차지할 수 있는 최대 슬롯 수
+# timeout: 요청 1회당 타임아웃 (초)
+LANES: Dict[str, Dict[str, Any]] = {
+    "stream":     {"priority": 0, "max_concurrency": max(1, LLM_MAX_CONCURRENCY - LLM_SHORT_LANE_RESERVE), "timeout": 60.0, "hedge": False},
+    "intent":     {"priority": 1, "max_concurrency": LLM_MAX_CONCURRENCY, "timeout": 10.0, "hedge": True},
+    "memory":     {"priority": 1, "max_concurrency": LLM_MAX_CONCURRENCY, "timeout": 10.0, "hedge": True},
+    "keyword":    {"priority": 1, "max_concurrency": LLM_MAX_CONCURRENCY // 2 or 1, "timeout": 10.0, "hedge": True},
+    "embedding":  {"priority": 1, "max_concurrency": LLM_MAX_CONCURRENCY, "timeout": 15.0, "hedge": False},
+    "plan_parse": {"priority": 2, "max_concurrency": max(1, LLM_MAX_CONCURRENCY // 4), "timeout": 60.0, "hedge": False},
+    "summary":    {"priority": 2, "max_concurrency": max(1, LLM_MAX_CONCURRENCY // 8), "timeout": 60.0, "hedge": False},
+}
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class PrioritySemaphore:
+    """대기자 중 우선순위가 가장 높은(숫자가 작은) 요청에게 먼저 슬롯을 넘겨주는 세마포어."""
+
+    def __init__(self, capacity: int):
+        self._free = capacity
+        self._waiters: list = []
+        self._seq = itertools.count()
+
+    async def acquire(self, priority: int):
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._seq), fut]
+        heapq.heappush(self._waiters, entry)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # 슬롯을 받은 직후 취소되면 다음 대기자에게 넘깁니다.
+                self.release()
+            else:
+                entry[2] = None
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if fut is not None and not fut.done():
+                fut.set_result(None)
+                return
+        self._free += 1
+
+
+_global_slots = PrioritySemaphore(LLM_MAX_CONCURRENCY)
+_lane_slots = {name: asyncio.Semaphore(cfg["max_concurrency"]) for name, cfg in LANES.items()}
+
+_stats: Dict[str, Dict[str, float]] = {
+    name: {
+        "calls": 0, "retries": 0, "failures": 0, "hedges_fired": 0, "hedge_wins": 0, "queue_wait_s": 0.0, "in_flight": 0,
+        "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0,
+    }
+    for name in LANES
+}
+
+
+def get_gateway_stats() -> Dict[str, Dict[str, float]]:
+    """lane별 호출/재시도/hedge/토큰 통계를 반환합니다."""
+    return {name: dict(values) for name, values in _stats.items()}
+
+
+def get_prompt_cache_report() -> Dict[str, Dict[str, float]]:
+    """lane별 prompt caching 적중률 (cached_tokens / prompt_tokens)을 반환합니다."""
+    report = {}
+    for name, values in _stats.items():
+        if values["prompt_tokens"]:
+            report[name] = {
+                "prompt_tokens": values["prompt_tokens"],
+                "cached_tokens": values["cached_tokens"],
+                "cached_ratio": round(values["cached_tokens"] / values["prompt_tokens"], 4),
+            }
+    return report
+
+
+def _record_usage(lane: str, model: str | None, usage, started: float, error: bool = False) -> None:
+    """응답의 usage(스트림의 경우 마지막 chunk)를 lane 통계와 사용자별 계측에 더합니다."""
+    metering.record(lane, model, usage, time.perf_counter() - started, error)
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    _stats[lane]["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+    _stats[lane]["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+    _stats[lane]["cached_tokens"] += (getattr(details, "cached_tokens", 0) or 0) if details else 0
+
+
+class _Slot:
+    """lane 상한과 전역 우선순위 슬롯을 함께 잡고 놓습니다."""
+
+    def __init__(self, lane: str):
+        self.lane = lane
+        self._held = False
+
+    async def acquire(self):
+        started = time.perf_counter()
+        await _lane_slots[self.lane].acquire()
+        try:
+            await _global_slots.acquire(LANES[self.lane]["priority"])
+        except BaseException:
+            _lane_slots[self.lane].release()
+            raise
+        self._held = True
+        _stats[self.lane]["queue_wait_s"] += time.perf_counter() - started
+        _stats[self.lane]["in_flight"] += 1
+
+    def release(self):
+        if self._held:
+            self._held = False
+            _global_slots.release()
+            _lane_slots[self.lane].release()
+            _stats[self.lane]["in_flight"] -= 1
+
+
+def _retry_after_seconds(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS
+    return False
+
+
+def _backoff_seconds(attempt: int, error: Exception) -> float:
+    retry_after = _retry_after_seconds(error)
+    if retry_after is not None:
+        return min(retry_after, LLM_BACKOFF_MAX_S) + random.uniform(0, LLM_BACKOFF_BASE_S)
+    # full jitter
+    return random.uniform(0, min(LLM_BACKOFF_MAX_S, LLM_BACKOFF_BASE_S * (2 ** attempt)))
+
+
+async def _with_retry(lane: str, call):
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except Exception as e:
+            if attempt >= LLM_MAX_RETRIES or not _is_retryable(e):
+                _stats[lane]["failures"] += 1
+                raise
+            delay = _backoff_seconds(attempt, e)
+            attempt += 1
+            _stats[lane]["retries"] += 1
+            print(f"[WARNING] LLM {lane} 호출 재시도 {attempt}/{LLM_MAX_RETRIES} ({delay:.2f}s 후): {e}")
+            await asyncio.sleep(delay)
+
+
+class _GatedStream:
+    """스트림이 끝나거나 닫힐 때 슬롯을 반납하는 AsyncStream 래퍼."""
+
+    def __init__(self, stream, slot: _Slot, model: str | None, started: float):
+        self._stream = stream
+        self._slot = slot
+        self._model = model
+        self._started = started
+        self._usage = None
+        self._recorded = False
+
+    def _finish(self):
+        # 중간에 닫힌 스트림은 usage chunk를 받지 못하므로 호출 수와 지연 시간만 기록됩니다.
+        if not self._recorded:
+            self._recorded = True
+            _record_usage(self._slot.lane, self._model, self._usage, self._started)
+        self._slot.release()
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                if getattr(chunk, "usage", None) is not None:
+                    self._usage = chunk.usage
+                yield chunk
+        finally:
+            self._finish()
+
+    async def close(self):
+        try:
+            await self._stream.close()
+        finally:
+            self._finish()
+
+
+async def _single_completion(lane: str, kwargs: dict):
+    slot = _Slot(lane)
+    await slot.acquire()
+    started = time.perf_counter()
+    try:
+        response = await _with_retry(lane, lambda: chat_client.chat.completions.create(**kwargs))
+    except Exception:
+        _record_usage(lane, kwargs.get("model"), None, started, error=True)
+        raise
+    finally:
+        slot.release()
+    _record_usage(lane, kwargs.get("model"), getattr(response, "usage", None), started)
+    return response
+
+
+async def _hedged_completion(lane: str, kwargs: dict):
+    """첫 요청이 LLM_HEDGE_DELAY_S 안에 끝나지 않으면 같은 요청을 하나 더 보내고 먼저 끝난 결과를 씁니다."""
+    primary = asyncio.create_task(_single_completion(lane, kwargs))
+    done, _ = await asyncio.wait({primary}, timeout=LLM_HEDGE_DELAY_S)
+    if done:
+        return primary.result()
+
+    _stats[lane]["hedges_fired"] += 1
+    hedge = asyncio.create_task(_single_completion(lane, kwargs))
+    pending = {primary, hedge}
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        _stats[lane]["hedge_wins"] += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def chat_completion(lane: str, hedge: bool | None = None, **kwargs):
+    """
+    lane 설정에 맞춰 chat.completions.create를 호출합니다.
+    stream=True이면 슬롯을 스트림이 끝날 때까지 유지하는 스트림 객체를 반환합니다.
+    """
+    cfg = LANES[lane]
+    kwargs.setdefault("model", CHAT_DEPLOYMENT_NAME)
+    kwargs.setdefault("timeout", cfg["timeout"])
+    _stats[lane]["calls"] += 1
+
+    if kwargs.get("stream"):
+        slot = _Slot(lane)
+        await slot.acquire()
+        started = time.perf_counter()
+        try:
+            stream = await _with_retry(lane, lambda: chat_client.chat.completions.create(**kwargs))
+        except BaseException as e:
+            if isinstance(e, Exception):
+                _record_usage(lane, kwargs.get("model"), None, started, error=True)
+            slot.release()
+            raise
+        return _GatedStream(stream, slot, kwargs.get("model"), started)
+
+    use_hedge = cfg["hedge"] and LLM_HEDGE_ENABLED if hedge is None else hedge
+    if use_hedge:
+        return await _hedged_completion(lane, kwargs)
+    return await _single_completion(lane, kwargs)
+
+
+async def create_embedding(input, **kwargs):
+    """embeddings.create를 embedding lane을 통해 호출합니다. input은 문자열 또는 문자열 리스트입니다."""
+    lane = "embedding"
+    kwargs.setdefault("model", EMBEDDING_DEPLOYMENT_NAME)
+    kwargs.setdefault("timeout", LANES[lane]["timeout"])
+    _stats[lane]["calls"] += 1
+    slot = _Slot(lane)
+    await slot.acquire()
+    started = time.perf_counter()
+    try:
+        response = await _with_retry(lane, lambda: embedding_client.embeddings.create(input=input, **kwargs))
+    except Exception:
+        _record_usage(lane, kwargs.get("model"), None, started, error=True)
+        raise
+    finally:
+        slot.release()
+    _record_usage(lane, kwargs.get("model"), getattr(response, "usage", None), started)
+    return response
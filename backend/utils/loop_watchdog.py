@@ -0,0 +1,157 @@
+# utils/loop_watchdog.py
+"""
+이벤트 루프 블로킹 감지기 (opt-in, LOOP_WATCHDOG_ENABLED=true).
+
+- 루프 안의 heartbeat 코루틴이 LOOP_WATCHDOG_INTERVAL_MS마다 깨어나며 예정보다 늦은 시간(lag)을 잽니다.
+- 별도 감시 스레드는 heartbeat가 LOOP_WATCHDOG_THRESHOLD_MS 이상 멈추면 sys._current_frames()로
+  루프 스레드의 현재 스택을 잡습니다. 루프가 막혀 있는 동안 찍은 스택이므로 블로킹한 코드가 그대로 보입니다.
+- 스택에서 가장 안쪽의 우리 코드(routers/, crud/, utils/ ...) 프레임을 원인 함수로 보고,
+  루프가 다시 돌아 실제 lag가 확정되면 함수별 횟수/누적/최대 시간을 집계해 로그와 /admin/loop_watchdog로 보여줍니다.
+
+CrossEncoder.predict, ImageAnalysisClient.analyze, googleapiclient의 execute(), 큰 base64/JSON 처리처럼
+async 핸들러 안에 숨어 있는 동기 호출을 찾는 용도입니다.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOOP_WATCHDOG_ENABLED = os.getenv("LOOP_WATCHDOG_ENABLED", "false").lower() == "true"
+LOOP_WATCHDOG_INTERVAL_MS = float(os.getenv("LOOP_WATCHDOG_INTERVAL_MS", 20))
+LOOP_WATCHDOG_THRESHOLD_MS = float(os.getenv("LOOP_WATCHDOG_THRESHOLD_MS", 100))
+# 함수별로 보관할 스택 프레임 수
+LOOP_WATCHDOG_STACK_DEPTH = int(os.getenv("LOOP_WATCHDOG_STACK_DEPTH", 12))
+
+_BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+_THIS_FILE = os.path.abspath(__file__)
+
+_task: asyncio.Task | None = None
+_thread: threading.Thread | None = None
+_stop = threading.Event()
+_lock = threading.Lock()
+_loop_thread_id: int | None = None
+_last_beat = 0.0
+# 감시 스레드가 이번 멈춤 동안 잡은 (마지막 heartbeat 시각, 원인 함수, 스택). 루프가 다시 돌면 heartbeat가 가져갑니다.
+_pending: tuple | None = None
+
+_stats = {"samples": 0, "stalls": 0, "unattributed": 0, "max_lag_ms": 0.0, "total_stall_ms": 0.0}
+_offenders: Dict[str, Dict] = {}
+
+
+def _attribute(frame) -> tuple[str, List[str]]:
+    """루프 스레드의 스택에서 (원인 함수 'path:function', 바깥->안쪽 스택 요약)을 만듭니다."""
+    summary = traceback.extract_stack(frame)
+    stack = [f"{entry.filename}:{entry.lineno} in {entry.name}" for entry in summary[-LOOP_WATCHDOG_STACK_DEPTH:]]
+    for entry in reversed(summary):
+        filename = os.path.abspath(entry.filename)
+        if filename.startswith(_BACKEND_ROOT) and filename != _THIS_FILE and os.sep + "site-packages" + os.sep not in filename:
+            return f"{os.path.relpath(filename, _BACKEND_ROOT)}:{entry.name}", stack
+    return "unknown", stack
+
+
+def _watch():
+    global _pending
+    poll_s = LOOP_WATCHDOG_INTERVAL_MS / 2000
+    # heartbeat는 interval만큼 잠들었다 깨므로, 그보다 threshold 이상 늦어질 때만 멈춘 것으로 봅니다.
+    stall_s = (LOOP_WATCHDOG_INTERVAL_MS + LOOP_WATCHDOG_THRESHOLD_MS) / 1000
+    captured_beat = None
+    while not _stop.wait(poll_s):
+        beat = _last_beat
+        if beat == captured_beat or time.monotonic() - beat < stall_s:
+            continue
+        # 한 번 멈춘 동안에는 처음 임계값을 넘은 시점의 스택만 잡습니다.
+        captured_beat = beat
+        frame = sys._current_frames().get(_loop_thread_id)
+        if frame is None:
+            continue
+        site, stack = _attribute(frame)
+        del frame
+        with _lock:
+            _pending = (beat, site, stack)
+
+
+def _record_stall(lag_ms: float, beat: float):
+    global _pending
+    with _lock:
+        pending, _pending = _pending, None
+    if pending is None or pending[0] != beat:
+        _stats["unattributed"] += 1
+        site, stack = "unknown", []
+    else:
+        _, site, stack = pending
+
+    _stats["stalls"] += 1
+    _stats["total_stall_ms"] += lag_ms
+    offender = _offenders.setdefault(site, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "last_stack": []})
+    offender["count"] += 1
+    offender["total_ms"] += lag_ms
+    offender["max_ms"] = max(offender["max_ms"], lag_ms)
+    if stack:
+        offender["last_stack"] = stack
+    print(f"[WARNING] Event loop blocked for {lag_ms:.0f}ms in {site}")
+
+
+async def _heartbeat():
+    global _last_beat
+    loop = asyncio.get_running_loop()
+    interval = LOOP_WATCHDOG_INTERVAL_MS / 1000
+    while True:
+        _last_beat = beat = time.monotonic()
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag_ms = max(0.0, loop.time() - expected) * 1000
+        _stats["samples"] += 1
+        _stats["max_lag_ms"] = max(_stats["max_lag_ms"], lag_ms)
+        if lag_ms >= LOOP_WATCHDOG_THRESHOLD_MS:
+            _record_stall(lag_ms, beat)
+
+
+def start_loop_watchdog():
+    global _task, _thread, _loop_thread_id, _last_beat
+    if not LOOP_WATCHDOG_ENABLED or _task is not None:
+        return
+    _loop_thread_id = threading.get_ident()
+    _last_beat = time.monotonic()
+    _stop.clear()
+    _task = asyncio.create_task(_heartbeat())
+    _thread = threading.Thread(target=_watch, name="loop-watchdog", daemon=True)
+    _thread.start()
+    print(f"[INFO] Event loop watchdog started (threshold {LOOP_WATCHDOG_THRESHOLD_MS:.0f}ms)")
+
+
+async def stop_loop_watchdog():
+    global _task, _thread
+    if _task is None:
+        return
+    _stop.set()
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
+    if _thread is not None:
+        _thread.join(timeout=1)
+        _thread = None
+
+
+def get_loop_watchdog_stats(top: int = 10) -> Dict:
+    """누적 블로킹 시간이 큰 순서로 상위 top개의 원인 함수."""
+    offenders = sorted(_offenders.items(), key=lambda item: item[1]["total_ms"], reverse=True)[:top]
+    return {
+        "enabled": LOOP_WATCHDOG_ENABLED,
+        "threshold_ms": LOOP_WATCHDOG_THRESHOLD_MS,
+        **{k: round(v, 1) if isinstance(v, float) else v for k, v in _stats.items()},
+        "offenders": [
+            {"site": site, "count": o["count"], "total_ms": round(o["total_ms"], 1), "max_ms": round(o["max_ms"], 1),
+             "last_stack": o["last_stack"]}
+            for site, o in offenders
+        ],
+    }
@@ -0,0 +1,133 @@
+# utils/metering.py
+"""
+사용자/단계/모델별 LLM 사용량 계측.
+
+- llm_gateway가 호출 하나가 끝날 때마다 record()로 토큰(prompt/cached/completion)과 지연 시간을 넘깁니다.
+  스트림은 마지막 usage chunk(stream_options.include_usage)를 받거나 스트림이 닫힐 때 기록합니다.
+- 사용자는 요청 처리 시작 시 set_metering_user()로 contextvar에 넣어 두며, asyncio.create_task로 만든
+  후속 작업(계획 파싱 등)도 context를 복사하므로 같은 사용자로 집계됩니다. 사용자가 없으면 '-'로 기록합니다.
+- 집계 단위는 실제 upstream 호출입니다. singleflight로 합쳐진 임베딩/OCR 호출은 호출을 시작한 leader의 사용자로
+  한 번만 기록되고, 결과를 함께 받은 다른 사용자(follower)에게는 기록하지 않습니다. (합쳐진 수는 singleflight 통계 참고)
+- 단계(stage)는 게이트웨이 lane 이름(stream, intent, memory, keyword, plan_parse, summary, embedding)입니다.
+- 메모리에서 (날짜, 사용자, 단계, 모델)별로 합산해 두었다가 METERING_FLUSH_INTERVAL_S마다 llm_usage_daily에 더합니다.
+  flush에 실패하면 합산 값을 되돌려 다음 flush에 다시 시도합니다.
+"""
+import asyncio
+import os
+from contextvars import ContextVar
+from datetime import date
+from typing import Dict, Tuple
+
+from dotenv import load_dotenv
+
+from crud import metering as metering_crud
+
+load_dotenv()
+
+METERING_ENABLED = os.getenv("METERING_ENABLED", "true").lower() == "true"
+METERING_FLUSH_INTERVAL_S = float(os.getenv("METERING_FLUSH_INTERVAL_S", 60))
+
+SYSTEM_USER = "-"
+
+_metering_user: ContextVar[str | None] = ContextVar("metering_user", default=None)
+
+# (usage_date, user_id, stage, model) -> 합산 값
+_pending: Dict[Tuple[date, str, str, str], Dict[str, int]] = {}
+_task: asyncio.Task | None = None
+_flush_lock: asyncio.Lock | None = None
+_stats = {"calls": 0, "flushes": 0, "rows_flushed": 0, "failures": 0}
+
+
+def set_metering_user(user_id: str | None):
+    """현재 요청(과 이후 만드는 task)의 LLM 호출을 user_id로 집계합니다."""
+    _metering_user.set(user_id)
+
+
+def record(stage: str, model: str | None, usage, latency_s: float, error: bool = False):
+    """호출 하나의 사용량을 합산합니다. usage가 없으면(실패, 중단된 스트림) 호출 수와 지연 시간만 더합니다."""
+    if not METERING_ENABLED:
+        return
+    key = (date.today(), _metering_user.get() or SYSTEM_USER, stage, model or "unknown")
+    entry = _pending.get(key)
+    if entry is None:
+        entry = _pending[key] = {column: 0 for column in (*metering_crud.COUNTER_COLUMNS, "latency_ms_max")}
+    latency_ms = int(latency_s * 1000)
+    entry["calls"] += 1
+    entry["errors"] += int(error)
+    entry["latency_ms_total"] += latency_ms
+    entry["latency_ms_max"] = max(entry["latency_ms_max"], latency_ms)
+    if usage is not None:
+        details = getattr(usage, "prompt_tokens_details", None)
+        entry["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+        entry["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+        entry["cached_tokens"] += (getattr(details, "cached_tokens", 0) or 0) if details else 0
+    _stats["calls"] += 1
+
+
+def _restore(rows: list[dict]):
+    """저장하지 못한 행을 다시 합산합니다. (그 사이 새로 쌓인 값과 더해집니다)"""
+    for row in rows:
+        key = (row["usage_date"], row["user_id"], row["stage"], row["model"])
+        entry = _pending.setdefault(key, {column: 0 for column in (*metering_crud.COUNTER_COLUMNS, "latency_ms_max")})
+        for column in metering_crud.COUNTER_COLUMNS:
+            entry[column] += row[column]
+        entry["latency_ms_max"] = max(entry["latency_ms_max"], row["latency_ms_max"])
+
+
+async def flush_metering() -> int:
+    """메모리에 합산된 사용량을 llm_usage_daily에 더하고, 저장한 행 수를 반환합니다."""
+    global _pending, _flush_lock
+    if _flush_lock is None:
+        _flush_lock = asyncio.Lock()
+    async with _flush_lock:
+        if not _pending:
+            return 0
+        pending, _pending = _pending, {}
+        rows = [
+            {"usage_date": usage_date, "user_id": user_id, "stage": stage, "model": model, **values}
+            for (usage_date, user_id, stage, model), values in pending.items()
+        ]
+        try:
+            await metering_crud.add_usage(rows)
+        except BaseException:
+            _stats["failures"] += 1
+            _restore(rows)
+            raise
+        _stats["flushes"] += 1
+        _stats["rows_flushed"] += len(rows)
+        return len(rows)
+
+
+async def _flush_loop():
+    while True:
+        await asyncio.sleep(METERING_FLUSH_INTERVAL_S)
+        try:
+            await flush_metering()
+        except Exception as e:
+            print(f"[ERROR] LLM usage flush failed: {e}")
+
+
+def start_metering():
+    global _task
+    if METERING_ENABLED and _task is None:
+        _task = asyncio.create_task(_flush_loop())
+
+
+async def stop_metering():
+    """flush 작업을 멈추고 남은 사용량을 저장합니다."""
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+    try:
+        await flush_metering()
+    except Exception as e:
+        print(f"[ERROR] Final LLM usage flush failed: {e}")
+
+
+def get_metering_stats() -> dict:
+    return {"enabled": METERING_ENABLED, "pending_rows": len(_pending), **_stats}
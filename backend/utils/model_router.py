@@ -0,0 +1,119 @@
+# utils/model_router.py
+"""
+model="auto" 요청을 로컬 Ollama(llama3.2:1b)와 Azure gpt-4o 중 하나로 보내는 라우터.
+
+의도 분석 결과, 메시지 길이, 이미지 유무, 루틴/식단 요청 여부 같은 값싼 특징만 사용하며,
+라우팅 정책은 환경 변수로 조정합니다. 경로별 지연/토큰/추정 비용을 누적해 정책 튜닝에 씁니다.
+"""
+import os
+import re
+import time
+from typing import Dict, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOCAL_MODEL = "llama3.2:1b"
+REMOTE_MODEL = "gpt-4o"
+
+# --- Routing Policy ---
+ROUTER_LOCAL_ENABLED = os.getenv("ROUTER_LOCAL_ENABLED", "true").lower() == "true"
+# 이 길이(글자) 이하의 인사/맞장구는 로컬 모델로 보냅니다.
+ROUTER_LOCAL_MAX_CHARS = int(os.getenv("ROUTER_LOCAL_MAX_CHARS", 30))
+# 운동/식사 완료 보고에 대한 칭찬 메시지(의도 처리 결과)를 로컬 모델로 보낼지 여부
+ROUTER_LOCAL_FOR_ACKS = os.getenv("ROUTER_LOCAL_FOR_ACKS", "true").lower() == "true"
+
+# --- Cost Accounting (USD / 1K tokens) ---
+GPT4O_INPUT_PRICE = float(os.getenv("GPT4O_INPUT_PRICE_PER_1K", 0.0025))
+GPT4O_OUTPUT_PRICE = float(os.getenv("GPT4O_OUTPUT_PRICE_PER_1K", 0.01))
+# 완료된 답변 기록이 없을 때 취소로 아낀 토큰을 추정하는 기본 답변 길이
+DEFAULT_REPLY_TOKENS = int(os.getenv("ROUTER_DEFAULT_REPLY_TOKENS", 400))
+
+_PLAN_REQUEST = re.compile(r"루틴|식단|계획|프로그램|짜줘|짜 줘|추천|일주일|주간|\d+\s*일치|몇 세트|세트|kg|인바디|분석")
+# 메시지 전체가 인사/맞장구일 때만 small talk로 봅니다. ("네 그럼 하체 루틴은?"처럼 맞장구로 시작하는 질문은 제외)
+_SMALL_TALK = re.compile(
+    r"^(?:(?:안녕|하이|hi|hello|ㅎㅇ|고마워|감사|땡큐|thanks|thank you|ㅇㅋ|오케이|ok|okay|알겠어|알았어|좋아|굿|good|bye|잘자|수고|ㅋㅋ|ㅎㅎ|네|응|그래)"
+    r"(?:요|용|합니다|해요|하세요|했어요|해)?[\s.!~ㅋㅎ^]*)+$",
+    re.IGNORECASE,
+)
+
+_stats: Dict[str, Dict] = {}
+
+
+def _route_stats(model: str) -> Dict:
+    if model not in _stats:
+        _stats[model] = {
+            "requests": 0, "ttft_s": 0.0, "total_s": 0.0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+            "cancelled": 0, "tokens_saved": 0, "cost_saved_usd": 0.0, "reasons": {},
+        }
+    return _stats[model]
+
+
+for _model in (LOCAL_MODEL, REMOTE_MODEL):
+    _route_stats(_model)
+
+
+def route_model(message: str, intent: str | None, has_image: bool, has_override: bool = False) -> Tuple[str, str]:
+    """(모델 이름, 라우팅 이유)를 반환합니다."""
+    text = (message or "").strip()
+    if not ROUTER_LOCAL_ENABLED:
+        return REMOTE_MODEL, "local_disabled"
+    if has_image:
+        return REMOTE_MODEL, "image"
+    if has_override and intent in ("complete_workout", "modify_workout", "complete_meal", "modify_meal"):
+        return (LOCAL_MODEL, "ack_intent") if ROUTER_LOCAL_FOR_ACKS else (REMOTE_MODEL, "ack_intent")
+    if _PLAN_REQUEST.search(text):
+        return REMOTE_MODEL, "plan_request"
+    if len(text) <= ROUTER_LOCAL_MAX_CHARS and _SMALL_TALK.search(text):
+        return LOCAL_MODEL, "small_talk"
+    return REMOTE_MODEL, "default"
+
+
+def record_route(model: str, reason: str, started: float, first_token_at: float | None, prompt_tokens: int, completion_tokens: int):
+    """스트림 한 번의 결과를 경로별로 누적합니다. started/first_token_at은 time.perf_counter() 값입니다."""
+    stats = _route_stats(model)
+    now = time.perf_counter()
+    stats["requests"] += 1
+    stats["ttft_s"] += (first_token_at or now) - started
+    stats["total_s"] += now - started
+    stats["prompt_tokens"] += prompt_tokens
+    stats["completion_tokens"] += completion_tokens
+    if model == REMOTE_MODEL:
+        stats["cost_usd"] += prompt_tokens / 1000 * GPT4O_INPUT_PRICE + completion_tokens / 1000 * GPT4O_OUTPUT_PRICE
+    stats["reasons"][reason] = stats["reasons"].get(reason, 0) + 1
+
+
+def record_cancellation(model: str, generated_tokens: int) -> int:
+    """
+    중간에 취소된 스트림을 기록하고, 생성하지 않아도 된 출력 토큰 수(추정)를 반환합니다.
+    추정치는 같은 경로에서 끝까지 생성된 답변의 평균 길이에서 이미 생성된 토큰을 뺀 값입니다.
+    """
+    stats = _route_stats(model)
+    average = stats["completion_tokens"] / stats["requests"] if stats["requests"] else DEFAULT_REPLY_TOKENS
+    saved = max(0, round(average) - generated_tokens)
+    stats["cancelled"] += 1
+    stats["tokens_saved"] += saved
+    if model == REMOTE_MODEL:
+        stats["cost_saved_usd"] += saved / 1000 * GPT4O_OUTPUT_PRICE
+    return saved
+
+
+def get_routing_stats() -> Dict[str, Dict]:
+    """경로별 요청 수, 평균 TTFT/전체 지연, 토큰, 추정 비용, 취소로 아낀 토큰."""
+    report = {}
+    for model, stats in _stats.items():
+        n = stats["requests"]
+        report[model] = {
+            "requests": n,
+            "avg_ttft_ms": round(stats["ttft_s"] / n * 1000, 1) if n else None,
+            "avg_total_ms": round(stats["total_s"] / n * 1000, 1) if n else None,
+            "prompt_tokens": stats["prompt_tokens"],
+            "completion_tokens": stats["completion_tokens"],
+            "cost_usd": round(stats["cost_usd"], 6),
+            "cancelled": stats["cancelled"],
+            "est_tokens_saved": stats["tokens_saved"],
+            "est_cost_saved_usd": round(stats["cost_saved_usd"], 6),
+            "reasons": dict(stats["reasons"]),
+        }
+    return report
@@ -0,0 +1,117 @@
+# utils/name_index.py
+"""
+LLM이 자유 형식으로 쓴 이름(음식, 운동 등)을 정해진 목록의 항목으로 찾는 퍼지 이름 색인.
+
+매칭 순서 (정규화: 괄호 내용/공백/문장부호 제거, 소문자)
+1. 이름/별칭 정확히 일치
+2. 질의에 포함된 가장 긴 이름/별칭 ("구운 닭가슴살" -> 닭가슴살). 별칭은 2글자 이상이어야 하며,
+   min_contain_ratio를 주면 질의 길이에서 그 비율 이상을 차지할 때만 인정합니다. (비율이 모자라 빠진 이름은
+   "김치볶음밥" 속의 "김치"처럼 다른 음식/운동의 일부이므로 3단계에서도 고르지 않습니다)
+3. 한글을 자모로 풀어 만든 3-gram의 Dice 유사도가 min_score 이상인 가장 비슷한 이름
+   (오타/띄어쓰기 차이: "닭가숨살", "벤치 프래스"). max_typos를 주면 자모 편집 거리가 그 이하인 이름만 인정합니다.
+   ("디클라인"/"인클라인"처럼 한 음절이 다른 변형 운동은 유사도가 높아도 오타가 아니므로)
+"""
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List
+
+_NOISE_RE = re.compile(r"\([^)]*\)|\[[^\]]*\]|[\s\-_/·,.~!?]+")
+
+
+def normalize_name(name: str) -> str:
+    return _NOISE_RE.sub("", (name or "").lower())
+
+
+def _jamo(text: str) -> str:
+    """한글 음절을 초성/중성/종성 자모로 풉니다. (한 글자 오타가 n-gram 하나만 바꾸도록)"""
+    out = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            out.append(chr(0x1100 + code // 588))
+            out.append(chr(0x1161 + (code % 588) // 28))
+            if code % 28:
+                out.append(chr(0x11A7 + code % 28))
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """a, b의 편집 거리. limit을 넘는 것이 확실해지면 limit + 1을 반환합니다."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _grams(name: str) -> set:
+    padded = f"^{_jamo(name)}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    def __init__(self, min_score: float, min_contain_ratio: float = 0.0, max_typos: int | None = None, cache_size: int = 4096):
+        self.min_score = min_score
+        self.min_contain_ratio = min_contain_ratio
+        self.max_typos = max_typos
+        self._names: Dict[str, int] = {}
+        self._gram_index: Dict[str, List[int]] = defaultdict(list)
+        self._gram_sets: List[tuple[int, str, set]] = []
+        self._cached_match = lru_cache(maxsize=cache_size)(self._match)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, name: str, item_id: int) -> bool:
+        """이름/별칭을 추가합니다. 정규화한 이름이 이미 있으면 먼저 추가한 항목을 유지합니다."""
+        key = normalize_name(name)
+        if not key or key in self._names:
+            return False
+        self._names[key] = item_id
+        grams = _grams(key)
+        self._gram_sets.append((item_id, key, grams))
+        for gram in grams:
+            self._gram_index[gram].append(len(self._gram_sets) - 1)
+        self._cached_match.cache_clear()
+        return True
+
+    def match(self, name: str) -> tuple[int, str] | None:
+        """(항목 id, 매칭 방식 'exact'/'contains'/'fuzzy')를 반환합니다. 찾지 못하면 None."""
+        key = normalize_name(name)
+        return self._cached_match(key) if key else None
+
+    def _match(self, key: str) -> tuple[int, str] | None:
+        if key in self._names:
+            return self._names[key], "exact"
+
+        contained = [name for name in self._names
+                     if len(name) >= 2 and name in key and len(name) >= len(key) * self.min_contain_ratio]
+        if contained:
+            return self._names[max(contained, key=len)], "contains"
+
+        grams = _grams(key)
+        overlap: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for entry in self._gram_index.get(gram, ()):
+                overlap[entry] += 1
+        candidates = []
+        for entry, common in overlap.items():
+            item_id, name, entry_grams = self._gram_sets[entry]
+            if name in key:
+                continue
+            score = 2 * common / (len(grams) + len(entry_grams))
+            if score >= self.min_score:
+                candidates.append((score, item_id, name))
+        for score, item_id, name in sorted(candidates, key=lambda c: c[0], reverse=True):
+            if self.max_typos is None or _edit_distance(_jamo(key), _jamo(name), self.max_typos) <= self.max_typos:
+                return item_id, "fuzzy"
+        return None
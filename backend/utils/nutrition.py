@@ -0,0 +1,129 @@
+# utils/nutrition.py
+"""
+로컬 음식 영양 DB와 음식 이름 퍼지 검색.
+
+식단 계획의 칼로리/단백질/탄수화물/지방을 LLM이 추정하지 않고, 번들된 음식 표(data/nutrition_ko.csv,
+100g 기준 값)와 양(portion)으로 계산합니다. 같은 음식과 양이면 항상 같은 값이 저장됩니다.
+
+음식 이름은 utils/name_index의 NameIndex로 찾습니다. (정확히 일치 -> 질의 길이의 NUTRITION_MATCH_MIN_CONTAIN 이상을
+차지하는 포함된 이름 -> 자모 3-gram 유사도가 NUTRITION_MATCH_MIN_SCORE 이상인 음식)
+"김치볶음밥", "연어 샐러드"처럼 표에 없는 요리는 재료 하나(김치, 샐러드)의 값으로 계산하지 않고 찾지 못한 것으로 둡니다.
+(AI가 준 수치가 있으면 그 값을 씁니다)
+
+양 표기: "150g", "0.2kg", "200ml", "1개", "1/2개", "반 공기", "두 조각", "2조각", "1큰술" 등. 개/공기/조각처럼 세는 단위는
+음식마다 정한 1단위 무게(unit_g)를 쓰고, 양이 없으면 1단위로 봅니다. 양이 이름 끝에 붙어 있으면("현미밥 한 공기") 떼어서 씁니다.
+"""
+import csv
+import os
+import re
+from collections import deque
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+from utils.name_index import NameIndex
+
+load_dotenv()
+
+NUTRITION_DB_PATH = os.getenv("NUTRITION_DB_PATH", os.path.join(os.path.dirname(__file__), "..", "data", "nutrition_ko.csv"))
+NUTRITION_MATCH_MIN_SCORE = float(os.getenv("NUTRITION_MATCH_MIN_SCORE", 0.65))
+NUTRITION_MATCH_MIN_CONTAIN = float(os.getenv("NUTRITION_MATCH_MIN_CONTAIN", 0.65))
+
+# 음식과 상관없이 무게가 정해진 단위 (g)
+_FIXED_UNITS_G = {"g": 1.0, "그램": 1.0, "kg": 1000.0, "ml": 1.0, "l": 1000.0, "큰술": 15.0, "스푼": 15.0, "작은술": 5.0, "티스푼": 5.0}
+_KOREAN_AMOUNTS = {"반": 0.5, "한": 1.0, "두": 2.0, "세": 3.0, "네": 4.0}
+_AMOUNT = r"(반|한|두|세|네|\d+(?:\.\d+)?(?:\s*/\s*\d+)?)"
+_UNIT = r"(kg|g|그램|ml|l|큰술|스푼|작은술|티스푼|[가-힣]+)"
+_PORTION_RE = re.compile(_AMOUNT + r"\s*" + _UNIT + "?", re.IGNORECASE)
+# 이름 끝에 붙은 양 ("닭가슴살 100g", "고구마 1/2개"). 띄어 쓴 경우만 떼어 "한라봉"처럼 이름의 일부인 글자는 건드리지 않습니다.
+_TRAILING_PORTION_RE = re.compile(r"\s+(" + _AMOUNT + r"\s*" + _UNIT + r"?)$", re.IGNORECASE)
+
+_foods: List[Dict] = []
+_index = NameIndex(NUTRITION_MATCH_MIN_SCORE, min_contain_ratio=NUTRITION_MATCH_MIN_CONTAIN)
+_stats = {"lookups": 0, "exact": 0, "contains": 0, "fuzzy": 0, "misses": 0}
+_recent_misses: deque = deque(maxlen=20)
+
+
+def _load():
+    if _foods:
+        return
+    with open(NUTRITION_DB_PATH, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            food_id = len(_foods)
+            _foods.append({
+                "name": row["name"], "unit": row["unit"], "unit_g": float(row["unit_g"]),
+                "kcal": float(row["kcal"]), "protein_g": float(row["protein_g"]),
+                "carbs_g": float(row["carbs_g"]), "fat_g": float(row["fat_g"]),
+            })
+            for alias in [row["name"], *filter(None, row["aliases"].split("|"))]:
+                _index.add(alias, food_id)
+    print(f"[INFO] Nutrition DB loaded: {len(_foods)} foods, {len(_index)} names")
+
+
+def lookup_food(name: str) -> Dict | None:
+    """음식 이름에 가장 잘 맞는 음식 표의 행(100g 기준 값)을 반환합니다. 찾지 못하면 None."""
+    _load()
+    _stats["lookups"] += 1
+    match = _index.match(name)
+    if match is None:
+        _stats["misses"] += 1
+        _recent_misses.append(name)
+        return None
+    food_id, how = match
+    _stats[how] += 1
+    return _foods[food_id]
+
+
+def _amount(number: str) -> float | None:
+    if number in _KOREAN_AMOUNTS:
+        return _KOREAN_AMOUNTS[number]
+    if "/" in number:
+        numerator, denominator = (float(part) for part in number.split("/"))
+        return numerator / denominator if denominator else None
+    return float(number)
+
+
+def portion_grams(food: Dict, portion: str | float | None) -> float | None:
+    """양 표기를 g으로 바꿉니다. 숫자만 있으면 g, 세는 단위나 빈 값이면 음식의 1단위 무게를 씁니다.
+    "1/0개"처럼 계산할 수 없는 양이면 None."""
+    if portion is None or portion == "":
+        return food["unit_g"]
+    if isinstance(portion, (int, float)):
+        return float(portion)
+    match = _PORTION_RE.search(str(portion).lower())
+    if not match:
+        return food["unit_g"]
+    number, unit = match.groups()
+    amount = _amount(number)
+    if amount is None:
+        return None
+    if unit in _FIXED_UNITS_G:
+        return amount * _FIXED_UNITS_G[unit]
+    if unit is None and number.isdigit() and amount >= 10:
+        # "150"처럼 단위 없는 큰 숫자는 g으로 봅니다.
+        return amount
+    return amount * food["unit_g"]
+
+
+def estimate_nutrition(food_name: str, portion: str | float | None = None) -> Dict | None:
+    """DietPlanCreate의 calories, protein_g, carbs_g, fat_g 값을 계산합니다. 음식이나 양을 알 수 없으면 None."""
+    trailing = _TRAILING_PORTION_RE.search(food_name or "")
+    if trailing and not portion:
+        food_name, portion = food_name[:trailing.start()], trailing.group(1)
+    food = lookup_food(food_name)
+    if food is None:
+        return None
+    grams = portion_grams(food, portion)
+    if grams is None:
+        return None
+    ratio = grams / 100
+    return {
+        "calories": int(round(food["kcal"] * ratio)),
+        "protein_g": round(food["protein_g"] * ratio, 1),
+        "carbs_g": round(food["carbs_g"] * ratio, 1),
+        "fat_g": round(food["fat_g"] * ratio, 1),
+    }
+
+
+def get_nutrition_stats() -> Dict:
+    return {"foods": len(_foods), **_stats, "recent_misses": list(_recent_misses)}
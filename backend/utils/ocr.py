@@ -1,3 +1,4 @@
+import asyncio
 import os
 import tempfile
 from azure.ai.vision.imageanalysis import ImageAnalysisClient
@@ -5,6 +6,7 @@ from azure.ai.vision.imageanalysis.models import VisualFeatures
 from azure.core.credentials import AzureKeyCredential
 from fastapi import UploadFile
 from dotenv import load_dotenv
+from .singleflight import singleflight
 
 load_dotenv()
 
@@ -17,7 +19,15 @@ client = ImageAnalysisClient(
     credential=AzureKeyCredential(VISION_KEY)
 )
 
-# 🔧 비동기 함수로 변경
+def _analyze_file(path: str):
+    with open(path, "rb") as f:
+        return client.analyze(
+            image_data=f,
+            visual_features=[VisualFeatures.READ]
+        )
+
+# 🔧 비동기 함수로 변경 (같은 이미지가 동시에 들어오면 OCR 호출 하나를 공유합니다)
+@singleflight("ocr")
 async def extract_text_from_bytes(image_bytes: bytes) -> str:
     # 전달받은 바이트를 임시파일에 저장
     with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
@@ -25,12 +35,8 @@ async def extract_text_from_bytes(image_bytes: bytes) -> str:
         tmp_path = tmp.name
 
     try:
-        # Azure OCR 분석
-        with open(tmp_path, "rb") as f:
-            result = client.analyze(
-                image_data=f,
-                visual_features=[VisualFeatures.READ]
-            )
+        # Azure OCR 분석 (동기 SDK 호출이므로 스레드에서 실행해 이벤트 루프를 막지 않습니다)
+        result = await asyncio.to_thread(_analyze_file, tmp_path)
 
         if result.read is None or not result.read.blocks:
             return ""
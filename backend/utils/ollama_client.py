@@ -1,5 +1,87 @@
+import asyncio
+import os
+import time
+import httpx
 import ollama
 from typing import AsyncGenerator, List, Dict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Ollama Configuration ---
+OLLAMA_HOST = os.getenv("OLLAMA_HOST")  # None이면 ollama 기본값 (http://localhost:11434)
+OLLAMA_MODEL = "llama3.2:1b"
+# 모델을 메모리에 유지할 시간. 요청 사이에 모델이 내려가면 다음 사용자가 로딩 시간을 부담합니다.
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# CPU 추론은 동시 요청이 코어를 나눠 쓰므로 코어 수에 맞춰 제한합니다.
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", max(1, (os.cpu_count() or 2) // 2)))
+OLLAMA_WARMUP = os.getenv("OLLAMA_WARMUP", "true").lower() == "true"
+
+_client: ollama.AsyncClient | None = None
+_semaphore = asyncio.Semaphore(OLLAMA_MAX_CONCURRENCY)
+_stats = {"requests": 0, "load_ms": 0.0, "prompt_eval_ms": 0.0, "eval_ms": 0.0, "eval_tokens": 0, "queue_wait_ms": 0.0, "cold_loads": 0}
+
+
+def get_ollama_client() -> ollama.AsyncClient:
+    """프로세스 전체에서 재사용하는 Ollama 클라이언트 (HTTP keep-alive 연결 풀 공유)."""
+    global _client
+    if _client is None:
+        _client = ollama.AsyncClient(
+            host=OLLAMA_HOST,
+            timeout=httpx.Timeout(120.0, connect=5.0),
+            limits=httpx.Limits(max_connections=OLLAMA_MAX_CONCURRENCY * 2, max_keepalive_connections=OLLAMA_MAX_CONCURRENCY * 2),
+        )
+    return _client
+
+
+def _record_timings(final_chunk) -> Dict[str, float]:
+    """마지막 chunk(done=True)에 담긴 나노초 단위 시간 정보를 정리합니다."""
+    timings = {
+        "load_ms": (final_chunk.get("load_duration") or 0) / 1e6,
+        "prompt_eval_ms": (final_chunk.get("prompt_eval_duration") or 0) / 1e6,
+        "eval_ms": (final_chunk.get("eval_duration") or 0) / 1e6,
+        "eval_tokens": final_chunk.get("eval_count") or 0,
+    }
+    for key, value in timings.items():
+        _stats[key] += value
+    # 수백 ms 이상의 load_duration은 모델이 메모리에 없어 다시 올린 경우입니다.
+    if timings["load_ms"] > 500:
+        _stats["cold_loads"] += 1
+    return timings
+
+
+async def warmup_ollama():
+    """서버 시작 시 모델을 미리 메모리에 올려둡니다. (빈 프롬프트 generate는 모델 로드만 수행)"""
+    if not OLLAMA_WARMUP:
+        return
+    started = time.perf_counter()
+    try:
+        response = await get_ollama_client().generate(model=OLLAMA_MODEL, prompt="", keep_alive=OLLAMA_KEEP_ALIVE)
+        load_ms = (response.get("load_duration") or 0) / 1e6
+        print(f"[INFO] Ollama warm-up done: load {load_ms:.0f}ms, total {(time.perf_counter() - started) * 1000:.0f}ms")
+    except Exception as e:
+        print(f"[WARNING] Ollama warm-up failed: {e}")
+
+
+async def close_ollama():
+    """keep-alive 연결 풀을 닫습니다.
+    ollama.AsyncClient에는 공개 close가 없어 내부 httpx 클라이언트를 닫으며, 내부 구조가 바뀐 버전에서는
+    닫지 않고 넘어갑니다. (종료 직전이므로 프로세스가 끝날 때 연결이 정리됩니다)"""
+    global _client
+    if _client is not None:
+        http_client = getattr(_client, "_client", None)
+        aclose = getattr(http_client, "aclose", None)
+        if aclose is not None:
+            await aclose()
+        _client = None
+
+
+def get_ollama_stats() -> Dict[str, float]:
+    """모델 로딩 시간과 생성 시간을 분리한 누적 통계."""
+    stats = dict(_stats)
+    stats["tokens_per_s"] = round(stats["eval_tokens"] / (stats["eval_ms"] / 1000), 2) if stats["eval_ms"] else 0.0
+    return stats
+
 
 async def ask_ollama_stream(
     user_message: str,
@@ -9,13 +91,24 @@ async def ask_ollama_stream(
     Ollama를 통해 Llama 3.2 모델에 요청하고 응답을 스트리밍합니다.
     """
     messages = recent_history + [{"role": "user", "content": user_message}]
-    
-    stream = await ollama.AsyncClient().chat(
-        model='llama3.2:1b',
-        messages=messages,
-        stream=True
-    )
-    
-    async for chunk in stream:
-        if 'message' in chunk and 'content' in chunk['message']:
-            yield chunk['message']['content']
+
+    queued = time.perf_counter()
+    async with _semaphore:
+        queue_wait_ms = (time.perf_counter() - queued) * 1000
+        _stats["requests"] += 1
+        _stats["queue_wait_ms"] += queue_wait_ms
+
+        stream = await get_ollama_client().chat(
+            model=OLLAMA_MODEL,
+            messages=messages,
+            stream=True,
+            keep_alive=OLLAMA_KEEP_ALIVE
+        )
+
+        async for chunk in stream:
+            if chunk.get("done"):
+                timings = _record_timings(chunk)
+                print(f"[INFO] Ollama timings: queue {queue_wait_ms:.0f}ms, load {timings['load_ms']:.0f}ms, "
+                      f"prompt {timings['prompt_eval_ms']:.0f}ms, generation {timings['eval_ms']:.0f}ms ({timings['eval_tokens']} tokens)")
+            if 'message' in chunk and chunk['message'].get('content'):
+                yield chunk['message']['content']
@@ -0,0 +1,172 @@
+# utils/reranker.py
+"""
+ko-reranker(Cross-Encoder) 추론 백엔드.
+
+- RERANKER_BACKEND=torch: sentence_transformers.CrossEncoder (PyTorch, float32)
+- RERANKER_BACKEND=onnx : export_onnx_reranker()로 만든 ONNX 그래프를 onnxruntime으로 실행합니다.
+  동적 int8 양자화 모델(model_int8.onnx)을 기본으로 쓰며, 입력을 토큰 길이순으로 정렬해
+  비슷한 길이끼리 묶어(length bucketing) 패딩 낭비를 줄입니다.
+
+두 백엔드 모두 predict(pairs) -> np.ndarray (0~1 점수)를 제공하므로 호출부는 백엔드를 알 필요가 없습니다.
+predict_cached()는 같은 주제의 후속 질문에서 반복되는 (질문, 후보) 쌍의 점수를 재사용합니다.
+
+ONNX 모델 만들기 (backend 폴더에서, torch/transformers/onnxruntime 필요):
+    python -m utils.reranker --export models/ko-reranker-onnx
+"""
+import argparse
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "Dongjin-kr/ko-reranker")
+RERANKER_BACKEND = os.getenv("RERANKER_BACKEND", "torch")
+RERANKER_ONNX_DIR = os.getenv("RERANKER_ONNX_DIR", os.path.join(os.path.dirname(__file__), "..", "models", "ko-reranker-onnx"))
+RERANKER_ONNX_FILE = os.getenv("RERANKER_ONNX_FILE", "model_int8.onnx")
+RERANKER_MAX_LENGTH = int(os.getenv("RERANKER_MAX_LENGTH", 512))
+RERANKER_BATCH_SIZE = int(os.getenv("RERANKER_BATCH_SIZE", 16))
+# onnxruntime intra-op 스레드 수 (0이면 onnxruntime 기본값)
+RERANKER_THREADS = int(os.getenv("RERANKER_THREADS", 0))
+# (정규화한 질문 해시, 후보 prompt_id) -> 점수 캐시 크기. 0이면 캐시를 쓰지 않습니다.
+RERANK_CACHE_MAX_ENTRIES = int(os.getenv("RERANK_CACHE_MAX_ENTRIES", 20000))
+
+_score_cache: "OrderedDict[Tuple[str, int], float]" = OrderedDict()
+_cache_stats = {"hits": 0, "misses": 0, "predict_calls": 0, "evictions": 0}
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class OnnxReranker:
+    """onnxruntime으로 Cross-Encoder 점수를 계산합니다. (CrossEncoder.predict와 같은 sigmoid 점수)"""
+
+    def __init__(self, model_dir: str = RERANKER_ONNX_DIR, file_name: str = RERANKER_ONNX_FILE,
+                 max_length: int = RERANKER_MAX_LENGTH, batch_size: int = RERANKER_BATCH_SIZE, threads: int = RERANKER_THREADS):
+        try:
+            import onnxruntime as ort
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise RuntimeError("RERANKER_BACKEND=onnx 에는 onnxruntime과 transformers 패키지가 필요합니다.") from e
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(os.path.join(model_dir, file_name), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_length = max_length
+        self.batch_size = batch_size
+
+    def predict(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        if not pairs:
+            return np.empty(0, dtype=np.float32)
+        encoded = self.tokenizer(
+            [q for q, _ in pairs], [c for _, c in pairs], truncation=True, max_length=self.max_length
+        )
+        # 길이순으로 정렬해 비슷한 길이끼리 한 배치로 묶고, 배치마다 그 안의 최대 길이까지만 패딩합니다.
+        order = np.argsort([len(ids) for ids in encoded["input_ids"]], kind="stable")
+        scores = np.empty(len(pairs), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            features = self.tokenizer.pad(
+                {key: [encoded[key][i] for i in batch] for key in encoded.keys() if key in self.input_names},
+                return_tensors="np",
+            )
+            inputs = {name: features[name].astype(np.int64) for name in self.input_names if name in features}
+            logits = self.session.run(None, inputs)[0]
+            scores[batch] = _sigmoid(logits[:, 0])
+        return scores
+
+
+def _query_key(query: str) -> str:
+    normalized = re.sub(r"\s+", " ", query.strip().lower())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def predict_cached(model, query: str, candidates: List[Tuple[int, str]]) -> List[float]:
+    """
+    (prompt_id, 후보 문장) 목록의 점수를 반환합니다. 같은 질문(공백/대소문자 정규화)과 같은 prompt_id 쌍은
+    이전 점수를 재사용하고, 캐시에 없는 쌍만 모아 한 번의 predict로 계산합니다.
+    """
+    query_key = _query_key(query)
+    scores: List[float | None] = []
+    missing: List[int] = []
+    for i, (prompt_id, _) in enumerate(candidates):
+        key = (query_key, prompt_id)
+        if key in _score_cache:
+            _score_cache.move_to_end(key)
+            scores.append(_score_cache[key])
+            _cache_stats["hits"] += 1
+        else:
+            scores.append(None)
+            missing.append(i)
+            _cache_stats["misses"] += 1
+
+    if missing:
+        _cache_stats["predict_calls"] += 1
+        predicted = model.predict([(query, candidates[i][1]) for i in missing])
+        for i, score in zip(missing, predicted):
+            scores[i] = float(score)
+            if RERANK_CACHE_MAX_ENTRIES > 0:
+                _score_cache[(query_key, candidates[i][0])] = float(score)
+        while len(_score_cache) > RERANK_CACHE_MAX_ENTRIES:
+            _score_cache.popitem(last=False)
+            _cache_stats["evictions"] += 1
+    return scores
+
+
+def get_rerank_cache_stats() -> Dict:
+    lookups = _cache_stats["hits"] + _cache_stats["misses"]
+    return {**_cache_stats, "entries": len(_score_cache), "hit_rate": round(_cache_stats["hits"] / lookups, 4) if lookups else 0.0}
+
+
+def load_reranker():
+    """설정된 백엔드의 reranker를 만듭니다. predict(pairs)를 제공하는 객체를 반환합니다."""
+    if RERANKER_BACKEND == "onnx":
+        print(f"[INFO] Loading ONNX reranker from {RERANKER_ONNX_DIR}/{RERANKER_ONNX_FILE} (max_length {RERANKER_MAX_LENGTH})")
+        return OnnxReranker()
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(RERANKER_MODEL, max_length=RERANKER_MAX_LENGTH)
+
+
+def export_onnx_reranker(output_dir: str, model_name: str = RERANKER_MODEL, opset: int = 17):
+    """PyTorch 모델을 ONNX(float32)로 내보내고, 동적 int8 양자화 모델과 토크나이저를 함께 저장합니다."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    sample = tokenizer(["스쿼트 자세"], ["무릎이 발끝을 넘지 않게 하세요"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    fp32_path = os.path.join(output_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes={**{name: {0: "batch", 1: "sequence"} for name in input_names}, "logits": {0: "batch"}},
+            opset_version=opset,
+        )
+    quantize_dynamic(fp32_path, os.path.join(output_dir, "model_int8.onnx"), weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(output_dir)
+    print(f"[INFO] Exported reranker to {output_dir} (model.onnx, model_int8.onnx)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ko-reranker ONNX 내보내기")
+    parser.add_argument("--export", required=True, metavar="DIR", help="ONNX 모델과 토크나이저를 저장할 폴더")
+    parser.add_argument("--model", default=RERANKER_MODEL)
+    args = parser.parse_args()
+    export_onnx_reranker(args.export, args.model)
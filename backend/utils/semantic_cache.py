@@ -0,0 +1,117 @@
+# utils/semantic_cache.py
+"""
+일반적인 피트니스 질문("스쿼트 자세 알려줘" 등)에 대한 gpt-4o 답변을 재사용하는 의미 기반 캐시.
+
+- 키: 질문 임베딩의 코사인 유사도 (SEMANTIC_CACHE_THRESHOLD 이상이면 적중)
+- 같은 답변이 적절한 사용자끼리만 공유하도록 (운동 수준, 성별, 부상 여부) 버킷으로 나눕니다.
+- TTL이 지난 항목은 버리고, 전체 항목 수가 SEMANTIC_CACHE_MAX_ENTRIES를 넘으면 가장 오래 쓰이지 않은 항목부터 지웁니다.
+- 적중한 답변은 replay_stream()으로 OpenAI 스트림과 같은 형태로 재생되므로
+  stream_generator의 대화 기록 저장과 계획 파싱이 그대로 동작합니다.
+"""
+import os
+import re
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import AsyncGenerator, Dict, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.93))
+SEMANTIC_CACHE_TTL_S = float(os.getenv("SEMANTIC_CACHE_TTL_S", 24 * 3600))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 2000))
+# 재생 시 한 번에 내보낼 글자 수
+REPLAY_CHUNK_CHARS = 24
+# 앞선 대화를 가리키는 질문은 대화마다 답이 달라지므로 캐시하지 않습니다.
+_REFERENTIAL = re.compile(r"그거|그건|그걸|그럼|그러면|이거|이건|저거|아까|방금|위에|말한|말했")
+_MIN_QUESTION_CHARS = 4
+
+# entry_id -> {"bucket", "vector", "question", "response", "created", "hits"} (LRU 순서 유지)
+_entries: "OrderedDict[int, Dict]" = OrderedDict()
+_next_id = 0
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+
+
+def _bucket(user_profile: dict) -> Tuple:
+    has_injury = bool(user_profile.get("injury_part") and user_profile.get("injury_level"))
+    return (user_profile.get("level"), user_profile.get("gender"), has_injury)
+
+
+def _normalize(embedding) -> np.ndarray:
+    vec = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def is_cacheable(model: str, user_message: str, image_bytes: bytes | None, ai_prompt_override: str | None, uses_memory: bool) -> bool:
+    """프로필 외의 맥락(이전 대화, 이미지, 의도 처리 결과, 장기 기억)에 의존하지 않는 요청만 캐시합니다."""
+    return (
+        SEMANTIC_CACHE_ENABLED
+        and model == "gpt-4o"
+        and len(user_message.strip()) >= _MIN_QUESTION_CHARS
+        and not _REFERENTIAL.search(user_message)
+        and not image_bytes
+        and not ai_prompt_override
+        and not uses_memory
+    )
+
+
+def lookup(user_profile: dict, embedding) -> str | None:
+    """가장 유사한 캐시 답변을 반환합니다. 임계값 미만이면 None."""
+    bucket = _bucket(user_profile)
+    now = time.time()
+    query = _normalize(embedding)
+    best_id, best_score = None, -1.0
+    for entry_id, entry in list(_entries.items()):
+        if now - entry["created"] > SEMANTIC_CACHE_TTL_S:
+            del _entries[entry_id]
+            _stats["expired"] += 1
+            continue
+        if entry["bucket"] != bucket:
+            continue
+        score = float(np.dot(query, entry["vector"]))
+        if score > best_score:
+            best_id, best_score = entry_id, score
+
+    if best_id is None or best_score < SEMANTIC_CACHE_THRESHOLD:
+        _stats["misses"] += 1
+        return None
+    _entries.move_to_end(best_id)
+    _entries[best_id]["hits"] += 1
+    _stats["hits"] += 1
+    print(f"[INFO] Semantic cache hit (similarity {best_score:.4f}): '{_entries[best_id]['question']}'")
+    return _entries[best_id]["response"]
+
+
+def store(user_profile: dict, question: str, embedding, response: str) -> None:
+    global _next_id
+    if not response:
+        return
+    _entries[_next_id] = {
+        "bucket": _bucket(user_profile),
+        "vector": _normalize(embedding),
+        "question": question,
+        "response": response,
+        "created": time.time(),
+        "hits": 0,
+    }
+    _next_id += 1
+    _stats["stores"] += 1
+    while len(_entries) > SEMANTIC_CACHE_MAX_ENTRIES:
+        _entries.popitem(last=False)
+        _stats["evictions"] += 1
+
+
+async def replay_stream(response: str) -> AsyncGenerator[SimpleNamespace, None]:
+    """캐시된 답변을 OpenAI 스트림 chunk와 같은 모양(choices[0].delta.content)으로 내보냅니다."""
+    for i in range(0, len(response), REPLAY_CHUNK_CHARS):
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=response[i:i + REPLAY_CHUNK_CHARS]))], usage=None)
+
+
+def get_cache_stats() -> Dict:
+    lookups = _stats["hits"] + _stats["misses"]
+    return {**_stats, "entries": len(_entries), "hit_rate": round(_stats["hits"] / lookups, 4) if lookups else 0.0}
@@ -0,0 +1,94 @@
+# utils/singleflight.py
+"""
+같은 인자로 동시에 들어온 외부 호출을 하나로 합치는 single-flight 데코레이터.
+
+    @singleflight("embedding")
+    async def get_embedding(text: str) -> list[float]: ...
+
+- 키: 함수 시그니처에 묶은 인자(get_embedding(text)와 get_embedding(text=text)는 같은 키)를 정규화한 값
+  (문자열은 앞뒤/연속 공백 정리, bytes는 SHA-1)의 해시
+- 첫 호출(leader)이 실제 호출을 별도 task로 시작하고, 끝나기 전에 들어온 같은 키의 호출(follower)은 그 결과를 함께 기다립니다.
+  task는 호출자들과 분리되어 있어 leader의 요청이 취소되어도 follower는 결과를 받습니다.
+- 결과 객체는 호출자끼리 공유되므로 호출부에서 수정하지 않아야 합니다.
+- 호출이 끝나면 키를 지우므로 결과를 캐시하지는 않습니다. (동시에 진행 중인 호출만 합칩니다)
+- LLM 사용량 계측(utils/metering)은 실제 upstream 호출 단위입니다. task는 leader의 context를 복사하므로
+  합쳐진 호출의 토큰은 leader의 사용자로만 집계되고, follower는 사용량 없이 이 모듈의 coalesced 통계에만 남습니다.
+"""
+import asyncio
+import functools
+import hashlib
+import inspect
+import re
+from typing import Any, Callable, Dict
+
+
+_in_flight: Dict[str, Dict[str, asyncio.Task]] = {}
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value.strip())
+    if isinstance(value, (bytes, bytearray)):
+        return "sha1:" + hashlib.sha1(value).hexdigest()
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in sorted(value.items())}
+    return value
+
+
+def _make_key(signature: inspect.Signature, args: tuple, kwargs: dict) -> str:
+    # 위치/키워드 중 어느 쪽으로 넘겨도, 기본값을 생략해도 같은 키가 되도록 매개변수 이름에 묶습니다.
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return hashlib.sha1(repr(_normalize(dict(bound.arguments))).encode("utf-8")).hexdigest()
+
+
+def _consume_result(task: asyncio.Task):
+    # 모든 호출자가 취소되어 아무도 기다리지 않은 경우에도 예외 로그가 남지 않도록 결과를 확인합니다.
+    if not task.cancelled():
+        task.exception()
+
+
+def singleflight(name: str, key_fn: Callable[..., str] | None = None):
+    """async 함수를 single-flight로 감쌉니다. name은 호출 지점별 통계 이름입니다."""
+    in_flight = _in_flight.setdefault(name, {})
+    stats = _stats.setdefault(name, {"calls": 0, "leaders": 0, "coalesced": 0, "errors": 0})
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = key_fn(*args, **kwargs) if key_fn else _make_key(signature, args, kwargs)
+            stats["calls"] += 1
+            task = in_flight.get(key)
+            if task is None:
+                stats["leaders"] += 1
+                task = asyncio.create_task(func(*args, **kwargs))
+                in_flight[key] = task
+
+                def _done(t: asyncio.Task, key=key):
+                    if in_flight.get(key) is t:
+                        del in_flight[key]
+                    if not t.cancelled() and t.exception() is not None:
+                        stats["errors"] += 1
+                    _consume_result(t)
+
+                task.add_done_callback(_done)
+            else:
+                stats["coalesced"] += 1
+            return await asyncio.shield(task)
+
+        return wrapper
+
+    return decorator
+
+
+def get_singleflight_stats() -> Dict[str, Dict[str, int]]:
+    """호출 지점별 호출 수, 실제 upstream 호출 수(leaders), 합쳐진 호출 수, 현재 진행 중인 키 수."""
+    return {
+        name: {**stats, "in_flight": len(_in_flight.get(name, {}))}
+        for name, stats in _stats.items()
+    }
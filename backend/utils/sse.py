@@ -0,0 +1,151 @@
+# utils/sse.py
+"""
+채팅 스트림의 전송 형식을 담당합니다.
+
+- 토큰 묶기(coalescing): provider delta를 하나씩 쓰지 않고 SSE_FLUSH_BYTES 이상 쌓이거나
+  SSE_FLUSH_MS가 지나면 한 번에 내보내 소켓 쓰기 횟수를 줄입니다.
+- "sse" 형식: `event: token|done|aborted|error` 타입이 있는 SSE 이벤트로 보내고, 첫 토큰 전의 긴 준비 단계
+  (기억 검색, 임베딩 등)나 생성 중 멈춤 구간에는 SSE_HEARTBEAT_S마다 `: ping` 주석을 보냅니다.
+  source가 StreamAborted로 끝나면(같은 사용자의 새 요청으로 중단 등) done 대신 reason이 담긴 aborted를 보냅니다.
+- "raw" 형식: 기존 main.js 리더와 호환되도록 텍스트만 그대로 이어서 보냅니다. (하트비트 없음)
+"""
+import asyncio
+import json
+import os
+from typing import AsyncGenerator, AsyncIterator, Dict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 요청에서 형식을 지정하지 않았을 때의 기본값. 이전 프론트엔드 호환을 위해 raw가 기본입니다.
+CHAT_STREAM_FORMAT = os.getenv("CHAT_STREAM_FORMAT", "raw")
+SSE_FLUSH_BYTES = int(os.getenv("SSE_FLUSH_BYTES", 256))
+SSE_FLUSH_MS = float(os.getenv("SSE_FLUSH_MS", 30))
+SSE_HEARTBEAT_S = float(os.getenv("SSE_HEARTBEAT_S", 10))
+
+STREAM_FORMATS = ("raw", "sse")
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+_stats = {"streams": 0, "tokens_in": 0, "writes": 0, "heartbeats": 0, "aborted": 0, "errors": 0}
+
+
+class StreamAborted(Exception):
+    """답변이 끝까지 생성되지 않고 중단되었음을 알립니다. (reason: "replaced" 등)"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def format_event(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _encode_text(text: str, stream_format: str) -> str:
+    return format_event("token", {"text": text}) if stream_format == "sse" else text
+
+
+async def framed_stream(
+    source: AsyncIterator[str], stream_format: str = "raw", done_payload: Dict | None = None
+) -> AsyncGenerator[str, None]:
+    """
+    텍스트 조각을 내보내는 async generator를 묶음 쓰기 + (sse 형식이면) 이벤트 프레이밍으로 감쌉니다.
+    source의 다음 조각을 기다리는 작업은 하나만 유지하며, 기다리는 동안 flush/heartbeat 시점을 확인합니다.
+    """
+    loop = asyncio.get_running_loop()
+    flush_s = SSE_FLUSH_MS / 1000
+    iterator = source.__aiter__()
+    pending: asyncio.Future | None = None
+    buffer: list[str] = []
+    buffered_bytes = 0
+    buffer_started = 0.0
+    last_write = loop.time()
+    _stats["streams"] += 1
+
+    def flush() -> str:
+        nonlocal buffer, buffered_bytes, last_write
+        text = "".join(buffer)
+        buffer, buffered_bytes = [], 0
+        last_write = loop.time()
+        _stats["writes"] += 1
+        return _encode_text(text, stream_format)
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+
+            now = loop.time()
+            deadlines = []
+            if buffer:
+                deadlines.append(buffer_started + flush_s)
+            if stream_format == "sse":
+                deadlines.append(last_write + SSE_HEARTBEAT_S)
+            timeout = max(0.0, min(deadlines) - now) if deadlines else None
+
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                now = loop.time()
+                if buffer and now - buffer_started >= flush_s:
+                    yield flush()
+                elif stream_format == "sse" and now - last_write >= SSE_HEARTBEAT_S:
+                    last_write = now
+                    _stats["heartbeats"] += 1
+                    yield ": ping\n\n"
+                continue
+
+            task, pending = pending, None
+            try:
+                chunk = task.result()
+            except StopAsyncIteration:
+                break
+            except StreamAborted as e:
+                # 받은 부분까지는 보내고, 완료(done)로 오해하지 않도록 aborted로 끝냅니다. (raw 형식은 그냥 끝냄)
+                _stats["aborted"] += 1
+                if buffer:
+                    yield flush()
+                if stream_format == "sse":
+                    yield format_event("aborted", {**(done_payload or {}), "reason": e.reason})
+                return
+            except Exception as e:
+                _stats["errors"] += 1
+                if stream_format != "sse":
+                    raise
+                print(f"[ERROR] Chat stream failed: {e}")
+                if buffer:
+                    yield flush()
+                yield format_event("error", {"message": "응답 생성 중 오류가 발생했습니다."})
+                return
+
+            if not chunk:
+                continue
+            if not buffer:
+                buffer_started = loop.time()
+            buffer.append(chunk)
+            buffered_bytes += len(chunk.encode("utf-8"))
+            _stats["tokens_in"] += 1
+            if buffered_bytes >= SSE_FLUSH_BYTES or loop.time() - buffer_started >= flush_s:
+                yield flush()
+
+        if buffer:
+            yield flush()
+        if stream_format == "sse":
+            yield format_event("done", done_payload or {})
+    finally:
+        # 응답이 중간에 끊긴 경우에도 source를 정리합니다. (대기 중인 __anext__가 있으면 먼저 취소)
+        if pending is not None:
+            pending.cancel()
+            try:
+                await pending
+            except (asyncio.CancelledError, StopAsyncIteration, Exception):
+                pass
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def get_stream_stats() -> Dict:
+    stats = dict(_stats)
+    stats["tokens_per_write"] = round(stats["tokens_in"] / stats["writes"], 2) if stats["writes"] else 0.0
+    return stats
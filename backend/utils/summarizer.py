@@ -0,0 +1,121 @@
+# utils/summarizer.py
+"""
+오래된 대화를 사용자별 요약 레코드로 압축하는 백그라운드 작업.
+
+최근 SUMMARY_KEEP_RECENT개의 대화는 원문 그대로 두고, 그 이전에 쌓인 대화를
+SUMMARY_CHUNK_TURNS개씩 묶어 (목표, 부상, 선호, 계획 수행률, 주요 내용) 요약으로 저장합니다.
+요약에는 자체 임베딩이 붙어 장기 기억 검색에서 원문보다 먼저 사용됩니다.
+
+gpt-4o 호출 비용이 드는 백그라운드 작업이므로 기본으로 꺼져 있으며, SUMMARY_ENABLED=true로 켭니다.
+"""
+import asyncio
+import json
+import os
+from dotenv import load_dotenv
+
+from crud import summary as summary_crud
+from .llm_gateway import chat_completion, create_embedding
+from .metering import set_metering_user
+from .prompts import build_summary_prompt
+
+load_dotenv()
+
+SUMMARY_ENABLED = os.getenv("SUMMARY_ENABLED", "false").lower() == "true"
+SUMMARY_INTERVAL_S = float(os.getenv("SUMMARY_INTERVAL_S", 1800))
+SUMMARY_MIN_TURNS = int(os.getenv("SUMMARY_MIN_TURNS", 40))
+SUMMARY_KEEP_RECENT = int(os.getenv("SUMMARY_KEEP_RECENT", 20))
+SUMMARY_CHUNK_TURNS = int(os.getenv("SUMMARY_CHUNK_TURNS", 80))
+# 요약 입력에서 메시지 하나당 최대 글자 수 (긴 루틴 답변은 앞부분만 사용)
+SUMMARY_MESSAGE_CHARS = int(os.getenv("SUMMARY_MESSAGE_CHARS", 400))
+
+_task: asyncio.Task | None = None
+
+
+def _format_summary(data: dict, adherence: dict) -> str:
+    workout = adherence.get("workout_plans", {})
+    diet = adherence.get("diet_plans", {})
+    lines = [
+        f"목표: {data.get('goals') or '정보 없음'}",
+        f"부상/주의: {data.get('injuries') or '정보 없음'}",
+        f"선호: {data.get('preferences') or '정보 없음'}",
+        f"최근 14일 계획 수행: 운동 {workout.get('completed', 0)}/{workout.get('total', 0)}, "
+        f"식단 {diet.get('completed', 0)}/{diet.get('total', 0)}",
+    ]
+    if data.get("highlights"):
+        lines.append(f"주요 내용: {data['highlights']}")
+    return "\n".join(lines)
+
+
+async def summarize_user(user_id: str) -> bool:
+    """사용자의 요약되지 않은 오래된 대화 한 묶음을 요약합니다. 요약을 저장했으면 True."""
+    set_metering_user(user_id)
+    watermark = await summary_crud.get_summary_watermark(user_id)
+    turns = await summary_crud.get_unsummarized_turns(user_id, watermark, SUMMARY_KEEP_RECENT, SUMMARY_CHUNK_TURNS)
+    # 질문-답변 쌍이 요약 경계에서 갈라지지 않도록 마지막 user 메시지는 다음 묶음으로 넘깁니다.
+    while turns and turns[-1]["role_type"] == "user":
+        turns.pop()
+    if len(turns) < 2:
+        return False
+
+    previous = await summary_crud.get_latest_summary(user_id)
+    transcript = "\n".join(
+        f"[{str(t['timestamp'])[:10] if t.get('timestamp') else ''}] {t['role_type']}: {t['content'][:SUMMARY_MESSAGE_CHARS]}"
+        for t in turns
+    )
+    response = await chat_completion(
+        "summary",
+        messages=[{"role": "user", "content": build_summary_prompt(previous["summary"] if previous else None, transcript)}],
+        temperature=0.0,
+        response_format={"type": "json_object"},
+    )
+    data = json.loads(response.choices[0].message.content)
+    adherence = await summary_crud.get_plan_adherence(user_id)
+    summary_text = _format_summary(data, adherence)
+
+    embedding_response = await create_embedding(summary_text)
+    await summary_crud.save_summary(
+        user_id, summary_text, embedding_response.data[0].embedding, turns[0]["prompt_id"], turns[-1]["prompt_id"]
+    )
+    print(f"[INFO] Summary saved for user {user_id}: prompt_id {turns[0]['prompt_id']}~{turns[-1]['prompt_id']}")
+    return True
+
+
+async def run_summary_pass() -> int:
+    """요약이 필요한 모든 사용자에 대해 한 번씩 요약을 수행하고, 저장한 요약 수를 반환합니다."""
+    saved = 0
+    for user_id in await summary_crud.find_users_needing_summary(SUMMARY_MIN_TURNS, SUMMARY_KEEP_RECENT):
+        try:
+            if await summarize_user(user_id):
+                saved += 1
+        except Exception as e:
+            print(f"[ERROR] Failed to summarize history for user {user_id}: {e}")
+    set_metering_user(None)
+    return saved
+
+
+async def _summarizer_loop():
+    while True:
+        try:
+            saved = await run_summary_pass()
+            if saved:
+                print(f"[INFO] Summarizer pass finished: {saved} summaries")
+        except Exception as e:
+            print(f"[ERROR] Summarizer pass failed: {e}")
+        await asyncio.sleep(SUMMARY_INTERVAL_S)
+
+
+def start_summarizer():
+    global _task
+    if SUMMARY_ENABLED and _task is None:
+        _task = asyncio.create_task(_summarizer_loop())
+
+
+async def stop_summarizer():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
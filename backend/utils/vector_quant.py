@@ -0,0 +1,118 @@
+# utils/vector_quant.py
+"""
+채팅 임베딩 1차 검색용 int8 스칼라 양자화.
+
+- 벡터를 단위 길이로 정규화한 뒤 절댓값이 가장 큰 성분이 127이 되도록 벡터별 scale을 곱해 int8로 저장합니다.
+  (float64 대비 약 1/8 크기, 벡터마다 float32 scale 하나가 추가됩니다)
+- EMBEDDING_PROJECTION_DIM을 지정하면 고정 시드의 랜덤 가우시안 투영으로 차원을 줄인 뒤 양자화합니다.
+- 내적은 int32로 누적해 계산하며, 순위의 작은 오차는 뒤따르는 Cross-Encoder 재정렬이 바로잡습니다.
+"""
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBEDDING_PROJECTION_DIM = int(os.getenv("EMBEDDING_PROJECTION_DIM", 0))
+PROJECTION_SEED = 20250101
+INT8_SCALE = 127.0
+
+_projections: Dict[Tuple[int, int], np.ndarray] = {}
+
+
+def _projection(dim: int, target_dim: int) -> np.ndarray:
+    key = (dim, target_dim)
+    if key not in _projections:
+        rng = np.random.default_rng(PROJECTION_SEED)
+        _projections[key] = (rng.standard_normal((dim, target_dim)) / np.sqrt(target_dim)).astype(np.float32)
+    return _projections[key]
+
+
+def quantize(vectors, projection_dim: int = EMBEDDING_PROJECTION_DIM) -> Tuple[np.ndarray, np.ndarray]:
+    """(n, d) 또는 (d,) float 벡터를 정규화/투영 후 (int8 코드, 벡터별 scale)로 변환합니다."""
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    if projection_dim and projection_dim < matrix.shape[1]:
+        matrix = matrix @ _projection(matrix.shape[1], projection_dim)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms == 0, 1.0, norms)
+    max_abs = np.abs(matrix).max(axis=1, keepdims=True)
+    scales = INT8_SCALE / np.where(max_abs == 0, 1.0, max_abs)
+    codes = np.clip(np.rint(matrix * scales), -127, 127).astype(np.int8)
+    return codes, scales.reshape(-1).astype(np.float32)
+
+
+def int8_scores(codes: np.ndarray, scales: np.ndarray, query_code: np.ndarray, query_scale: float) -> np.ndarray:
+    """int8 코드끼리의 내적을 코사인 유사도 근사값(-1~1)으로 반환합니다."""
+    # float32 BLAS 행렬곱이 int32 누적보다 빠르고, 값 범위(127*127*d)에서도 순위에 영향이 없습니다.
+    dots = codes.astype(np.float32) @ query_code.reshape(-1).astype(np.float32)
+    return dots / (scales * query_scale)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """점수 내림차순 상위 k개의 위치."""
+    if len(scores) <= k:
+        return np.argsort(-scores)
+    part = np.argpartition(-scores, k)[:k]
+    return part[np.argsort(-scores[part])]
+
+
+class QuantizedIndex:
+    """한 사용자의 질문 임베딩을 int8 코드로 보관하는 인메모리 인덱스. prompt_id 순으로만 추가됩니다."""
+
+    def __init__(self, projection_dim: int = EMBEDDING_PROJECTION_DIM):
+        self.projection_dim = projection_dim
+        self.prompt_ids = np.empty(0, dtype=np.int64)
+        self.codes: np.ndarray | None = None
+        self.scales = np.empty(0, dtype=np.float32)
+        self.contents: List[str] = []
+        self.timestamps: List = []
+
+    @property
+    def last_prompt_id(self) -> int:
+        return int(self.prompt_ids[-1]) if len(self.prompt_ids) else 0
+
+    def __len__(self) -> int:
+        return len(self.prompt_ids)
+
+    def nbytes(self) -> int:
+        return (self.codes.nbytes if self.codes is not None else 0) + self.scales.nbytes + self.prompt_ids.nbytes
+
+    def add(self, prompt_ids: List[int], vectors: List[List[float]], contents: List[str], timestamps: List):
+        # 같은 사용자의 동시 요청이 같은 행을 읽어 온 경우 이미 들어간 항목은 건너뜁니다.
+        keep = [i for i, prompt_id in enumerate(prompt_ids) if prompt_id > self.last_prompt_id]
+        if not keep:
+            return
+        if len(keep) < len(prompt_ids):
+            prompt_ids = [prompt_ids[i] for i in keep]
+            vectors = [vectors[i] for i in keep]
+            contents = [contents[i] for i in keep]
+            timestamps = [timestamps[i] for i in keep]
+        codes, scales = quantize(vectors, self.projection_dim)
+        self.codes = codes if self.codes is None else np.vstack([self.codes, codes])
+        self.scales = np.concatenate([self.scales, scales])
+        self.prompt_ids = np.concatenate([self.prompt_ids, np.asarray(prompt_ids, dtype=np.int64)])
+        self.contents.extend(contents)
+        self.timestamps.extend(timestamps)
+
+    def drop_up_to(self, prompt_id: int):
+        """prompt_id 이하(요약/보관된) 항목을 버립니다."""
+        cut = int(np.searchsorted(self.prompt_ids, prompt_id, side="right"))
+        if cut:
+            self.prompt_ids = self.prompt_ids[cut:]
+            self.codes = self.codes[cut:] if self.codes is not None else None
+            self.scales = self.scales[cut:]
+            self.contents = self.contents[cut:]
+            self.timestamps = self.timestamps[cut:]
+
+    def search(self, query_vector, k: int) -> List[Tuple[float, int, str, object]]:
+        """(근사 유사도, prompt_id, 질문, timestamp) 목록을 유사도 내림차순으로 반환합니다."""
+        if not len(self):
+            return []
+        query_codes, query_scales = quantize(query_vector, self.projection_dim)
+        scores = int8_scores(self.codes, self.scales, query_codes[0], query_scales[0])
+        return [
+            (float(scores[i]), int(self.prompt_ids[i]), self.contents[i], self.timestamps[i])
+            for i in top_k(scores, k)
+        ]
@@ -1,13 +1,29 @@
+import asyncio
 import os
 import re
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from dotenv import load_dotenv
+from .singleflight import singleflight
 
 load_dotenv()
 
 youtube_api_key = os.getenv("YOUTUBE_API_KEY")
 
+def _search(search_query: str, max_result: int) -> dict:
+    youtube = build('youtube', 'v3', developerKey=youtube_api_key)
+    request = youtube.search().list(
+        q=search_query,
+        part='snippet',
+        type='video',
+        maxResults=max_result,
+        order='relevance',
+        regionCode='KR'
+    )
+    return request.execute()
+
+# 같은 검색어로 동시에 들어온 요청은 YouTube API 호출 하나를 공유합니다.
+@singleflight("youtube_search")
 async def search_youtube_videos(query: str, max_result: int = 3) -> dict:
     search_query = re.sub(r"영상 찾아줘|찾아줘", "", query).strip()
 
@@ -15,21 +31,8 @@ async def search_youtube_videos(query: str, max_result: int = 3) -> dict:
         return {"success": False, "message": "YOUTUBE_API_KEY not found in environment variables.", "videos": []}
 
     try:
-        # build 함수는 동기 함수이므로, 비동기 컨텍스트에서 직접 호출해도 무방합니다.
-        youtube = build('youtube', 'v3', developerKey=youtube_api_key)
-
-        request = youtube.search().list(
-            q=search_query,
-            part='snippet',
-            type='video',
-            maxResults=max_result,
-            order='relevance',
-            regionCode='KR'
-        )
-        
-        # execute()는 동기 함수이므로, 실제 비동기 환경에서는 run_in_threadpool 등을 고려할 수 있으나,
-        # 여기서는 간단화를 위해 직접 호출합니다. (FastAPI의 비동기 처리와는 별개)
-        response = request.execute()
+        # build()/execute()는 동기 호출이므로 스레드에서 실행해 이벤트 루프를 막지 않습니다.
+        response = await asyncio.to_thread(_search, search_query, max_result)
         items = response.get('items', [])
 
         if not items:
@@ -338,6 +338,18 @@ document.addEventListener("DOMContentLoaded", () => {
         }
     }
 
+    function parseSseEvent(rawEvent) {
+        // ": ping" 같은 주석 줄(하트비트)은 무시하고 event/data 줄만 읽습니다.
+        let event = "message";
+        const dataLines = [];
+        rawEvent.split("\n").forEach(line => {
+            if (line.startsWith("event:")) event = line.slice(6).trim();
+            else if (line.startsWith("data:")) dataLines.push(line.slice(5).trim());
+        });
+        if (dataLines.length === 0) return { event: null, data: null };
+        return { event, data: JSON.parse(dataLines.join("\n")) };
+    }
+
     function clearImagePreview() {
         if(imageInput) imageInput.value = "";
         if(previewImage) previewImage.src = "";
@@ -360,12 +372,131 @@ document.addEventListener("DOMContentLoaded", () => {
         }
     });
 
+    // 답변을 받는 중에 새 메시지를 보내면 이전 요청을 중단해 서버도 생성을 멈추게 합니다.
+    let currentChatController = null;
+
+    // WebSocket 세션: 로그인 토큰으로 한 번만 연결하고 이후 메시지는 같은 연결로 보냅니다.
+    let chatSocketReady = null;
+    const socketHandlers = new Map();
+    let socketRequestSeq = 0;
+
+    function connectChatSocket() {
+        if (chatSocketReady) return chatSocketReady;
+        chatSocketReady = new Promise((resolve, reject) => {
+            const wsUrl = `${BASE_API_URL.replace(/^http/, "ws")}/ws/chat?token=${encodeURIComponent(token)}`;
+            const socket = new WebSocket(wsUrl);
+            socket.onmessage = (e) => {
+                const data = JSON.parse(e.data);
+                if (data.type === "ready") {
+                    resolve(socket);
+                    return;
+                }
+                const handler = socketHandlers.get(data.id);
+                if (handler) handler(data);
+            };
+            socket.onclose = () => {
+                chatSocketReady = null;
+                socketHandlers.forEach(handler => handler({ type: "closed" }));
+                socketHandlers.clear();
+                reject(new Error("WebSocket 연결 실패"));
+            };
+        });
+        return chatSocketReady;
+    }
+
+    function fileToBase64(file) {
+        return new Promise((resolve, reject) => {
+            const reader = new FileReader();
+            reader.onload = () => resolve(reader.result.split(",")[1]);
+            reader.onerror = () => reject(reader.error);
+            reader.readAsDataURL(file);
+        });
+    }
+
+    async function streamChatOverSocket(message, file, model, signal, onText) {
+        const socket = await connectChatSocket();
+        const image = file ? await fileToBase64(file) : null;
+        const id = `m${++socketRequestSeq}`;
+        return new Promise((resolve, reject) => {
+            const finish = (fn, value) => {
+                socketHandlers.delete(id);
+                signal.removeEventListener("abort", onAbort);
+                fn(value);
+            };
+            const onAbort = () => {
+                socket.send(JSON.stringify({ type: "cancel", id }));
+                finish(reject, new DOMException("Aborted", "AbortError"));
+            };
+            socketHandlers.set(id, (data) => {
+                if (data.type === "token") {
+                    onText(data.text);
+                } else if (data.type === "done") {
+                    finish(resolve, true);
+                } else if (data.type === "error") {
+                    onText(`\n[${data.message}]`);
+                    finish(resolve, true);
+                } else if (data.type === "cancelled") {
+                    finish(reject, new DOMException("Aborted", "AbortError"));
+                } else if (data.type === "closed") {
+                    finish(reject, new Error("WebSocket 연결이 끊어졌습니다."));
+                }
+            });
+            signal.addEventListener("abort", onAbort);
+            socket.send(JSON.stringify({ type: "chat", id, message, model, image }));
+        });
+    }
+
+    async function streamChatOverHttp(message, file, model, signal, onText) {
+        const formData = new FormData();
+        formData.append("message", message);
+        if (file) formData.append("image", file);
+        formData.append("model", model);
+        formData.append("stream_format", "sse");
+
+        const res = await fetch(`${BASE_API_URL}/chat/image`, {
+            method: "POST",
+            headers: { Authorization: `Bearer ${token}` },
+            body: formData,
+            signal,
+        });
+        if (res.status === 429) {
+            // 입장 제한(요청이 너무 잦거나 서버가 붐빔): 안내 문구만 보여주고 재시도는 사용자에게 맡깁니다.
+            const body = await res.json().catch(() => ({}));
+            onText(`[${body.detail || "잠시 후 다시 시도해 주세요."}]`);
+            return true;
+        }
+        if (!res.ok) return false;
+
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let sseBuffer = "";
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            sseBuffer += decoder.decode(value, { stream: true });
+            // SSE 이벤트는 빈 줄("\n\n")로 구분됩니다. 마지막 조각은 다음 read에서 이어 붙입니다.
+            const events = sseBuffer.split("\n\n");
+            sseBuffer = events.pop();
+            for (const rawEvent of events) {
+                const { event, data } = parseSseEvent(rawEvent);
+                if (event === "token") onText(data.text);
+                else if (event === "aborted") onText("\n[응답이 중간에 중단되었습니다]");
+                else if (event === "error") onText(`\n[${data.message}]`);
+            }
+        }
+        return true;
+    }
+
     if(chatForm) chatForm.addEventListener("submit", async (event) => {
         event.preventDefault();
         const message = userInput.value.trim();
         const file = imageInput.files[0];
         if (!message && !file) return;
 
+        if (currentChatController) currentChatController.abort();
+        const chatController = new AbortController();
+        currentChatController = chatController;
+
         if (welcomeMessage && !mainContent.classList.contains("chat-active")) {
             mainContent.classList.add("chat-active");
         }
@@ -375,11 +506,7 @@ document.addEventListener("DOMContentLoaded", () => {
         saveChatHistory();
         userInput.value = "";
 
-        const formData = new FormData();
-        formData.append("message", message);
-        if (file) formData.append("image", file);
         const model = modelSelector.value;
-        formData.append("model", model);
 
         const botMessageDiv = document.createElement("div");
         botMessageDiv.className = "message bot";
@@ -393,27 +520,25 @@ document.addEventListener("DOMContentLoaded", () => {
         let fullStreamBuffer = "";
         let youtubeVideos = [];
 
+        // 스트리밍 중에는 appendMessage를 직접 호출하지 않고, 마지막에 한 번만 호출
+        const onText = (text) => {
+            fullStreamBuffer += text;
+            botMessageDiv.innerText = fullStreamBuffer; // 임시로 텍스트만 업데이트
+            chatBox.scrollTop = chatBox.scrollHeight;
+        };
+
         try {
-            const res = await fetch(`${BASE_API_URL}/chat/image`, {
-                method: "POST",
-                headers: { Authorization: `Bearer ${token}` },
-                body: formData,
-            });
+            let ok;
+            try {
+                ok = await streamChatOverSocket(message, file, model, chatController.signal, onText);
+            } catch (socketErr) {
+                if (socketErr.name === "AbortError" || fullStreamBuffer) throw socketErr;
+                // WebSocket을 쓸 수 없으면 기존 HTTP(SSE) 경로로 보냅니다.
+                console.warn("WebSocket unavailable, falling back to HTTP:", socketErr);
+                ok = await streamChatOverHttp(message, file, model, chatController.signal, onText);
+            }
 
-            if (res.ok) {
-                const reader = res.body.getReader();
-                const decoder = new TextDecoder();
-
-                while (true) {
-                    const { done, value } = await reader.read();
-                    if (done) break;
-                    let chunk = decoder.decode(value, { stream: true });
-                    fullStreamBuffer += chunk;
-                    // 스트리밍 중에는 appendMessage를 직접 호출하지 않고, 마지막에 한 번만 호출
-                    botMessageDiv.innerText = fullStreamBuffer; // 임시로 텍스트만 업데이트
-                    chatBox.scrollTop = chatBox.scrollHeight;
-                }
-                
+            if (ok) {
                 try {
                     const youtubeSearchRes = await fetch(`${BASE_API_URL}/youtube_search?query=${encodeURIComponent(fullStreamBuffer)}`, {
                         headers: { Authorization: `Bearer ${token}` },
@@ -463,11 +588,25 @@ document.addEventListener("DOMContentLoaded", () => {
                 saveChatHistory();
             }
         } catch (err) {
+            if (err.name === "AbortError") {
+                // 중단된 답변은 받은 부분까지만 남깁니다.
+                ttsLoadingWrapper.remove();
+                if (fullStreamBuffer) {
+                    appendMessage("bot", fullStreamBuffer, [], botMessageDiv);
+                    chatHistory.push({ sender: "bot", text: fullStreamBuffer, videos: [] });
+                    saveChatHistory();
+                } else {
+                    botMessageDiv.remove();
+                }
+                return;
+            }
             botMessageDiv.innerText = "❗ 네트워크 오류입니다.";
             ttsLoadingWrapper.remove();
             chatHistory.push({ sender: "bot", text: "❗ 네트워크 오류입니다." });
             saveChatHistory();
             console.error(err);
+        } finally {
+            if (currentChatController === chatController) currentChatController = null;
         }
         clearImagePreview();
     });